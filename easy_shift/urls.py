@@ -21,6 +21,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/v1/', include('shift_planer.api_urls')),
     # WICHTIG: Stelle sicher, dass dies 'shift_planer.urls' ist und NICHTS DAHINTER KOMMT, was dynamisch sein könnte.
     path('', include('shift_planer.urls')), 
 ]
\ No newline at end of file
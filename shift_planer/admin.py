@@ -1,10 +1,13 @@
 # shift_planer/admin.py
 
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
 from .models import (
     ProfessionalProfile, Qualification, Employee,
-    Ward, Shift, ShiftAssignment, EmployeeAvailability, Absence
+    Ward, Shift, ShiftAssignment, EmployeeAvailability, Absence, ScheduleJob, ScheduleRunLog
 )
+from .validation import AssignmentSlot, validate_slot, validate_slots
 
 # Register ProfessionalProfile
 @admin.register(ProfessionalProfile)
@@ -49,13 +52,51 @@ class ShiftAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     filter_horizontal = ('required_qualifications',)
 
+class ShiftAssignmentAdminForm(forms.ModelForm):
+    """Admin form for single assignments, checked with the same rules as the planning form."""
+
+    class Meta:
+        model = ShiftAssignment
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        ward, date, shift, employee = (cleaned_data.get(name) for name in ('ward', 'date', 'shift', 'employee'))
+        if ward and date and shift and employee:
+            # Nur die bearbeitete Zuweisung selbst ignorieren, die übrigen des Slots bleiben bestehen
+            result = validate_slot(
+                ward, date, shift, [employee],
+                replace_slots=False,
+                exclude_assignment_ids={self.instance.pk} if self.instance.pk else ()
+            )
+            if result.errors:
+                raise ValidationError([violation.message for violation in result.errors])
+        return cleaned_data
+
+
 # Register ShiftAssignment
 @admin.register(ShiftAssignment)
 class ShiftAssignmentAdmin(admin.ModelAdmin):
+    form = ShiftAssignmentAdminForm
     list_display = ('date', 'ward', 'shift', 'employee', 'status')
     list_filter = ('date', 'ward', 'shift', 'status')
     search_fields = ('employee__first_name', 'employee__last_name', 'ward__name', 'shift__name')
     date_hierarchy = 'date' # Adds a date-based navigation
+    actions = ['validate_assignments']
+
+    @admin.action(description="Ausgewählte Zuweisungen prüfen")
+    def validate_assignments(self, request, queryset):
+        assignments = list(queryset.select_related('ward', 'shift'))
+        # Jede Zuweisung einzeln gegen alle übrigen prüfen
+        slots = [AssignmentSlot(a.ward, a.date, a.shift, [a.employee_id]) for a in assignments]
+        violations = []
+        for result in validate_slots(slots, replace_slots=False, exclude_assignment_ids={a.pk for a in assignments}):
+            violations.extend(result.errors)
+        if violations:
+            for violation in violations:
+                self.message_user(request, violation.message, messages.ERROR)
+        else:
+            self.message_user(request, f"{len(assignments)} Zuweisungen geprüft, keine Verstöße gefunden.", messages.SUCCESS)
 
 # Register EmployeeAvailability
 @admin.register(EmployeeAvailability)
@@ -73,3 +114,17 @@ class AbsenceAdmin(admin.ModelAdmin):
     search_fields = ('employee__first_name', 'employee__last_name', 'notes')
     date_hierarchy = 'start_date'
 
+
+# Register ScheduleJob
+@admin.register(ScheduleJob)
+class ScheduleJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'ward', 'year', 'month', 'status', 'progress', 'created_at', 'finished_at')
+    list_filter = ('status', 'ward')
+    readonly_fields = ('progress', 'progress_message', 'result_message', 'created_at', 'started_at', 'finished_at')
+
+# Register ScheduleRunLog (Einträge sind über die Protokoll-Seite paginiert einsehbar)
+@admin.register(ScheduleRunLog)
+class ScheduleRunLogAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'description', 'ward', 'level', 'dropped_entries', 'created_at')
+    list_filter = ('ward', 'level')
+    readonly_fields = ('job', 'code_counts', 'level_counts', 'dropped_entries', 'profile', 'created_at')
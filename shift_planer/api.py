@@ -0,0 +1,201 @@
+# shift_planer/api.py
+
+import datetime
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from shift_planer.models import Employee, Ward, Shift, ShiftAssignment
+from shift_planer.serializers import (
+    ASSIGNMENT_VALUE_FIELDS, WardSerializer, ShiftSerializer, AssignmentRowSerializer, BulkSlotWriteSerializer
+)
+from shift_planer.validation import AssignmentSlot, validate_slots
+from shift_planer.scheduler import STATUS_UPDATE_BATCH_SIZE, BULK_CREATE_BATCH_SIZE
+from shift_planer.calendar_cache import batched_invalidation, invalidate_calendar_for_assignments
+
+
+class AssignmentCursorPagination(CursorPagination):
+    # (date, id) ist eindeutig und stabil, auch wenn während des Blätterns geschrieben wird
+    ordering = ('date', 'id')
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 20000
+
+
+class SlotWritePermissions(DjangoModelPermissions):
+    """A slot write may create, change and delete assignments, so POST needs all three model permissions."""
+    perms_map = dict(DjangoModelPermissions.perms_map, POST=[
+        '%(app_label)s.add_%(model_name)s', '%(app_label)s.change_%(model_name)s', '%(app_label)s.delete_%(model_name)s'
+    ])
+
+
+class WardListView(generics.ListAPIView):
+    permission_classes = [IsAuthenticated]
+    queryset = Ward.objects.order_by('name')
+    serializer_class = WardSerializer
+    pagination_class = None
+
+
+class ShiftListView(generics.ListAPIView):
+    permission_classes = [IsAuthenticated]
+    queryset = Shift.objects.order_by('start_time')
+    serializer_class = ShiftSerializer
+    pagination_class = None
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: f"Ungültiges Datum '{value}', erwartet YYYY-MM-DD."})
+
+
+def _parse_ids(value, name):
+    try:
+        return [int(part) for part in value.split(',') if part]
+    except ValueError:
+        raise ValidationError({name: "Erwartet eine kommagetrennte Liste von IDs."})
+
+
+class AssignmentListView(generics.ListAPIView):
+    """
+    Assignments filtered by ward (ids or slugs, comma-separated), start/end date, employee,
+    shift and status; cursor-paginated by (date, id). page_size up to 20000 fetches a whole
+    hospital-month in one request.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = AssignmentRowSerializer
+    pagination_class = AssignmentCursorPagination
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = ShiftAssignment.objects.all()
+
+        if params.get('ward'):
+            parts = [part for part in params['ward'].split(',') if part]
+            ids = [int(part) for part in parts if part.isdigit()]
+            slugs = [part for part in parts if not part.isdigit()]
+            queryset = queryset.filter(Q(ward_id__in=ids) | Q(ward__slug__in=slugs))
+        if params.get('start'):
+            queryset = queryset.filter(date__gte=_parse_date(params['start'], 'start'))
+        if params.get('end'):
+            queryset = queryset.filter(date__lte=_parse_date(params['end'], 'end'))
+        if params.get('employee'):
+            queryset = queryset.filter(employee_id__in=_parse_ids(params['employee'], 'employee'))
+        if params.get('shift'):
+            queryset = queryset.filter(shift_id__in=_parse_ids(params['shift'], 'shift'))
+        if params.get('status'):
+            queryset = queryset.filter(status__in=params['status'].split(','))
+
+        # values() statt Modellinstanzen: Station, Schicht und Mitarbeiter kommen aus demselben JOIN
+        return queryset.values(*ASSIGNMENT_VALUE_FIELDS)
+
+
+def _violation_data(index, violation):
+    return {"slot": index, "code": violation.code, "employee": violation.employee_id, "message": violation.message}
+
+
+class SlotBulkWriteView(APIView):
+    """
+    Creates, replaces or deletes whole shift slots in one transaction.
+
+    All slots are checked together with validate_slots (the rules of ShiftAssignmentForm).
+    Errors reject the whole request; warnings do too unless allow_warnings is set, as the
+    form does. Unchanged assignments keep their id, status changes use bulk_update.
+    Requires the add, change and delete permissions on ShiftAssignment.
+    """
+    permission_classes = [SlotWritePermissions]
+    # Nur für DjangoModelPermissions (Modell der Berechtigungen)
+    queryset = ShiftAssignment.objects.none()
+
+    def post(self, request):
+        serializer = BulkSlotWriteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        slots = serializer.validated_data['slots']
+        allow_warnings = serializer.validated_data['allow_warnings']
+
+        wards = Ward.objects.in_bulk({slot['ward'] for slot in slots})
+        shifts = Shift.objects.in_bulk({slot['shift'] for slot in slots})
+        requested_employee_ids = {emp_id for slot in slots if slot['action'] != 'delete' for emp_id in slot['employees']}
+        known_employee_ids = set(Employee.objects.filter(pk__in=requested_employee_ids).values_list('id', flat=True))
+
+        unknown = []
+        for index, slot in enumerate(slots):
+            if slot['ward'] not in wards:
+                unknown.append({"slot": index, "code": "UNKNOWN_WARD", "message": f"Station {slot['ward']} existiert nicht."})
+            if slot['shift'] not in shifts:
+                unknown.append({"slot": index, "code": "UNKNOWN_SHIFT", "message": f"Schicht {slot['shift']} existiert nicht."})
+            if slot['action'] != 'delete':
+                for emp_id in set(slot['employees']) - known_employee_ids:
+                    unknown.append({"slot": index, "code": "UNKNOWN_EMPLOYEE", "employee": emp_id, "message": f"Mitarbeiter {emp_id} existiert nicht."})
+        if unknown:
+            return Response({"errors": unknown}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic(), batched_invalidation():
+            # Bestehende Zuweisungen aller Slots mit einer Abfrage (Obermenge, dann im Speicher gefiltert)
+            slot_keys = {(slot['ward'], slot['date'], slot['shift']) for slot in slots}
+            existing_by_slot = {}
+            for pk, ward_id, date, shift_id, emp_id, current_status in ShiftAssignment.objects.filter(
+                ward_id__in={key[0] for key in slot_keys},
+                date__in={key[1] for key in slot_keys},
+                shift_id__in={key[2] for key in slot_keys}
+            ).values_list('id', 'ward_id', 'date', 'shift_id', 'employee_id', 'status'):
+                if (ward_id, date, shift_id) in slot_keys:
+                    existing_by_slot.setdefault((ward_id, date, shift_id), {})[emp_id] = (pk, current_status)
+
+            final_employees = []
+            for slot in slots:
+                existing = existing_by_slot.get((slot['ward'], slot['date'], slot['shift']), {})
+                if slot['action'] == 'delete':
+                    final_employees.append([])
+                elif slot['action'] == 'create':
+                    final_employees.append(list(dict.fromkeys(list(existing) + slot['employees'])))
+                else:
+                    final_employees.append(list(dict.fromkeys(slot['employees'])))
+
+            results = validate_slots([
+                AssignmentSlot(wards[slot['ward']], slot['date'], shifts[slot['shift']], employees)
+                for slot, employees in zip(slots, final_employees)
+            ])
+            errors = [_violation_data(index, v) for index, result in enumerate(results) for v in result.errors]
+            warnings = [
+                _violation_data(index, v) for index, (slot, result) in enumerate(zip(slots, results))
+                for v in result.warnings if slot['action'] != 'delete'
+            ]
+            if errors or (warnings and not allow_warnings):
+                return Response({"errors": errors, "warnings": warnings}, status=status.HTTP_400_BAD_REQUEST)
+
+            to_delete, to_update, to_create = [], [], []
+            for slot, employees in zip(slots, final_employees):
+                existing = existing_by_slot.get((slot['ward'], slot['date'], slot['shift']), {})
+                for emp_id, (pk, current_status) in existing.items():
+                    if emp_id not in employees:
+                        to_delete.append(pk)
+                    elif slot['action'] == 'replace' and current_status != slot['status']:
+                        to_update.append(ShiftAssignment(
+                            pk=pk, ward_id=slot['ward'], date=slot['date'], shift_id=slot['shift'], employee_id=emp_id, status=slot['status']
+                        ))
+                for emp_id in employees:
+                    if emp_id not in existing:
+                        to_create.append(ShiftAssignment(
+                            ward_id=slot['ward'], date=slot['date'], shift_id=slot['shift'], employee_id=emp_id, status=slot['status']
+                        ))
+
+            for i in range(0, len(to_delete), STATUS_UPDATE_BATCH_SIZE):
+                ShiftAssignment.objects.filter(pk__in=to_delete[i:i + STATUS_UPDATE_BATCH_SIZE]).delete()
+            ShiftAssignment.objects.bulk_update(to_update, ['status'], batch_size=STATUS_UPDATE_BATCH_SIZE)
+            ShiftAssignment.objects.bulk_create(to_create, batch_size=BULK_CREATE_BATCH_SIZE)
+            # bulk_update/bulk_create lösen keine Signale aus
+            invalidate_calendar_for_assignments(to_update + to_create)
+
+        return Response({
+            "created": len(to_create),
+            "updated": len(to_update),
+            "deleted": len(to_delete),
+            "warnings": warnings,
+        })
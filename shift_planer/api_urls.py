@@ -0,0 +1,14 @@
+# shift_planer/api_urls.py
+
+from django.urls import path
+from .api import WardListView, ShiftListView, AssignmentListView, SlotBulkWriteView
+
+app_name = 'shift_planer_api'
+
+# Eingebunden unter /api/v1/ (siehe easy_shift/urls.py)
+urlpatterns = [
+    path('wards/', WardListView.as_view(), name='ward_list'),
+    path('shifts/', ShiftListView.as_view(), name='shift_list'),
+    path('assignments/', AssignmentListView.as_view(), name='assignment_list'),
+    path('slots/', SlotBulkWriteView.as_view(), name='slot_bulk_write'),
+]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ShiftPlanerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shift_planer'
+
+    def ready(self):
+        from shift_planer import signals  # Signal-Handler für Cache-Invalidierung registrieren
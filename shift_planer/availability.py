@@ -0,0 +1,164 @@
+# shift_planer/availability.py
+
+import datetime
+from array import array
+from django.db.models import Q
+from shift_planer.models import Absence, EmployeeAvailability
+
+# Kennzeichnet im Wunschdienst-Array "kein Wunsch" (Schicht-IDs beginnen bei 1)
+NO_PREFERENCE = 0
+
+
+class AvailabilityMatrix:
+    """
+    Absences, unavailabilities and preferred shifts of an employees x days period.
+
+    Blocked days are stored as integer bitsets twice: one int per employee with a bit per
+    day (rows) and one int per day with a bit per employee row (columns), so a whole
+    employee or a whole day is read at once. Absences are filled as date ranges, i.e. one
+    mask operation per absence row. Preferred shifts are a dense employees x days int array
+    (row-major, NO_PREFERENCE where nothing was requested).
+    """
+
+    def __init__(self, start_date, end_date, employee_ids, absence_rows=(), availability_rows=()):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.day_count = max((end_date - start_date).days + 1, 0)
+        self.employee_ids = list(employee_ids)
+        self.rows = {emp_id: row for row, emp_id in enumerate(self.employee_ids)}
+
+        self.absent_rows = [0] * len(self.employee_ids)
+        self.unavailable_rows = [0] * len(self.employee_ids)
+        self.absent_columns = [0] * self.day_count
+        self.unavailable_columns = [0] * self.day_count
+        self.preferred = array('i', [NO_PREFERENCE]) * (len(self.employee_ids) * self.day_count)
+
+        for emp_id, absence_start, absence_end in absence_rows:
+            row = self.rows.get(emp_id)
+            if row is None:
+                continue
+            first = max((absence_start - start_date).days, 0)
+            last = min((absence_end - start_date).days, self.day_count - 1)
+            if first > last:
+                continue
+            self.absent_rows[row] |= ((1 << (last - first + 1)) - 1) << first
+            bit = 1 << row
+            for column in range(first, last + 1):
+                self.absent_columns[column] |= bit
+
+        for emp_id, date, is_available, preferred_shift_id in availability_rows:
+            row = self.rows.get(emp_id)
+            column = (date - start_date).days
+            if row is None or not 0 <= column < self.day_count:
+                continue
+            if not is_available:
+                self.unavailable_rows[row] |= 1 << column
+                self.unavailable_columns[column] |= 1 << row
+            if preferred_shift_id is not None:
+                self.preferred[row * self.day_count + column] = preferred_shift_id
+
+    @classmethod
+    def load(cls, start_date, end_date, employee_ids):
+        """Builds the matrix with one Absence and one EmployeeAvailability query."""
+        employee_ids = list(employee_ids)
+        absences = Absence.objects.filter(
+            approved=True,
+            start_date__lte=end_date,
+            end_date__gte=start_date
+        ).values_list('employee_id', 'start_date', 'end_date')
+        availabilities = EmployeeAvailability.objects.filter(
+            Q(is_available=False) | Q(preferred_shift__isnull=False),
+            date__gte=start_date,
+            date__lte=end_date
+        ).values_list('employee_id', 'date', 'is_available', 'preferred_shift_id')
+        return cls(start_date, end_date, employee_ids, absences, availabilities)
+
+    def subset(self, employee_ids):
+        """A matrix with the rows of the given employees only; the column bitsets are rebuilt for the new rows."""
+        selected = set(employee_ids)
+        employee_ids = [emp_id for emp_id in self.employee_ids if emp_id in selected]
+        subset = AvailabilityMatrix(self.start_date, self.end_date, employee_ids)
+        for new_row, emp_id in enumerate(employee_ids):
+            row = self.rows[emp_id]
+            subset.absent_rows[new_row] = self.absent_rows[row]
+            subset.unavailable_rows[new_row] = self.unavailable_rows[row]
+            subset.preferred[new_row * self.day_count:(new_row + 1) * self.day_count] = self.preferred_row(emp_id)
+        for target_rows, target_columns in (
+            (subset.absent_rows, subset.absent_columns), (subset.unavailable_rows, subset.unavailable_columns)
+        ):
+            for new_row, days in enumerate(target_rows):
+                while days:
+                    low = days & -days
+                    target_columns[low.bit_length() - 1] |= 1 << new_row
+                    days ^= low
+        return subset
+
+    def _column(self, date):
+        column = (date - self.start_date).days
+        return column if 0 <= column < self.day_count else None
+
+    def _bit(self, rows, emp_id, date):
+        row = self.rows.get(emp_id)
+        column = self._column(date)
+        if row is None or column is None:
+            return False
+        return rows[row] >> column & 1 == 1
+
+    # --- Einzelabfragen ---
+
+    def is_absent(self, emp_id, date):
+        return self._bit(self.absent_rows, emp_id, date)
+
+    def is_unavailable(self, emp_id, date):
+        return self._bit(self.unavailable_rows, emp_id, date)
+
+    def preferred_shift(self, emp_id, date):
+        """The preferred shift id or None."""
+        row = self.rows.get(emp_id)
+        column = self._column(date)
+        if row is None or column is None:
+            return None
+        return self.preferred[row * self.day_count + column] or None
+
+    # --- Zeilen und Spalten ---
+
+    def blocked_row(self, emp_id):
+        """Bitset of the days (bit 0 = start_date) the employee is absent or unavailable."""
+        row = self.rows.get(emp_id)
+        return 0 if row is None else self.absent_rows[row] | self.unavailable_rows[row]
+
+    def blocked_column(self, date):
+        """Bitset of the employee rows that are absent or unavailable on the date."""
+        column = self._column(date)
+        return 0 if column is None else self.absent_columns[column] | self.unavailable_columns[column]
+
+    def available_days(self, emp_id):
+        return self.day_count - self.blocked_row(emp_id).bit_count()
+
+    def preferred_row(self, emp_id):
+        """The preferred shift ids of one employee for every day of the period."""
+        row = self.rows[emp_id]
+        return self.preferred[row * self.day_count:(row + 1) * self.day_count]
+
+    def preferred_column(self, date):
+        """The preferred shift ids of all employees (in employee_ids order) on one day."""
+        column = self._column(date)
+        return array('i') if column is None else self.preferred[column::self.day_count]
+
+    def employees_in(self, rows):
+        """Employee ids of the set bits of a column bitset."""
+        employee_ids = []
+        while rows:
+            low = rows & -rows
+            employee_ids.append(self.employee_ids[low.bit_length() - 1])
+            rows ^= low
+        return employee_ids
+
+    def dates_in(self, days):
+        """Dates of the set bits of a row bitset."""
+        dates = []
+        while days:
+            low = days & -days
+            dates.append(self.start_date + datetime.timedelta(days=low.bit_length() - 1))
+            days ^= low
+        return dates
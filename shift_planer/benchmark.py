@@ -0,0 +1,195 @@
+# shift_planer/benchmark.py
+
+import datetime
+import random
+import statistics
+import time
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from shift_planer.models import (
+    ProfessionalProfile, Qualification, Employee, Ward, Shift, ShiftAssignment, EmployeeAvailability, Absence
+)
+from shift_planer.scheduler import month_bounds
+from shift_planer.staffing import invalidate_staffing_requirements
+from shift_planer.eligibility import invalidate_eligibility_index
+from shift_planer.calendar_cache import invalidate_calendar_ward, calendar_cache_stats, reset_calendar_cache_stats
+
+# Mitarbeiter pro Station in den synthetischen Daten
+EMPLOYEES_PER_WARD = 25
+
+SHIFT_TIMES = {
+    'EARLY': (datetime.time(6, 0), datetime.time(14, 0)),
+    'LATE': (datetime.time(14, 0), datetime.time(22, 0)),
+    'NIGHT': (datetime.time(22, 0), datetime.time(6, 0)),
+}
+
+
+def generate_benchmark_data(employee_count, year, month, ward_count=None, seed=0,
+                            professional_share=0.6, critical_share=0.15, absence_share=0.05, unavailable_share=0.05):
+    """
+    Creates a synthetic hospital: ward_count wards (default: one per EMPLOYEES_PER_WARD employees),
+    employee_count employees with a mix of professional profiles and qualifications, plus
+    absences and unavailable days in the given month. The same seed always yields the same data.
+    Returns the created wards.
+    """
+    rng = random.Random(seed)
+    ward_count = ward_count or max(1, employee_count // EMPLOYEES_PER_WARD)
+    start_date, end_date = month_bounds(year, month)
+    days_in_month = (end_date - start_date).days + 1
+
+    professional, _ = ProfessionalProfile.objects.get_or_create(name="Bench Pflegefachkraft", defaults={'counts_towards_staff_ratio': True})
+    assistant, _ = ProfessionalProfile.objects.get_or_create(name="Bench Pflegehelfer", defaults={'counts_towards_staff_ratio': False})
+    critical, _ = Qualification.objects.get_or_create(name="Bench Beatmung", defaults={'is_critical': True})
+    basic, _ = Qualification.objects.get_or_create(name="Bench Basis", defaults={'is_critical': False})
+
+    shifts = []
+    for name, (start_time, end_time) in SHIFT_TIMES.items():
+        shift, _ = Shift.objects.get_or_create(name=name, defaults={'start_time': start_time, 'end_time': end_time})
+        shifts.append(shift)
+    shifts_by_name = {shift.name: shift for shift in shifts}
+    shifts_by_name['NIGHT'].required_qualifications.add(critical)
+
+    wards = Ward.objects.bulk_create([
+        Ward(
+            name=f"Bench Station {seed}-{index:04d}",
+            slug=f"bench-station-{seed}-{index:04d}",
+            current_patients=rng.randint(0, 24),
+            min_staff_early_shift=rng.randint(2, 4),
+            min_staff_late_shift=rng.randint(2, 3),
+            min_staff_night_shift=rng.randint(1, 2)
+        )
+        for index in range(ward_count)
+    ])
+    # bulk_create löst keine Signale aus
+    invalidate_staffing_requirements()
+
+    employees = Employee.objects.bulk_create([
+        Employee(
+            first_name=f"Bench{index}",
+            last_name=f"Seed{seed}",
+            employee_number=f"B{seed}-{index:06d}",
+            professional_profile=professional if rng.random() < professional_share else assistant
+        )
+        for index in range(employee_count)
+    ])
+
+    # M2M-Zeilen direkt über die Zwischentabellen anlegen
+    QualificationLink = Employee.qualifications.through
+    AllowedShiftLink = Employee.allowed_shifts.through
+    qualification_links = []
+    allowed_shift_links = []
+    absences = []
+    unavailable = []
+    for emp in employees:
+        qualification_links.append(QualificationLink(employee_id=emp.id, qualification_id=basic.id))
+        if rng.random() < critical_share:
+            qualification_links.append(QualificationLink(employee_id=emp.id, qualification_id=critical.id))
+        for shift in rng.sample(shifts, rng.randint(1, len(shifts))):
+            allowed_shift_links.append(AllowedShiftLink(employee_id=emp.id, shift_id=shift.id))
+        if rng.random() < absence_share * 4:
+            absence_start = start_date + datetime.timedelta(days=rng.randrange(days_in_month))
+            absences.append(Absence(
+                employee=emp,
+                start_date=absence_start,
+                end_date=absence_start + datetime.timedelta(days=rng.randint(0, 6)),
+                type=rng.choice(['VACATION', 'SICKNESS', 'TRAINING']),
+                approved=True
+            ))
+        for day in rng.sample(range(days_in_month), int(days_in_month * unavailable_share)):
+            unavailable.append(EmployeeAvailability(employee=emp, date=start_date + datetime.timedelta(days=day), is_available=False))
+
+    QualificationLink.objects.bulk_create(qualification_links, batch_size=500)
+    AllowedShiftLink.objects.bulk_create(allowed_shift_links, batch_size=500)
+    # Auch hier ohne Signale; zurückgerollte Benchmark-Daten geben ihre IDs wieder frei
+    invalidate_eligibility_index()
+    Absence.objects.bulk_create(absences, batch_size=500)
+    EmployeeAvailability.objects.bulk_create(unavailable, batch_size=500)
+    return wards
+
+
+def summarize(samples):
+    """Median, p95 (nearest rank), min and max of timing samples in seconds, plus the query counts."""
+    seconds = sorted(sample[0] for sample in samples)
+    p95_index = max(0, -(-len(seconds) * 95 // 100) - 1)
+    return {
+        "runs": len(seconds),
+        "median_seconds": round(statistics.median(seconds), 6),
+        "p95_seconds": round(seconds[p95_index], 6),
+        "min_seconds": round(seconds[0], 6),
+        "max_seconds": round(seconds[-1], 6),
+        "queries": max(sample[1] for sample in samples),
+    }
+
+
+def measure(func, repeat):
+    """Runs func repeat times and returns the summary of (seconds, query count) samples."""
+    samples = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        samples.append((elapsed, len(queries)))
+    return summarize(samples)
+
+
+def run_benchmarks(scheduler_factory, ward, year, month, repeat):
+    """
+    Times generate_schedule, _check_for_conflicts, ShiftCalendarView (with and without
+    the calendar cache) and ShiftAssignmentForm validation for one ward. Returns {name: summary}.
+    """
+    # Views und Formulare erst hier importieren, damit das Modul ohne URL-Konfiguration nutzbar bleibt
+    from shift_planer.forms import ShiftAssignmentForm
+    from shift_planer.views import ShiftCalendarView
+
+    start_date, end_date = month_bounds(year, month)
+    results = {}
+
+    results["generate_schedule"] = measure(
+        lambda: scheduler_factory().generate_schedule(year, month, ward.slug, overwrite=True), repeat
+    )
+    results["check_for_conflicts"] = measure(
+        lambda: scheduler_factory()._check_for_conflicts(ward, start_date, end_date), repeat
+    )
+
+    factory = RequestFactory()
+    calendar_view = ShiftCalendarView.as_view()
+
+    def render_calendar():
+        request = factory.get(f"/ward/{ward.slug}/{year}/{month}/")
+        request.user = AnonymousUser()
+        calendar_view(request, ward_name_slug=ward.slug, year=year, month=month).render()
+
+    def render_calendar_uncached():
+        invalidate_calendar_ward(ward.pk)
+        render_calendar()
+
+    reset_calendar_cache_stats()
+    results["shift_calendar_view"] = measure(render_calendar_uncached, repeat)
+    render_calendar()
+    results["shift_calendar_view_cached"] = measure(render_calendar, repeat)
+    results["calendar_cache"] = calendar_cache_stats()
+
+    # Formularvalidierung für eine vollständig besetzte Frühschicht in der Monatsmitte
+    shift = Shift.objects.get(name='EARLY')
+    day = start_date + datetime.timedelta(days=14)
+    nurses = list(
+        Employee.objects.filter(professional_profile__counts_towards_staff_ratio=True, allowed_shifts=shift)
+        .exclude(shiftassignment__date=day)
+        .values_list('id', flat=True)[:ward.min_staff_early_shift + 1]
+    )
+    form_data = {
+        'ward': ward.pk,
+        'date': day.isoformat(),
+        'shift': shift.pk,
+        'professional_nurses': nurses,
+        'nursing_assistants': [],
+        'status': 'PLANNED',
+    }
+    results["shift_assignment_form_clean"] = measure(lambda: ShiftAssignmentForm(data=form_data).is_valid(), repeat)
+
+    # Kontrollgröße für Vergleiche zwischen Läufen
+    results["assignments"] = ShiftAssignment.objects.filter(ward=ward, date__gte=start_date, date__lte=end_date).count()
+    return results
@@ -0,0 +1,156 @@
+# shift_planer/calendar_cache.py
+
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from shift_planer.coverage import build_coverage_matrix
+
+# Cache-Alias und Lebensdauer der gespeicherten Monatsmatrizen (Sekunden)
+CALENDAR_CACHE_ALIAS = getattr(settings, 'CALENDAR_CACHE_ALIAS', 'default')
+CALENDAR_CACHE_TIMEOUT = getattr(settings, 'CALENDAR_CACHE_TIMEOUT', 300)
+
+KEY_PREFIX = 'shift_planer:calendar'
+
+# Trefferstatistik dieses Prozesses
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_local = threading.local()
+
+
+def _cache():
+    return caches[CALENDAR_CACHE_ALIAS]
+
+
+def _version_key(scope):
+    return f"{KEY_PREFIX}:version:" + ":".join(str(part) for part in scope)
+
+
+def _month_scopes(ward_id, year, month):
+    """Version scopes a cached month depends on: everything, the ward and the month itself."""
+    return [('all',), ('ward', ward_id), ('month', ward_id, year, month)]
+
+
+def assignment_scopes(start_date, end_date):
+    """Version scopes of data derived from the assignments of all wards between the two dates."""
+    scopes = [('all',)]
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        scopes.append(('assignments', year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return scopes
+
+
+def _versioned_key(name, scopes):
+    """
+    Key of a cached value for the current versions of its scopes. A version missing from the
+    cache (evicted or never set) is started at the current time, so old entries are never reused.
+    """
+    cache = _cache()
+    version_keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(version_keys)
+    for key in version_keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return f"{KEY_PREFIX}:{name}:" + ":".join(str(versions[key]) for key in version_keys)
+
+
+def get_versioned(name, scopes, build):
+    """
+    Returns (value, hit): the value cached under name for the current versions of scopes,
+    or build() stored there on a miss. Used for the calendars and the carry-in state.
+    """
+    cache = _cache()
+    key = _versioned_key(name, scopes)
+    value = cache.get(key)
+    if value is not None:
+        return value, True
+    value = build()
+    cache.set(key, value, timeout=CALENDAR_CACHE_TIMEOUT)
+    return value, False
+
+
+def _bump(scopes):
+    cache = _cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+    _stats['invalidations'] += len(scopes)
+
+
+def _invalidate(scopes):
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending.update(scopes)
+        return
+    _bump(scopes)
+    # Innerhalb einer Transaktion zusätzlich nach dem Commit, damit zwischenzeitlich
+    # gecachte Stände der alten Daten nicht übrig bleiben
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+@contextmanager
+def batched_invalidation():
+    """
+    Collects all invalidations inside the block and bumps every version only once at the end,
+    e.g. while a queryset delete sends one post_delete signal per assignment.
+    """
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+    finally:
+        scopes = _local.pending
+        _local.pending = None
+        if scopes:
+            _invalidate(scopes)
+
+
+def invalidate_calendar_month(ward_id, year, month):
+    _invalidate({('month', ward_id, year, month), ('assignments', year, month)})
+
+
+def invalidate_calendar_ward(ward_id):
+    _invalidate({('ward', ward_id)})
+
+
+def invalidate_all_calendars():
+    _invalidate({('all',)})
+
+
+def invalidate_calendar_for_assignments(assignments):
+    """Invalidates every ward-month touched by the given assignments (e.g. after bulk_create or update)."""
+    scopes = set()
+    for assignment in assignments:
+        scopes.add(('month', assignment.ward_id, assignment.date.year, assignment.date.month))
+        scopes.add(('assignments', assignment.date.year, assignment.date.month))
+    _invalidate(scopes)
+
+
+def get_coverage_matrix(ward, year, month):
+    """Cached build_coverage_matrix; rebuilt after any change to the ward-month, the ward or shared data."""
+    matrix, hit = get_versioned(
+        f"matrix:{ward.pk}:{year}:{month}", _month_scopes(ward.pk, year, month),
+        lambda: build_coverage_matrix(ward, year, month)
+    )
+    _stats['hits' if hit else 'misses'] += 1
+    return matrix
+
+
+def calendar_cache_stats():
+    """Hits, misses, invalidations and the hit rate of this process."""
+    lookups = _stats['hits'] + _stats['misses']
+    return dict(_stats, hit_rate=round(_stats['hits'] / lookups, 4) if lookups else None)
+
+
+def reset_calendar_cache_stats():
+    for name in _stats:
+        _stats[name] = 0
@@ -0,0 +1,69 @@
+# shift_planer/carry_in.py
+
+import datetime
+from collections import namedtuple
+from shift_planer.models import ShiftAssignment
+from shift_planer.shift_geometry import get_shift_geometry
+from shift_planer.calendar_cache import assignment_scopes, get_versioned
+
+# Wie viele Tage vor dem Planungszeitraum für Ruhezeit- und Folgetags-Prüfungen betrachtet werden
+DEFAULT_LOOKBACK_DAYS = 14
+
+# Zustand eines Mitarbeiters am Ende des Tages vor dem Planungszeitraum:
+# last_shift_end: spätestes Dienstende (absolute Minuten, siehe ShiftGeometry.interval),
+# last_shift_id / last_shift_date: der Dienst mit diesem Ende, last_work_day: letzter Arbeitstag,
+# streak: Arbeitstage in Folge bis last_work_day. Die Wochenstunden der angeschnittenen ISO-Woche
+# kommen aus dem WeeklyHoursLedger (siehe weekly_hours.py)
+CarryInState = namedtuple('CarryInState', [
+    'last_shift_end', 'last_shift_id', 'last_shift_date', 'last_work_day', 'streak'
+])
+
+
+def compute_carry_in(rows, geometry):
+    """
+    Builds {emp_id: CarryInState} from (employee_id, date, shift_id) rows that all lie before
+    the planning period. Streaks are only as long as the rows reach back.
+    """
+    work_days = {}
+    latest = {}
+    for emp_id, date, shift_id in rows:
+        _start, end = geometry.interval(date, shift_id)
+        work_days.setdefault(emp_id, set()).add(date)
+        if emp_id not in latest or end > latest[emp_id][0]:
+            latest[emp_id] = (end, shift_id, date)
+
+    states = {}
+    for emp_id, days in work_days.items():
+        last_work_day = max(days)
+        streak = 1
+        day = last_work_day - datetime.timedelta(days=1)
+        while day in days:
+            streak += 1
+            day -= datetime.timedelta(days=1)
+        last_end, last_shift_id, last_shift_date = latest[emp_id]
+        states[emp_id] = CarryInState(last_end, last_shift_id, last_shift_date, last_work_day, streak)
+    return states
+
+
+def load_carry_in(period_start, lookback_days=DEFAULT_LOOKBACK_DAYS):
+    """Computes the carry-in state of all employees with one query over the lookback window."""
+    rows = list(ShiftAssignment.objects.filter(
+        date__gte=period_start - datetime.timedelta(days=lookback_days),
+        date__lt=period_start
+    ).values_list('employee_id', 'date', 'shift_id'))
+    geometry = get_shift_geometry({shift_id for _emp_id, _date, shift_id in rows})
+    return compute_carry_in(rows, geometry)
+
+
+def get_carry_in(period_start, lookback_days=DEFAULT_LOOKBACK_DAYS):
+    """
+    Cached load_carry_in. The entry depends on the assignment months of the lookback window,
+    so planning the next month reuses it until an assignment before period_start changes.
+    """
+    window_start = period_start - datetime.timedelta(days=lookback_days)
+    states, _hit = get_versioned(
+        f"carry_in:{period_start.isoformat()}:{lookback_days}",
+        assignment_scopes(window_start, period_start - datetime.timedelta(days=1)),
+        lambda: load_carry_in(period_start, lookback_days)
+    )
+    return states
@@ -0,0 +1,111 @@
+# shift_planer/conflicts.py
+
+import datetime
+from collections import namedtuple
+from shift_planer.models import ShiftAssignment
+from shift_planer.shift_geometry import MINUTES_PER_DAY, get_shift_geometry
+
+# kind: 'OVERLAP', 'REST' oder 'CONSECUTIVE'
+# other_assignment: die kollidierende bzw. vorherige Zuweisung (None bei CONSECUTIVE und bei
+# Diensten vor dem geprüften Zeitraum, die nur aus dem Carry-in bekannt sind)
+# rest_minutes: Ruhezeit vor der Zuweisung (nur bei REST), run_length: Arbeitstage in Folge (nur bei CONSECUTIVE)
+Conflict = namedtuple('Conflict', ['kind', 'employee_id', 'assignment', 'other_assignment', 'rest_minutes', 'run_length'])
+
+
+def assignment_interval(assignment):
+    """
+    Returns the (start, end) of an assignment as absolute minutes since 0001-01-01.
+    Shifts ending before they start (e.g. NIGHT 22:00-06:00) end on the following day.
+    """
+    start = assignment.date.toordinal() * MINUTES_PER_DAY + assignment.shift.start_minute
+    return start, start + assignment.shift.duration_minutes
+
+
+def minutes_to_datetime(minutes):
+    """Converts absolute minutes (see assignment_interval) back to a datetime."""
+    days, rest = divmod(minutes, MINUTES_PER_DAY)
+    return datetime.datetime.combine(datetime.date.fromordinal(days), datetime.time()) + datetime.timedelta(minutes=rest)
+
+
+class ConflictDetector:
+    """
+    Finds overlapping shifts, rest-hour violations and too long runs of working days.
+
+    Every assignment is turned into an absolute minute interval once; the intervals of
+    each employee are then checked in a single sorted sweep, so night shifts crossing
+    midnight are compared with the following day like any other shift.
+    """
+
+    def __init__(self, min_rest_hours, max_consecutive_shifts, geometry=None):
+        self.min_rest_minutes = float(min_rest_hours) * 60
+        self.max_consecutive_shifts = int(max_consecutive_shifts)
+        self.geometry = geometry
+
+    def detect(self, assignments, carry_in=None):
+        """
+        Returns a list of Conflict records for the given assignments. carry_in
+        ({emp_id: CarryInState}, see carry_in.py) continues the sweep from the
+        last shift and working-day run before the checked period.
+        """
+        assignments = list(assignments)
+        carry_in = carry_in or {}
+        geometry = self.geometry or get_shift_geometry({a.shift_id for a in assignments})
+
+        intervals_by_employee = {}
+        for assignment in assignments:
+            start, end = geometry.interval(assignment.date, assignment.shift_id)
+            intervals_by_employee.setdefault(assignment.employee_id, []).append((start, end, assignment))
+
+        conflicts = []
+        for emp_id, intervals in intervals_by_employee.items():
+            intervals.sort(key=lambda interval: interval[:2])
+            conflicts.extend(self._sweep(emp_id, intervals, carry_in.get(emp_id)))
+        return conflicts
+
+    def _sweep(self, emp_id, intervals, state=None):
+        conflicts = []
+        # Zuweisung mit dem bisher spätesten Ende
+        latest_end = None
+        latest_assignment = None
+        run_day = None
+        run_length = 0
+        if state is not None:
+            latest_end = state.last_shift_end
+            run_day = state.last_work_day.toordinal()
+            run_length = state.streak
+
+        for start, end, assignment in intervals:
+            if latest_end is not None:
+                if start < latest_end:
+                    conflicts.append(Conflict('OVERLAP', emp_id, assignment, latest_assignment, None, None))
+                elif start - latest_end < self.min_rest_minutes:
+                    conflicts.append(Conflict('REST', emp_id, assignment, latest_assignment, start - latest_end, None))
+
+            # Folgetage zählen nach Kalendertag des Schichtbeginns
+            day = start // MINUTES_PER_DAY
+            if run_day is None or day > run_day + 1:
+                run_length = 1
+            elif day == run_day + 1:
+                run_length += 1
+            run_day = day
+            if run_length > self.max_consecutive_shifts:
+                conflicts.append(Conflict('CONSECUTIVE', emp_id, assignment, None, None, run_length))
+
+            if latest_end is None or end > latest_end:
+                latest_end = end
+                latest_assignment = assignment
+        return conflicts
+
+
+def find_conflicts(start_date, end_date, min_rest_hours, max_consecutive_shifts, wards=None):
+    """
+    Standalone conflict check for any date range; wards=None checks all wards together,
+    so double bookings of one employee on different wards are found as well.
+    """
+    assignments = ShiftAssignment.objects.filter(
+        date__gte=start_date,
+        date__lte=end_date
+    ).select_related('employee', 'shift')
+    if wards is not None:
+        assignments = assignments.filter(ward__in=wards)
+    return ConflictDetector(min_rest_hours, max_consecutive_shifts).detect(assignments)
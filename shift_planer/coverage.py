@@ -0,0 +1,117 @@
+# shift_planer/coverage.py
+
+import calendar
+import datetime
+from collections import namedtuple
+from django.db.models.functions import Substr
+from shift_planer.models import Shift, ShiftAssignment
+from shift_planer.staffing import get_staffing_requirements
+
+WEEKDAY_NAMES = ['Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So']
+
+# Ein Mitarbeiter in einer Kalenderzelle, nur die für die Anzeige nötigen Felder
+CoverageEntry = namedtuple('CoverageEntry', ['employee_id', 'first_name', 'last_initial', 'status', 'is_conflict'])
+
+# Eine Zelle (Tag x Schicht) mit vorberechneter Besetzung und Konfliktmarkierung
+CoverageCell = namedtuple('CoverageCell', ['date', 'shift_id', 'entries', 'count', 'required', 'is_understaffed', 'has_conflict'])
+
+# Eine Tabellenzeile: die Schicht und ihre Zellen in Tagesreihenfolge
+CoverageRow = namedtuple('CoverageRow', ['shift', 'cells'])
+
+
+class CoverageMatrix:
+    """
+    Staffing of one ward for one month as days x shifts, built from plain value tuples.
+
+    The template iterates rows and cells directly; as_dict() is the JSON form of the same data.
+    """
+
+    def __init__(self, ward, year, month, days, rows):
+        self.ward = ward
+        self.year = year
+        self.month = month
+        self.days = days
+        self.rows = rows
+
+    def as_dict(self):
+        return {
+            "ward": self.ward.slug,
+            "year": self.year,
+            "month": self.month,
+            "days": [day['date_obj'].isoformat() for day in self.days],
+            "shifts": [
+                {
+                    "id": row.shift.pk,
+                    "name": row.shift.name,
+                    "start_time": row.shift.start_time.strftime('%H:%M'),
+                    "end_time": row.shift.end_time.strftime('%H:%M'),
+                    "cells": [
+                        {
+                            "date": cell.date.isoformat(),
+                            "count": cell.count,
+                            "required": cell.required,
+                            "is_understaffed": cell.is_understaffed,
+                            "has_conflict": cell.has_conflict,
+                            "employees": [
+                                {
+                                    "id": entry.employee_id,
+                                    "first_name": entry.first_name,
+                                    "last_initial": entry.last_initial,
+                                    "status": entry.status,
+                                }
+                                for entry in cell.entries
+                            ],
+                        }
+                        for cell in row.cells
+                    ],
+                }
+                for row in self.rows
+            ],
+        }
+
+
+def build_coverage_matrix(ward, year, month):
+    """
+    Builds the CoverageMatrix of a ward and month with two queries (shifts and assignment
+    tuples) plus the cached staffing requirements.
+    """
+    days = [
+        {
+            'day': day,
+            'date_obj': datetime.date(year, month, day),
+            'weekday': weekday,
+            'weekday_name': WEEKDAY_NAMES[weekday],
+        }
+        for day, weekday in calendar.Calendar().itermonthdays2(year, month)
+        if day != 0
+    ]
+    shifts = list(Shift.objects.order_by('start_time'))
+    staffing = get_staffing_requirements([ward.pk], [shift.pk for shift in shifts])
+
+    # (date, shift_id) -> [CoverageEntry]
+    entries_by_cell = {}
+    for date, shift_id, employee_id, first_name, last_initial, status in ShiftAssignment.objects.filter(
+        ward=ward,
+        date__gte=days[0]['date_obj'],
+        date__lte=days[-1]['date_obj']
+    ).annotate(
+        last_initial=Substr('employee__last_name', 1, 1)
+    ).order_by('date', 'shift__start_time', 'employee__last_name').values_list(
+        'date', 'shift_id', 'employee_id', 'employee__first_name', 'last_initial', 'status'
+    ):
+        entries_by_cell.setdefault((date, shift_id), []).append(
+            CoverageEntry(employee_id, first_name, last_initial, status, status == 'CONFLICT')
+        )
+
+    rows = []
+    for shift in shifts:
+        required = staffing.get(ward.pk, shift.pk).min_staff
+        cells = []
+        for day in days:
+            entries = entries_by_cell.get((day['date_obj'], shift.pk), [])
+            cells.append(CoverageCell(
+                day['date_obj'], shift.pk, entries, len(entries), required,
+                len(entries) < required, any(entry.is_conflict for entry in entries)
+            ))
+        rows.append(CoverageRow(shift, cells))
+    return CoverageMatrix(ward, year, month, days, rows)
@@ -0,0 +1,96 @@
+# shift_planer/eligibility.py
+
+from shift_planer.models import Employee, Shift, Qualification
+from shift_planer.reference_cache import ReferenceCache
+
+# Merkmalsbits im Eignungswort eines Mitarbeiters; die erlaubten Schichten folgen ab SHIFT_BIT_OFFSET
+CRITICAL = 1 << 0
+COUNTS_TOWARDS_RATIO = 1 << 1
+SHIFT_BIT_OFFSET = 2
+
+
+class EligibilityIndex:
+    """
+    Allowed shifts, qualifications and profile flags of all employees as integer bitmasks.
+
+    Every employee has one word: the CRITICAL and COUNTS_TOWARDS_RATIO flags plus one bit per
+    allowed shift. "May work shift s and holds a critical qualification" is then a single AND
+    against mask(s, critical=True). Qualifications are kept in a second mask per employee.
+    """
+
+    def __init__(self, shift_ids, qualifications, allowed_rows, qualification_rows, employee_rows):
+        self.shift_bits = {shift_id: 1 << (SHIFT_BIT_OFFSET + i) for i, shift_id in enumerate(sorted(shift_ids))}
+        self.qualification_bits = {}
+        self.critical_mask = 0
+        for i, (qual_id, is_critical) in enumerate(sorted(qualifications)):
+            self.qualification_bits[qual_id] = 1 << i
+            if is_critical:
+                self.critical_mask |= 1 << i
+
+        self.words = {}
+        self.qualification_masks = {}
+        for emp_id, counts_towards_ratio in employee_rows:
+            self.words[emp_id] = COUNTS_TOWARDS_RATIO if counts_towards_ratio else 0
+            self.qualification_masks[emp_id] = 0
+        for emp_id, shift_id in allowed_rows:
+            if emp_id in self.words and shift_id in self.shift_bits:
+                self.words[emp_id] |= self.shift_bits[shift_id]
+        for emp_id, qual_id in qualification_rows:
+            if emp_id in self.words and qual_id in self.qualification_bits:
+                self.qualification_masks[emp_id] |= self.qualification_bits[qual_id]
+        for emp_id, qualification_mask in self.qualification_masks.items():
+            if qualification_mask & self.critical_mask:
+                self.words[emp_id] |= CRITICAL
+
+    def __contains__(self, emp_id):
+        return emp_id in self.words
+
+    def mask(self, shift_id=None, critical=False, counts_towards_ratio=False):
+        """The bits an employee word must contain; an unknown shift gives a mask nobody matches."""
+        mask = (CRITICAL if critical else 0) | (COUNTS_TOWARDS_RATIO if counts_towards_ratio else 0)
+        if shift_id is not None:
+            mask |= self.shift_bits.get(shift_id, -1)
+        return mask
+
+    def satisfies(self, emp_id, mask):
+        return self.words.get(emp_id, 0) & mask == mask
+
+    def is_allowed(self, emp_id, shift_id):
+        bit = self.shift_bits.get(shift_id)
+        return bit is not None and self.words.get(emp_id, 0) & bit != 0
+
+    def has_allowed_shifts(self, emp_id):
+        return self.words.get(emp_id, 0) >> SHIFT_BIT_OFFSET != 0
+
+    def has_critical_qualification(self, emp_id):
+        return self.words.get(emp_id, 0) & CRITICAL != 0
+
+    def counts_towards_staff_ratio(self, emp_id):
+        return self.words.get(emp_id, 0) & COUNTS_TOWARDS_RATIO != 0
+
+
+def load_eligibility_index():
+    """Builds the EligibilityIndex for all employees with five queries."""
+    return EligibilityIndex(
+        Shift.objects.values_list('id', flat=True),
+        Qualification.objects.values_list('id', 'is_critical'),
+        Employee.allowed_shifts.through.objects.values_list('employee_id', 'shift_id'),
+        Employee.qualifications.through.objects.values_list('employee_id', 'qualification_id'),
+        Employee.objects.values_list('id', 'professional_profile__counts_towards_staff_ratio'),
+    )
+
+
+_index_cache = ReferenceCache('eligibility_index', load_eligibility_index)
+
+
+def get_eligibility_index(employee_ids=()):
+    """
+    Returns the process-wide EligibilityIndex. It is rebuilt after an employee, profile,
+    shift or qualification (or one of their M2M relations) changed in any process (see
+    signals.py and reference_cache.py) or if one of the given employee ids is unknown.
+    """
+    return _index_cache.get(lambda index: all(emp_id in index for emp_id in employee_ids))
+
+
+def invalidate_eligibility_index():
+    _index_cache.invalidate()
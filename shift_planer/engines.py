@@ -0,0 +1,341 @@
+# shift_planer/engines.py
+
+import datetime
+import os
+import time
+from collections import namedtuple
+from django.conf import settings
+
+# Optionale Solver: CP-SAT aus OR-Tools bzw. PuLP mit dem mitgelieferten CBC, beide laufen lokal
+try:
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
+
+try:
+    import pulp
+except ImportError:
+    pulp = None
+
+ENGINES = ('greedy', 'cpsat', 'ilp')
+ENGINE_PACKAGES = {'cpsat': 'ortools', 'ilp': 'pulp'}
+
+DEFAULT_TIME_LIMIT = getattr(settings, 'SCHEDULER_SOLVER_TIME_LIMIT', 30)
+DEFAULT_THREADS = getattr(settings, 'SCHEDULER_SOLVER_THREADS', None) or os.cpu_count() or 1
+
+# Gewichte der Zielfunktion: jede fehlende Besetzung wiegt schwerer als Fairness und Anzahl der Dienste
+SHORTFALL_WEIGHT = 1000
+PROFESSIONAL_SHORTFALL_WEIGHT = 1000
+CRITICAL_SHORTFALL_WEIGHT = 2000
+FAIRNESS_WEIGHT = 10
+ASSIGNMENT_WEIGHT = 1
+# Je Minute über Employee.available_hours_per_week (nur weekly_hours='soft'); eine Schicht Mehrarbeit wiegt weniger als ein leerer Slot
+OVERTIME_WEIGHT = 1
+
+# Ein möglicher Dienst (Variable 0/1) des Modells
+Candidate = namedtuple('Candidate', ['emp_id', 'date', 'shift_id'])
+
+# Ein Slot (Tag x Schicht) mit seinen Kandidaten und den Variablen für fehlende Besetzung
+SlotDemand = namedtuple('SlotDemand', [
+    'date', 'shift_id', 'min_staff', 'target_counting_staff', 'needs_critical',
+    'candidates', 'shortfall_var', 'professional_shortfall_var', 'critical_shortfall_var'
+])
+
+# Ergebnis eines Solver-Laufs: Status, Zielfunktion, Schranke, Lücke, Laufzeit und Besetzungsqualität
+SolutionReport = namedtuple('SolutionReport', [
+    'engine', 'ward_id', 'start_date', 'end_date', 'status', 'variables', 'constraints',
+    'objective', 'best_bound', 'gap', 'seconds', 'assignments', 'shortfall',
+    'professional_shortfall', 'critical_missing', 'max_shifts'
+])
+
+# Ergebnis von solve_planning_model: gewählte Kandidaten (None ohne Lösung) und der Bericht
+Solution = namedtuple('Solution', ['chosen', 'report'])
+
+
+class EngineUnavailable(RuntimeError):
+    """The solver package an engine needs is not installed."""
+
+
+def check_engine(engine):
+    """Raises ValueError for unknown engines and EngineUnavailable if the solver is missing."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}.")
+    if (engine == 'cpsat' and cp_model is None) or (engine == 'ilp' and pulp is None):
+        raise EngineUnavailable(f"Engine '{engine}' needs the '{ENGINE_PACKAGES[engine]}' package (pip install {ENGINE_PACKAGES[engine]}).")
+
+
+class PlanningModel:
+    """
+    Solver-neutral integer program of one ward and period.
+
+    Variables are (lower, upper) integer bounds; the first len(candidates) are the 0/1
+    assignment variables. Constraints are ([(variable, coefficient)], lower, upper) with
+    None for an open side, the objective is minimised.
+    """
+
+    def __init__(self):
+        self.variables = []
+        self.constraints = []
+        self.objective = []
+        self.candidates = []
+        self.slots = []
+        self.max_load_var = None
+
+    def add_variable(self, lower=0, upper=1):
+        self.variables.append((lower, upper))
+        return len(self.variables) - 1
+
+    def add_constraint(self, terms, lower=None, upper=None):
+        if terms:
+            self.constraints.append((terms, lower, upper))
+
+
+def build_planning_model(ward, snapshot, start_date, end_date, min_rest_hours, max_consecutive_shifts, slots=None, weekly_hours='hard'):
+    """
+    Builds the PlanningModel for a ward from the snapshot, without database queries.
+
+    Candidates are the (employee, day, shift) triples that pass the checks against existing
+    assignments (allowed shift, absence, availability, overlap and rest before and after).
+    Between candidates the model adds: at most one shift per employee and day, no overlap or
+    short rest between two candidates, at most max_consecutive_shifts working days in any
+    window (including the streak before the period), weekly hours up to
+    Employee.available_hours_per_week (weekly_hours: 'hard', 'soft' with OVERTIME_WEIGHT per
+    minute over, or 'off'), and coverage, professional staff and critical qualification per
+    slot as soft targets. slots: optional set of (date, shift_id) to fill.
+    """
+    model = PlanningModel()
+    geometry = snapshot.geometry
+    min_rest_minutes = float(min_rest_hours) * 60
+    one_day = datetime.timedelta(days=1)
+
+    days = []
+    day = start_date
+    while day <= end_date:
+        days.append(day)
+        day += one_day
+
+    # --- Kandidaten ---
+    slot_specs = []
+    candidates_by_employee = {}
+    for day in days:
+        for shift in snapshot.shifts:
+            if slots is not None and (day, shift.id) not in slots:
+                continue
+            assigned = snapshot.slot_employee_ids(ward.id, day, shift.id)
+            requirement = snapshot.staffing.get(ward.id, shift.id)
+            needs_critical = (
+                requirement.requires_critical and ward.current_patients > 0
+                and not any(snapshot.has_critical_qualification(emp_id) for emp_id in assigned)
+            )
+            capacity = max(requirement.min_staff, requirement.target_counting_staff, 1 if needs_critical else 0) - len(assigned)
+            slot_candidates = []
+            if capacity > 0:
+                start, end = geometry.interval(day, shift.id)
+                for emp in snapshot.employees:
+                    if (
+                        not snapshot.is_allowed(emp.id, shift.id)
+                        or snapshot.is_absent(emp.id, day)
+                        or snapshot.is_unavailable(emp.id, day)
+                        or emp.id in assigned
+                        or snapshot.overlapping_assignment(emp.id, day, shift) is not None
+                    ):
+                        continue
+                    previous_end = snapshot.previous_shift_end(emp.id, day, shift)
+                    if previous_end is not None and start - previous_end < min_rest_minutes:
+                        continue
+                    next_start = snapshot.next_shift_start(emp.id, day, shift)
+                    if next_start is not None and next_start - end < min_rest_minutes:
+                        continue
+                    index = len(model.candidates)
+                    model.candidates.append(Candidate(emp.id, day, shift.id))
+                    model.add_variable()
+                    slot_candidates.append(index)
+                    candidates_by_employee.setdefault(emp.id, []).append(index)
+            slot_specs.append((day, shift.id, requirement, needs_critical, assigned, capacity, slot_candidates))
+
+    # --- Besetzung je Slot (weich, fehlende Köpfe werden bestraft) ---
+    for day, shift_id, requirement, needs_critical, assigned, capacity, slot_candidates in slot_specs:
+        missing = max(requirement.min_staff - len(assigned), 0)
+        assigned_professionals = sum(1 for emp_id in assigned if snapshot.counts_towards_staff_ratio(emp_id))
+        missing_professionals = max(requirement.target_counting_staff - assigned_professionals, 0)
+
+        shortfall_var = professional_shortfall_var = critical_shortfall_var = None
+        if missing:
+            shortfall_var = model.add_variable(0, missing)
+            model.add_constraint([(i, 1) for i in slot_candidates] + [(shortfall_var, 1)], lower=missing)
+            model.objective.append((shortfall_var, SHORTFALL_WEIGHT))
+        if missing_professionals:
+            professional_shortfall_var = model.add_variable(0, missing_professionals)
+            professionals = [i for i in slot_candidates if snapshot.counts_towards_staff_ratio(model.candidates[i].emp_id)]
+            model.add_constraint([(i, 1) for i in professionals] + [(professional_shortfall_var, 1)], lower=missing_professionals)
+            model.objective.append((professional_shortfall_var, PROFESSIONAL_SHORTFALL_WEIGHT))
+        if needs_critical:
+            critical_shortfall_var = model.add_variable(0, 1)
+            critical = [i for i in slot_candidates if snapshot.has_critical_qualification(model.candidates[i].emp_id)]
+            model.add_constraint([(i, 1) for i in critical] + [(critical_shortfall_var, 1)], lower=1)
+            model.objective.append((critical_shortfall_var, CRITICAL_SHORTFALL_WEIGHT))
+        if len(slot_candidates) > capacity > 0:
+            model.add_constraint([(i, 1) for i in slot_candidates], upper=capacity)
+        model.slots.append(SlotDemand(
+            day, shift_id, requirement.min_staff, requirement.target_counting_staff, needs_critical,
+            slot_candidates, shortfall_var, professional_shortfall_var, critical_shortfall_var
+        ))
+
+    # --- Regeln je Mitarbeiter ---
+    max_load_var = model.add_variable(0, len(days) * len(snapshot.shifts))
+    model.max_load_var = max_load_var
+    model.objective.append((max_load_var, FAIRNESS_WEIGHT))
+    window_length = max_consecutive_shifts + 1
+
+    for emp_id, indices in candidates_by_employee.items():
+        model.add_constraint([(i, 1) for i in indices] + [(max_load_var, -1)], upper=0)
+        model.objective.extend((i, ASSIGNMENT_WEIGHT) for i in indices)
+
+        by_day = {}
+        for i in indices:
+            by_day.setdefault(model.candidates[i].date, []).append(i)
+        for day_indices in by_day.values():
+            if len(day_indices) > 1:
+                model.add_constraint([(i, 1) for i in day_indices], upper=1)
+
+        # Überlappung oder zu kurze Ruhezeit zwischen zwei Kandidaten an verschiedenen Tagen
+        for position, i in enumerate(indices):
+            first = model.candidates[i]
+            first_start, first_end = geometry.interval(first.date, first.shift_id)
+            for j in indices[position + 1:]:
+                second = model.candidates[j]
+                if second.date == first.date:
+                    continue
+                if (second.date - first.date).days > 2:
+                    break
+                second_start, second_end = geometry.interval(second.date, second.shift_id)
+                if first_start <= second_start:
+                    gap = second_start - first_end
+                else:
+                    gap = first_start - second_end
+                if gap < min_rest_minutes:
+                    model.add_constraint([(i, 1), (j, 1)], upper=1)
+
+        # Folgetage: feste Arbeitstage (Serie vor dem Zeitraum, bestehende Dienste) zählen als Konstante
+        streak_before = snapshot.consecutive_days_before(emp_id, start_date, limit=max_consecutive_shifts)
+        first_window_day = start_date - datetime.timedelta(days=max_consecutive_shifts)
+        day = first_window_day
+        while day <= end_date:
+            window = [day + datetime.timedelta(days=offset) for offset in range(window_length)]
+            fixed_days = 0
+            terms = []
+            for window_day in window:
+                if window_day < start_date:
+                    fixed_days += (start_date - window_day).days <= streak_before
+                elif snapshot.worked_on(emp_id, window_day):
+                    fixed_days += 1
+                else:
+                    terms.extend((i, 1) for i in by_day.get(window_day, ()))
+            candidate_days = sum(1 for window_day in window if window_day in by_day)
+            if terms and fixed_days + candidate_days > max_consecutive_shifts:
+                model.add_constraint(terms, upper=max(max_consecutive_shifts - fixed_days, 0))
+            day += one_day
+
+        # Wochenstunden je ISO-Woche, abzüglich der bereits gebuchten Minuten (Wochenstundenkonto des Snapshots)
+        limit_minutes = snapshot.hours.capacity(emp_id)
+        if weekly_hours == 'off' or limit_minutes is None:
+            continue
+        minutes_by_week = {}
+        for i in indices:
+            candidate = model.candidates[i]
+            minutes_by_week.setdefault(candidate.date.isocalendar()[:2], (candidate.date, []))[1].append(
+                (i, geometry.duration_minutes[candidate.shift_id])
+            )
+        for week_day, terms in minutes_by_week.values():
+            fixed_minutes = snapshot.hours.worked(emp_id, week_day)
+            candidate_minutes = sum(minutes for _i, minutes in terms)
+            if fixed_minutes + candidate_minutes <= limit_minutes:
+                continue
+            if weekly_hours == 'soft':
+                overtime_var = model.add_variable(0, fixed_minutes + candidate_minutes - limit_minutes)
+                model.add_constraint(terms + [(overtime_var, -1)], upper=max(limit_minutes - fixed_minutes, 0))
+                model.objective.append((overtime_var, OVERTIME_WEIGHT))
+            else:
+                model.add_constraint(terms, upper=max(limit_minutes - fixed_minutes, 0))
+    return model
+
+
+def _solve_cpsat(model, time_limit, threads):
+    program = cp_model.CpModel()
+    variables = [program.NewIntVar(lower, upper, f"v{index}") for index, (lower, upper) in enumerate(model.variables)]
+    for terms, lower, upper in model.constraints:
+        expression = sum(coefficient * variables[index] for index, coefficient in terms)
+        if lower is not None:
+            program.Add(expression >= lower)
+        if upper is not None:
+            program.Add(expression <= upper)
+    program.Minimize(sum(coefficient * variables[index] for index, coefficient in model.objective))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(time_limit)
+    solver.parameters.num_search_workers = int(threads)
+    status = solver.Solve(program)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return solver.StatusName(status), None, None, None
+    values = [solver.Value(variable) for variable in variables]
+    return solver.StatusName(status), values, solver.ObjectiveValue(), solver.BestObjectiveBound()
+
+
+def _solve_ilp(model, time_limit, threads):
+    problem = pulp.LpProblem('shift_plan', pulp.LpMinimize)
+    variables = [
+        pulp.LpVariable(f"v{index}", lowBound=lower, upBound=upper, cat=pulp.LpInteger)
+        for index, (lower, upper) in enumerate(model.variables)
+    ]
+    problem += pulp.lpSum(coefficient * variables[index] for index, coefficient in model.objective)
+    for terms, lower, upper in model.constraints:
+        expression = pulp.lpSum(coefficient * variables[index] for index, coefficient in terms)
+        if lower is not None:
+            problem += expression >= lower
+        if upper is not None:
+            problem += expression <= upper
+
+    problem.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, threads=int(threads)))
+    status = pulp.LpStatus[problem.status]
+    if problem.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+        return status, None, None, None
+    values = [int(round(variable.value() or 0)) for variable in variables]
+    # CBC meldet über PuLP keine Schranke; bei bewiesener Optimalität ist sie der Zielwert
+    objective = pulp.value(problem.objective)
+    return status, values, objective, objective if problem.sol_status == pulp.LpSolutionOptimal else None
+
+
+def solve_planning_model(model, engine, ward, start_date, end_date, time_limit=None, threads=None):
+    """
+    Solves the model with the given engine ('cpsat' or 'ilp') and returns a Solution:
+    the indices of the chosen candidates (None if no solution was found in time)
+    and a SolutionReport with the solver status and the coverage quality.
+    """
+    check_engine(engine)
+    time_limit = DEFAULT_TIME_LIMIT if time_limit is None else time_limit
+    threads = threads or DEFAULT_THREADS
+    started = time.perf_counter()
+    backend = _solve_cpsat if engine == 'cpsat' else _solve_ilp
+    status, values, objective, best_bound = backend(model, time_limit, threads)
+    seconds = time.perf_counter() - started
+
+    chosen = None
+    shortfall = professional_shortfall = critical_missing = max_shifts = None
+    gap = None
+    if values is not None:
+        chosen = [index for index in range(len(model.candidates)) if values[index]]
+        shortfall = sum(values[slot.shortfall_var] for slot in model.slots if slot.shortfall_var is not None)
+        professional_shortfall = sum(
+            values[slot.professional_shortfall_var] for slot in model.slots if slot.professional_shortfall_var is not None
+        )
+        critical_missing = sum(values[slot.critical_shortfall_var] for slot in model.slots if slot.critical_shortfall_var is not None)
+        max_shifts = values[model.max_load_var]
+        if best_bound is not None and objective:
+            gap = round(abs(objective - best_bound) / abs(objective), 6)
+
+    report = SolutionReport(
+        engine, ward.id, start_date.isoformat(), end_date.isoformat(), status, len(model.variables), len(model.constraints),
+        objective, best_bound, gap, round(seconds, 6), len(chosen) if chosen is not None else 0,
+        shortfall, professional_shortfall, critical_missing, max_shifts
+    )
+    return Solution(chosen, report)
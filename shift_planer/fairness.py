@@ -0,0 +1,54 @@
+# shift_planer/fairness.py
+
+import heapq
+
+
+class FairnessLedger:
+    """
+    Shifts and minutes each employee was given in the current planning run, plus a random
+    tie-break drawn from the run's seeded RNG. key() orders employees fairest-first:
+    fewest shifts, then fewest minutes, then the tie-break (redrawn after every assignment).
+    """
+
+    def __init__(self, employee_ids, rng):
+        self.random = rng
+        self.shifts = dict.fromkeys(employee_ids, 0)
+        self.minutes = dict.fromkeys(employee_ids, 0)
+        self.ties = {emp_id: rng.random() for emp_id in self.shifts}
+
+    def key(self, emp_id):
+        return (self.shifts[emp_id], self.minutes[emp_id], self.ties[emp_id])
+
+    def record(self, emp_id, minutes):
+        self.shifts[emp_id] += 1
+        self.minutes[emp_id] += minutes
+        self.ties[emp_id] = self.random.random()
+
+
+class CandidateQueue:
+    """
+    The eligible employees of one slot as a heap ordered by FairnessLedger.key.
+    Built in O(n); every taken employee costs O(log n). Employees skipped by a filter
+    stay in the queue for the following calls. deferred: ids that come after all others.
+    """
+
+    def __init__(self, ledger, employees, deferred=()):
+        self.heap = [((emp.id in deferred,) + ledger.key(emp.id), emp.id, emp) for emp in employees]
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def take(self, count, match=None):
+        """Removes and returns up to count employees, fairest first, that satisfy match(emp)."""
+        taken = []
+        skipped = []
+        while self.heap and len(taken) < count:
+            entry = heapq.heappop(self.heap)
+            if match is None or match(entry[2]):
+                taken.append(entry[2])
+            else:
+                skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self.heap, entry)
+        return taken
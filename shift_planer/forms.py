@@ -5,6 +5,7 @@ from django.core.exceptions import ValidationError
 from shift_planer.models import ShiftAssignment, Employee, Ward, Shift, Absence, EmployeeAvailability, Qualification, ProfessionalProfile
 import datetime
 from django.db.models import Q # For complex queries
+from shift_planer.validation import validate_slot
 
 class ShiftAssignmentForm(forms.ModelForm):
     # Form fields for planning a whole shift
@@ -158,138 +159,18 @@ class ShiftAssignmentForm(forms.ModelForm):
         nursing_assistants = cleaned_data.get('nursing_assistants', [])
         status = cleaned_data.get('status') 
 
-        critical_quals_in_db = Qualification.objects.filter(is_critical=True)
-        shift_requires_critical_qual = shift.required_qualifications.filter(is_critical=True).exists()
-
         all_selected_employees = list(professional_nurses) + list(nursing_assistants)
 
-        selected_employee_ids = [emp.id for emp in all_selected_employees]
-        employees_data = Employee.objects.filter(id__in=selected_employee_ids).select_related('professional_profile').prefetch_related('qualifications', 'allowed_shifts')
-        employees_map = {emp.id: emp for emp in employees_data}
-
-        # --- Einzelne Mitarbeiterprüfungen (blockierende Fehler) ---
-        for employee in all_selected_employees:
-            emp_obj = employees_map.get(employee.id)
-            if not emp_obj: continue
-
-            # 1. Check Employee's Allowed Shifts
-            if shift and not emp_obj.allowed_shifts.filter(pk=shift.pk).exists() and emp_obj.allowed_shifts.exists():
-                raise ValidationError(
-                    f"{emp_obj.first_name} {emp_obj.last_name} ist nicht für die Schicht '{shift.get_name_display()}' eingetragen."
-                )
-
-            # 2. Check for Employee Absence
-            if Absence.objects.filter(
-                employee=emp_obj,
-                start_date__lte=date,
-                end_date__gte=date,
-                approved=True
-            ).exists():
-                raise ValidationError(
-                    f"{emp_obj.first_name} {emp_obj.last_name} ist am {date} abwesend (Urlaub/Krankheit)."
-                )
-
-            # 3. Check for Employee Availability
-            availability = EmployeeAvailability.objects.filter(employee=emp_obj, date=date).first()
-            if availability and not availability.is_available:
-                raise ValidationError(
-                    f"{emp_obj.first_name} {emp_obj.last_name} ist am {date} nicht verfügbar."
-                )
-
-            # 4. Überlappende Schichten (am selben Tag, aber andere Schicht)
-            overlapping_assignments = ShiftAssignment.objects.filter(
-                employee=emp_obj,
-                date=date
-            )
-            if self.initial.get('shift'):
-                 overlapping_assignments = overlapping_assignments.exclude(
-                     shift=self.initial['shift']
-                 )
-
-            if overlapping_assignments.exists():
-                for existing_assignment in overlapping_assignments:
-                    current_shift_start_dt = datetime.datetime.combine(date, shift.start_time)
-                    current_shift_end_dt = datetime.datetime.combine(date, shift.end_time)
-
-                    if shift.end_time < shift.start_time:
-                        current_shift_end_dt += datetime.timedelta(days=1)
-
-                    existing_shift_start_dt = datetime.datetime.combine(existing_assignment.date, existing_assignment.shift.start_time)
-                    existing_shift_end_dt = datetime.datetime.combine(existing_assignment.date, existing_assignment.shift.end_time)
-                    
-                    if existing_assignment.shift.end_time < existing_assignment.shift.start_time:
-                        existing_shift_end_dt += datetime.timedelta(days=1) 
-
-                    if (current_shift_start_dt < existing_shift_end_dt and 
-                        existing_shift_start_dt < current_shift_end_dt):
-                        raise ValidationError(
-                            f"{emp_obj.first_name} {emp_obj.last_name} ist bereits am {date} von "
-                            f"'{existing_assignment.shift.get_name_display()}' ({existing_assignment.shift.start_time.strftime('%H:%M')}-{existing_assignment.shift.end_time.strftime('%H:%M')}) eingetragen. "
-                            f"Ein Mitarbeiter kann nicht zu mehreren überlappenden Schichten zugewiesen werden."
-                        )
-            
-            # 5. Eindeutigkeitsprüfung für (Mitarbeiter, Schicht, Datum) über alle Stationen
-            conflicting_exact_match_assignments = ShiftAssignment.objects.filter(
-                employee=emp_obj,
-                shift=shift,
-                date=date
-            )
-            
-            if self.initial.get('ward') and self.initial.get('date') and self.initial.get('shift'):
-                conflicting_exact_match_assignments = conflicting_exact_match_assignments.exclude(
-                    ward=self.initial['ward'],
-                    date=self.initial['date'],
-                    shift=self.initial['shift']
-                )
-            
-            if conflicting_exact_match_assignments.exists():
-                conflict_assignment = conflicting_exact_match_assignments.first()
-                raise ValidationError(
-                    f"{emp_obj.first_name} {emp_obj.last_name} ist bereits für die Schicht '{shift.get_name_display()}' am {date} auf "
-                    f"Station '{conflict_assignment.ward.name}' eingetragen. Ein Mitarbeiter kann nicht zweimal zur gleichen Schicht an einem Tag eingetragen werden (auch nicht auf verschiedenen Stationen)."
-                )
-
-
-        # --- Collective Shift-Level Checks (non-blocking warnings) ---
-        staff_counting_towards_ratio = 0
-        critical_qual_found_in_selection = False
-        
-        for employee in all_selected_employees:
-            emp_obj = employees_map.get(employee.id)
-            if not emp_obj: continue
-
-            if hasattr(emp_obj, 'professional_profile') and emp_obj.professional_profile and emp_obj.professional_profile.counts_towards_staff_ratio:
-                staff_counting_towards_ratio += 1
-            
-            if shift_requires_critical_qual:
-                employee_has_critical_qual = any(q_db.pk in emp_obj.qualifications.values_list('pk', flat=True) for q_db in critical_quals_in_db)
-                if employee_has_critical_qual:
-                    critical_qual_found_in_selection = True
-
-        # Rule 6: Critical Qualification (WARNING)
-        if shift_requires_critical_qual and ward.current_patients > 0 and not critical_qual_found_in_selection:
-            self.add_error(None, 
-                f"WARNUNG: Es fehlt noch ein Mitarbeiter mit kritischer Qualifikation für die Schicht '{shift.get_name_display()}' auf Station '{ward.name}'.")
-
-        # Rule 7: Patient-Staff Ratio (WARNING)
-        if ward.current_patients > 0:
-            required_staff_for_patients = (ward.current_patients + 2) // 3
-            
-            min_staff_for_shift_type = 0
-            if shift.name == 'EARLY':
-                min_staff_for_shift_type = ward.min_staff_early_shift
-            elif shift.name == 'LATE':
-                min_staff_for_shift_type = ward.min_staff_late_shift
-            elif shift.name == 'NIGHT':
-                min_staff_for_shift_type = ward.min_staff_night_shift
-            
-            total_min_required_professionals = max(required_staff_for_patients, min_staff_for_shift_type)
-
-            if staff_counting_towards_ratio < total_min_required_professionals:
-                self.add_error(None, 
-                    f"WARNUNG: Nicht genügend Pflegefachkräfte für die Schicht '{shift.get_name_display()}' auf Station '{ward.name}'. "
-                    f"Benötigt: mindestens {total_min_required_professionals} Pflegefachkräfte. Aktuell: {staff_counting_towards_ratio}.")
-        
+        # Alle Regeln für alle ausgewählten Mitarbeiter mit wenigen Abfragen prüfen (siehe validation.py).
+        # Die bestehenden Zuweisungen dieses Slots werden beim Speichern ersetzt und daher ignoriert.
+        result = validate_slot(ward, date, shift, all_selected_employees)
+        if result.errors:
+            raise ValidationError([violation.message for violation in result.errors])
+
+        # Rule 6 + 7: kritische Qualifikation und Personalschlüssel (WARNING)
+        for warning in result.warnings:
+            self.add_error(None, warning.message)
+
         cleaned_data['status'] = status
         return cleaned_data
 
@@ -431,6 +312,16 @@ class AutomaticScheduleForm(forms.Form):
         widget=forms.NumberInput(attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500 sm:text-sm'})
     )
 
+    improve_seconds = forms.IntegerField(
+        label="Nachoptimierung (Sekunden)",
+        help_text="Zeitbudget der lokalen Suche nach der Planung (Tauschen und Umbesetzen), 0 = aus.",
+        min_value=0,
+        max_value=300,
+        initial=0,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500 sm:text-sm'})
+    )
+
     overwrite_existing = forms.BooleanField(
         label="Bestehende Zuweisungen überschreiben?",
         required=False,
@@ -0,0 +1,82 @@
+# shift_planer/instrumentation.py
+
+import time
+from contextlib import contextmanager
+from django.db import connection
+
+# Phasen eines Planungslaufs in Ausführungsreihenfolge
+PHASES = ('load', 'eligibility', 'assignment', 'improvement', 'save', 'conflict_check')
+
+# Eignungstrichter: wie viele (Mitarbeiter, Schicht, Tag)-Kandidaten an welcher Prüfung scheitern
+# blocked = nicht erlaubte Schicht, abwesend oder nicht verfügbar; hours = Wochenstunden erreicht
+FUNNEL_STEPS = ('candidates', 'blocked', 'overlap', 'rest', 'consecutive', 'hours', 'eligible', 'assigned')
+
+
+class SchedulerProfile:
+    """
+    Wall time and DB query count per phase plus the eligibility funnel of one scheduler run,
+    and the solver reports of the optimization engines (see engines.py).
+
+    Queries are counted with connection.execute_wrapper while a phase() block is active.
+    The planning loop itself runs without queries and reports its time with add_time().
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.queries = dict.fromkeys(PHASES, 0)
+        self.funnel = dict.fromkeys(FUNNEL_STEPS, 0)
+        self.solutions = []
+        self.current_phase = None
+
+    @contextmanager
+    def phase(self, name):
+        """Times the block and attributes all queries run inside it to the phase."""
+        if self.current_phase is not None:
+            # Verschachtelte Phasen zählen zur äußeren Phase
+            yield
+            return
+        self.current_phase = name
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._count_query):
+                yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+            self.current_phase = None
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries[self.current_phase] = self.queries.get(self.current_phase, 0) + 1
+        return execute(sql, params, many, context)
+
+    def add_time(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def count(self, step, amount=1):
+        self.funnel[step] = self.funnel.get(step, 0) + amount
+
+    def add_solution(self, report):
+        """Keeps the SolutionReport of one solver run."""
+        self.solutions.append(report._asdict())
+
+    def merge(self, other):
+        """Adds the numbers of another profile (e.g. from a worker process)."""
+        for name, seconds in other.seconds.items():
+            self.add_time(name, seconds)
+        for name, queries in other.queries.items():
+            self.queries[name] = self.queries.get(name, 0) + queries
+        for step, amount in other.funnel.items():
+            self.count(step, amount)
+        self.solutions.extend(other.solutions)
+
+    def as_dict(self):
+        """JSON-serialisable form, stored with the run log and returned in the result dict."""
+        return {
+            "phases": {
+                name: {"seconds": round(self.seconds[name], 6), "queries": self.queries.get(name, 0)}
+                for name in self.seconds
+            },
+            "funnel": dict(self.funnel),
+            "total_seconds": round(sum(self.seconds.values()), 6),
+            "total_queries": sum(self.queries.values()),
+            "solutions": list(self.solutions),
+        }
@@ -0,0 +1,131 @@
+# shift_planer/jobs.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from shift_planer.models import ScheduleJob
+from shift_planer.scheduler import ShiftScheduler
+from shift_planer.scheduler_log import save_run_log
+
+logger = logging.getLogger(__name__)
+
+# Fortschritt wird höchstens in diesen Schritten (Prozentpunkte) in die Datenbank geschrieben
+PROGRESS_STEP = 5
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def enqueue_job(ward, year, month, min_rest_hours, max_consecutive_shifts, overwrite=False, improve_seconds=0):
+    """Creates a queued ScheduleJob and hands it to the in-process worker once the transaction commits."""
+    job = ScheduleJob.objects.create(
+        ward=ward,
+        year=year,
+        month=month,
+        min_rest_hours=min_rest_hours,
+        max_consecutive_shifts=max_consecutive_shifts,
+        overwrite=overwrite,
+        improve_seconds=improve_seconds
+    )
+    if getattr(settings, 'SCHEDULE_JOBS_RUN_IN_PROCESS', True):
+        transaction.on_commit(lambda: submit_job(job.pk))
+    return job
+
+
+def submit_job(job_id):
+    """Runs the job on the process-wide thread pool (size: SCHEDULE_JOB_THREADS, default 1)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'SCHEDULE_JOB_THREADS', 1),
+                thread_name_prefix='schedule-job'
+            )
+    return _executor.submit(_run_in_thread, job_id)
+
+
+def _run_in_thread(job_id):
+    # Jeder Thread hat eine eigene DB-Verbindung, die danach wieder geschlossen wird
+    close_old_connections()
+    try:
+        job = claim_job(job_id)
+        if job is not None:
+            run_job(job)
+    finally:
+        close_old_connections()
+
+
+def claim_job(job_id=None):
+    """
+    Atomically moves a queued job to RUNNING and returns it (the oldest queued one if no
+    id is given). Returns None if the job was already taken by another worker.
+    """
+    queued = ScheduleJob.objects.filter(status='QUEUED')
+    if job_id is not None:
+        queued = queued.filter(pk=job_id)
+    job = queued.order_by('created_at', 'pk').first()
+    if job is None:
+        return None
+    claimed = ScheduleJob.objects.filter(pk=job.pk, status='QUEUED').update(
+        status='RUNNING',
+        started_at=timezone.now(),
+        progress_message="Started"
+    )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_job(job):
+    """Runs a claimed job, stores status and result message on it and saves its run log."""
+    last_progress = [-PROGRESS_STEP]
+
+    def report(percent, message):
+        if percent - last_progress[0] >= PROGRESS_STEP:
+            last_progress[0] = percent
+            ScheduleJob.objects.filter(pk=job.pk).update(progress=percent, progress_message=message[:255])
+
+    scheduler = ShiftScheduler(job.min_rest_hours, job.max_consecutive_shifts, progress_callback=report, improve_seconds=job.improve_seconds)
+    try:
+        result = scheduler.generate_schedule(
+            year=job.year,
+            month=job.month,
+            ward_slug=job.ward.slug,
+            overwrite=job.overwrite
+        )
+    except Exception as e:
+        logger.exception("Schedule job %s failed", job.pk)
+        result = {"success": False, "message": f"Unerwarteter Fehler: {e}"}
+
+    status = 'SUCCEEDED' if result["success"] else 'FAILED'
+    message = result["message"]
+    try:
+        # Protokoll zuerst speichern, damit es beim Abschluss des Jobs schon sichtbar ist
+        save_run_log(scheduler.log, description=f"Job {job.pk}: {job.ward.name} {job.year}-{job.month:02d}", ward=job.ward, job=job, profile=scheduler.profile.as_dict())
+    except Exception as e:
+        logger.exception("Saving the run log of schedule job %s failed", job.pk)
+        status = 'FAILED'
+        message = f"{message} Das Protokoll konnte nicht gespeichert werden: {e}"
+    finally:
+        # Der Job darf nie in RUNNING hängen bleiben, sonst greift ihn kein Worker mehr auf
+        _finish_job(job, status, message)
+    return job
+
+
+def _finish_job(job, status, message):
+    """Stores the final status; if that save fails the job is at least marked FAILED."""
+    job.status = status
+    job.progress = 100
+    job.progress_message = "Finished"
+    job.result_message = message
+    job.finished_at = timezone.now()
+    try:
+        job.save(update_fields=['status', 'progress', 'progress_message', 'result_message', 'finished_at'])
+    except Exception:
+        logger.exception("Saving schedule job %s failed", job.pk)
+        job.status = 'FAILED'
+        ScheduleJob.objects.filter(pk=job.pk).update(status='FAILED', progress=100, progress_message="Finished", finished_at=job.finished_at)
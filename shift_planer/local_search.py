@@ -0,0 +1,301 @@
+# shift_planer/local_search.py
+
+import datetime
+import random
+import time
+from collections import namedtuple
+from shift_planer.engines import SHORTFALL_WEIGHT, PROFESSIONAL_SHORTFALL_WEIGHT, CRITICAL_SHORTFALL_WEIGHT, FAIRNESS_WEIGHT
+
+# Nach so vielen Zügen wird die Uhr geprüft
+TIME_CHECK_INTERVAL = 64
+
+MOVES = ('reassign', 'move', 'fill', 'swap')
+
+# Ergebnis eines Verbesserungslaufs; unfilled = fehlende Köpfe plus fehlende kritische Qualifikationen
+ImprovementResult = namedtuple('ImprovementResult', [
+    'iterations', 'accepted', 'objective_before', 'objective_after',
+    'unfilled_before', 'unfilled_after', 'variance_before', 'variance_after', 'seconds'
+])
+
+
+class LocalSearch:
+    """
+    Improves the assignments planned for one ward by local search on the snapshot.
+
+    Moves: reassign a slot to another employee, move an employee to an understaffed slot,
+    fill an understaffed slot, swap the slots of two employees on different days. Every
+    move keeps the planning rules (absence, availability, overlap, rest, consecutive days,
+    weekly hours unless enforce_weekly_hours is off),
+    so no conflicts are introduced. A move is kept if it does not worsen the objective:
+    weighted missing staff plus FAIRNESS_WEIGHT times the variance of the shift counts.
+    The objective is updated from the at most two touched slots and running sums of the
+    shift counts, never recomputed from scratch.
+    """
+
+    def __init__(self, ward, snapshot, start_date, end_date, min_rest_hours, max_consecutive_shifts, assignments, seed=None,
+                 enforce_weekly_hours=True):
+        self.ward = ward
+        self.snapshot = snapshot
+        self.min_rest_minutes = float(min_rest_hours) * 60
+        self.max_consecutive_shifts = int(max_consecutive_shifts)
+        self.random = random.Random(seed)
+        self.enforce_weekly_hours = enforce_weekly_hours
+
+        # Nur die Zuweisungen dieses Laufs werden verändert: [(emp_id, date, shift_id)]
+        self.movable = []
+        self.positions = {}
+        # (date, shift_id) -> [Anzahl, Fachkräfte, kritisch Qualifizierte]
+        self.slot_counts = {}
+        self.requirements = {}
+        self.understaffed = set()
+        self.understaffed_list = []
+
+        for day in _days(start_date, end_date):
+            for shift in snapshot.shifts:
+                requirement = snapshot.staffing.get(ward.id, shift.id)
+                self.requirements[(day, shift.id)] = (
+                    requirement.min_staff, requirement.target_counting_staff,
+                    requirement.requires_critical and ward.current_patients > 0
+                )
+                counts = [0, 0, 0]
+                for emp_id in snapshot.slot_employee_ids(ward.id, day, shift.id):
+                    self._count(counts, emp_id, 1)
+                self.slot_counts[(day, shift.id)] = counts
+                self._update_understaffed((day, shift.id))
+
+        # Dienste je Mitarbeiter (nur Mitarbeiter mit erlaubten Schichten) für die Varianz
+        self.candidates = [emp.id for emp in snapshot.employees if snapshot.has_allowed_shifts(emp.id)]
+        self.shift_counts = dict.fromkeys(self.candidates, 0)
+        self.count_sum = 0
+        self.count_square_sum = 0
+        for emp_id, date, shift_id in assignments:
+            self._add_movable((emp_id, date, shift_id))
+            self._change_count(emp_id, 1)
+
+    # --- Zielfunktion ---
+
+    def _count(self, counts, emp_id, sign):
+        counts[0] += sign
+        if self.snapshot.counts_towards_staff_ratio(emp_id):
+            counts[1] += sign
+        if self.snapshot.has_critical_qualification(emp_id):
+            counts[2] += sign
+
+    def _missing(self, slot):
+        min_staff, target_counting_staff, needs_critical = self.requirements[slot]
+        total, professionals, critical = self.slot_counts[slot]
+        return (
+            max(min_staff - total, 0),
+            max(target_counting_staff - professionals, 0),
+            1 if needs_critical and not critical else 0,
+        )
+
+    def _slot_penalty(self, slot):
+        missing, missing_professionals, missing_critical = self._missing(slot)
+        return (
+            SHORTFALL_WEIGHT * missing + PROFESSIONAL_SHORTFALL_WEIGHT * missing_professionals
+            + CRITICAL_SHORTFALL_WEIGHT * missing_critical
+        )
+
+    def variance(self):
+        n = len(self.candidates)
+        if not n:
+            return 0.0
+        mean = self.count_sum / n
+        return self.count_square_sum / n - mean * mean
+
+    def unfilled(self):
+        """Missing heads over all slots (a missing professional counts once), plus missing critical qualifications."""
+        total = 0
+        for slot in self.slot_counts:
+            missing, missing_professionals, missing_critical = self._missing(slot)
+            total += max(missing, missing_professionals) + missing_critical
+        return total
+
+    def objective(self):
+        return sum(self._slot_penalty(slot) for slot in self.slot_counts) + FAIRNESS_WEIGHT * self.variance()
+
+    def _local_objective(self, slots):
+        return sum(self._slot_penalty(slot) for slot in slots) + FAIRNESS_WEIGHT * self.variance()
+
+    # --- Zustand ---
+
+    def _add_movable(self, entry):
+        self.positions[entry] = len(self.movable)
+        self.movable.append(entry)
+
+    def _remove_movable(self, entry):
+        index = self.positions.pop(entry)
+        last = self.movable.pop()
+        if index < len(self.movable):
+            self.movable[index] = last
+            self.positions[last] = index
+
+    def _change_count(self, emp_id, sign):
+        if emp_id not in self.shift_counts:
+            return
+        old = self.shift_counts[emp_id]
+        new = old + sign
+        self.shift_counts[emp_id] = new
+        self.count_sum += sign
+        self.count_square_sum += new * new - old * old
+
+    def _update_understaffed(self, slot):
+        if any(self._missing(slot)):
+            if slot not in self.understaffed:
+                self.understaffed.add(slot)
+                self.understaffed_list.append(slot)
+        elif slot in self.understaffed:
+            self.understaffed.discard(slot)
+            self.understaffed_list.remove(slot)
+
+    def _place(self, emp_id, slot):
+        date, shift_id = slot
+        self.snapshot.record_assignment(emp_id, date, shift_id, self.ward.id)
+        self._count(self.slot_counts[slot], emp_id, 1)
+        self._add_movable((emp_id, date, shift_id))
+        self._change_count(emp_id, 1)
+        self._update_understaffed(slot)
+
+    def _unplace(self, emp_id, slot):
+        date, shift_id = slot
+        self.snapshot.remove_assignment(emp_id, date, shift_id, self.ward.id)
+        self._count(self.slot_counts[slot], emp_id, -1)
+        self._remove_movable((emp_id, date, shift_id))
+        self._change_count(emp_id, -1)
+        self._update_understaffed(slot)
+
+    def can_take(self, emp_id, slot):
+        """True if the employee may work the slot given all other assignments (the planner's rules)."""
+        date, shift_id = slot
+        snapshot = self.snapshot
+        shift = snapshot.shifts_by_id[shift_id]
+        if (
+            not snapshot.is_allowed(emp_id, shift_id)
+            or snapshot.is_absent(emp_id, date)
+            or snapshot.is_unavailable(emp_id, date)
+            or emp_id in snapshot.slot_employee_ids(self.ward.id, date, shift_id)
+            or snapshot.overlapping_assignment(emp_id, date, shift) is not None
+            or (self.enforce_weekly_hours and not snapshot.hours.fits(emp_id, date, shift_id))
+        ):
+            return False
+        start, end = snapshot.geometry.interval(date, shift_id)
+        previous_end = snapshot.previous_shift_end(emp_id, date, shift)
+        if previous_end is not None and start - previous_end < self.min_rest_minutes:
+            return False
+        next_start = snapshot.next_shift_start(emp_id, date, shift)
+        if next_start is not None and next_start - end < self.min_rest_minutes:
+            return False
+        limit = self.max_consecutive_shifts
+        return snapshot.consecutive_days_before(emp_id, date, limit) + 1 + snapshot.consecutive_days_after(emp_id, date, limit) <= limit
+
+    # --- Züge: jeweils (Vorher, Nachher) der Zielfunktion oder None, wenn der Zug unzulässig ist ---
+
+    def _reassign(self):
+        emp_id, date, shift_id = self.random.choice(self.movable)
+        slot = (date, shift_id)
+        other_id = self.random.choice(self.candidates)
+        if other_id == emp_id:
+            return None
+        before = self._local_objective([slot])
+        self._unplace(emp_id, slot)
+        if not self.can_take(other_id, slot):
+            self._place(emp_id, slot)
+            return None
+        self._place(other_id, slot)
+        return before, self._local_objective([slot]), lambda: (self._unplace(other_id, slot), self._place(emp_id, slot))
+
+    def _move(self):
+        if not self.understaffed_list:
+            return None
+        emp_id, date, shift_id = self.random.choice(self.movable)
+        slot = (date, shift_id)
+        target = self.random.choice(self.understaffed_list)
+        if target == slot:
+            return None
+        before = self._local_objective([slot, target])
+        self._unplace(emp_id, slot)
+        if not self.can_take(emp_id, target):
+            self._place(emp_id, slot)
+            return None
+        self._place(emp_id, target)
+        return before, self._local_objective([slot, target]), lambda: (self._unplace(emp_id, target), self._place(emp_id, slot))
+
+    def _fill(self):
+        if not self.understaffed_list:
+            return None
+        target = self.random.choice(self.understaffed_list)
+        emp_id = self.random.choice(self.candidates)
+        if not self.can_take(emp_id, target):
+            return None
+        before = self._local_objective([target])
+        self._place(emp_id, target)
+        return before, self._local_objective([target]), lambda: self._unplace(emp_id, target)
+
+    def _swap(self):
+        first_emp, first_date, first_shift = self.random.choice(self.movable)
+        second_emp, second_date, second_shift = self.random.choice(self.movable)
+        if first_emp == second_emp or first_date == second_date:
+            return None
+        first, second = (first_date, first_shift), (second_date, second_shift)
+        before = self._local_objective([first, second])
+        self._unplace(first_emp, first)
+        self._unplace(second_emp, second)
+        if self.can_take(first_emp, second) and self.can_take(second_emp, first):
+            self._place(first_emp, second)
+            self._place(second_emp, first)
+
+            def undo():
+                self._unplace(first_emp, second)
+                self._unplace(second_emp, first)
+                self._place(first_emp, first)
+                self._place(second_emp, second)
+            return before, self._local_objective([first, second]), undo
+        self._place(first_emp, first)
+        self._place(second_emp, second)
+        return None
+
+    def run(self, seconds, max_iterations=None):
+        """Applies random moves until the time budget (or max_iterations) is used up."""
+        started = time.perf_counter()
+        deadline = started + seconds
+        objective_before = self.objective()
+        unfilled_before = self.unfilled()
+        variance_before = self.variance()
+        moves = {'reassign': self._reassign, 'move': self._move, 'fill': self._fill, 'swap': self._swap}
+
+        iterations = accepted = 0
+        while self.movable or self.understaffed_list:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            if iterations % TIME_CHECK_INTERVAL == 0 and time.perf_counter() >= deadline:
+                break
+            iterations += 1
+            name = self.random.choice(MOVES)
+            if not self.movable and name != 'fill':
+                continue
+            outcome = moves[name]()
+            if outcome is None:
+                continue
+            before, after, undo = outcome
+            if after <= before:
+                accepted += 1
+            else:
+                undo()
+
+        return ImprovementResult(
+            iterations, accepted, round(objective_before, 6), round(self.objective(), 6),
+            unfilled_before, self.unfilled(), round(variance_before, 6), round(self.variance(), 6),
+            round(time.perf_counter() - started, 6)
+        )
+
+    def assignments(self):
+        """The improved assignments as (emp_id, date, shift_id), sorted by date."""
+        return sorted(self.movable, key=lambda entry: (entry[1], entry[2], entry[0]))
+
+
+def _days(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += datetime.timedelta(days=1)
@@ -0,0 +1,69 @@
+# shift_planer/management/commands/bench_scheduler.py
+
+import json
+import platform
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from shift_planer.benchmark import generate_benchmark_data, run_benchmarks
+from shift_planer.scheduler import ShiftScheduler
+
+DEFAULT_SIZES = '50,500,5000'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the scheduler on synthetic data of several sizes (number of employees) and prints '
+        'median/p95 time and query counts as JSON. All generated data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=str, default=DEFAULT_SIZES, help=f'Comma separated employee counts (default: {DEFAULT_SIZES}).')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (default: 5).')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data generator (default: 0).')
+        parser.add_argument('--year', type=int, default=2030, help='Year of the benchmark month (default: 2030).')
+        parser.add_argument('--month', type=int, default=1, help='Benchmark month (default: 1).')
+        parser.add_argument('--output', type=str, help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError(f"Invalid --sizes '{options['sizes']}', expected e.g. 50,500,5000.")
+        if not sizes or min(sizes) < 1 or options['repeat'] < 1:
+            raise CommandError("--sizes and --repeat must be positive.")
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": django.db.connection.vendor,
+            "seed": options['seed'],
+            "repeat": options['repeat'],
+            "sizes": {},
+        }
+        for size in sizes:
+            self.stderr.write(f"Benchmarking {size} employees...")
+            report["sizes"][str(size)] = self.run_size(size, options)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def run_size(self, size, options):
+        """Generates the data for one size, runs all benchmarks and rolls everything back."""
+        with transaction.atomic():
+            wards = generate_benchmark_data(size, options['year'], options['month'], seed=options['seed'])
+            results = run_benchmarks(
+                lambda: ShiftScheduler(11.0, 6, log_level='ERROR'),
+                wards[0], options['year'], options['month'], options['repeat']
+            )
+            results["wards"] = len(wards)
+            # Benchmarkdaten nicht in der Datenbank behalten
+            transaction.set_rollback(True)
+        return results
@@ -2,7 +2,10 @@
 
 from django.core.management.base import BaseCommand, CommandError
 from shift_planer.models import Ward # Only Ward needed for lookup
-from shift_planer.scheduler import ShiftScheduler # Import the new scheduler
+from shift_planer.scheduler import ShiftScheduler, iter_months # Import the new scheduler
+from shift_planer.scheduler_log import LEVELS, save_run_log
+from shift_planer.engines import ENGINES, EngineUnavailable
+from shift_planer.weekly_hours import WEEKLY_HOURS_MODES
 import datetime
 import calendar
 
@@ -10,43 +13,145 @@ import calendar
 DEFAULT_MIN_REST_HOURS_BETWEEN_SHIFTS = 11.0
 DEFAULT_MAX_CONSECUTIVE_SHIFTS = 6
 
+
+def parse_month(value):
+    """Parses 'YYYY-MM' into a (year, month) tuple."""
+    try:
+        parsed = datetime.datetime.strptime(value, '%Y-%m')
+    except ValueError:
+        raise CommandError(f'Invalid month "{value}", expected YYYY-MM (e.g. 2026-11).')
+    return parsed.year, parsed.month
+
+
 class Command(BaseCommand):
-    help = 'Generates an automatic shift schedule for a given month and ward, with advanced constraints. Now uses ShiftScheduler.'
+    help = (
+        'Generates an automatic shift schedule for a given month and ward, with advanced constraints. Now uses ShiftScheduler. '
+        'Batch mode: --all-wards or --wards with --from/--to plans several wards and months in one run.'
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument('year', type=int, help='Year for the schedule (e.g., 2025)')
-        parser.add_argument('month', type=int, help='Month for the schedule (1-12)')
-        parser.add_argument('ward_slug', type=str, help='Slug of the ward for which to generate the schedule (e.g., "station-1")')
+        parser.add_argument('year', type=int, nargs='?', help='Year for the schedule (e.g., 2025)')
+        parser.add_argument('month', type=int, nargs='?', help='Month for the schedule (1-12)')
+        parser.add_argument('ward_slug', type=str, nargs='?', help='Slug of the ward for which to generate the schedule (e.g., "station-1")')
         parser.add_argument('--overwrite', action='store_true', help='Overwrite existing assignments for the given month and ward.')
         parser.add_argument('--min-rest-hours', type=float, default=DEFAULT_MIN_REST_HOURS_BETWEEN_SHIFTS,
                             help=f'Minimum rest hours between shifts (default: {DEFAULT_MIN_REST_HOURS_BETWEEN_SHIFTS}).')
         parser.add_argument('--max-consecutive-shifts', type=int, default=DEFAULT_MAX_CONSECUTIVE_SHIFTS,
                             help=f'Maximum consecutive shifts allowed (default: {DEFAULT_MAX_CONSECUTIVE_SHIFTS}).')
+        # Batch-Modus
+        parser.add_argument('--all-wards', action='store_true', help='Batch mode: plan all wards.')
+        parser.add_argument('--wards', type=str, help='Batch mode: comma separated list of ward slugs.')
+        parser.add_argument('--from', dest='from_month', type=str, help='Batch mode: first month to plan (YYYY-MM).')
+        parser.add_argument('--to', dest='to_month', type=str, help='Batch mode: last month to plan (YYYY-MM, default: --from).')
+        parser.add_argument('--log-level', choices=LEVELS, default=None,
+                            help='Lowest level kept in the run log (default: settings.SCHEDULER_LOG_LEVEL or INFO).')
+        parser.add_argument('--profile', action='store_true', help='Print wall time and query count per phase and the eligibility funnel.')
+        parser.add_argument('--workers', type=int, default=1, help='Batch mode: number of worker processes used to plan the wards (default: 1).')
+        parser.add_argument('--engine', choices=ENGINES, default='greedy',
+                            help='Planning engine: greedy (default), cpsat (needs ortools) or ilp (needs pulp).')
+        parser.add_argument('--time-limit', type=float, default=None,
+                            help='Solver time limit per ward and period in seconds (default: settings.SCHEDULER_SOLVER_TIME_LIMIT or 30).')
+        parser.add_argument('--improve-seconds', type=float, default=0,
+                            help='Time budget in seconds of the local search pass after planning each ward (default: 0 = off).')
+        parser.add_argument('--solver-threads', type=int, default=None,
+                            help='Search threads of the solver (default: settings.SCHEDULER_SOLVER_THREADS or the CPU count).')
+        parser.add_argument('--weekly-hours', choices=WEEKLY_HOURS_MODES, default=None,
+                            help="Employee.available_hours_per_week as 'hard' limit, 'soft' limit (only exceeded when nobody else is free) "
+                                 "or 'off' (default: settings.SCHEDULER_WEEKLY_HOURS or hard).")
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Seed of the random tie-breaks; runs with the same seed and data produce the same schedule.')
 
 
     def handle(self, *args, **options):
+        min_rest_hours = options['min_rest_hours']
+        max_consecutive_shifts = options['max_consecutive_shifts']
+
+        if options['all_wards'] or options['wards'] or options['from_month']:
+            return self.handle_batch(options)
+
         year = options['year']
         month = options['month']
         ward_slug = options['ward_slug']
         overwrite = options['overwrite']
-        min_rest_hours = options['min_rest_hours']
-        max_consecutive_shifts = options['max_consecutive_shifts']
+        if year is None or month is None or ward_slug is None:
+            raise CommandError("Please pass 'year month ward_slug', or use batch mode (--all-wards/--wards with --from).")
 
         self.stdout.write(f"Attempting to generate schedule for {calendar.month_name[month]} {year} on Ward: {ward_slug}")
         self.stdout.write(f"Parameters: Min Rest Hours={min_rest_hours}, Max Consecutive Shifts={max_consecutive_shifts}")
 
 
         # Initialize the scheduler
-        scheduler = ShiftScheduler(min_rest_hours, max_consecutive_shifts)
+        scheduler = self.create_scheduler(options)
 
         # Call the generate_schedule method from the scheduler
         result = scheduler.generate_schedule(
-            year=year, 
-            month=month, 
-            ward_slug=ward_slug, 
+            year=year,
+            month=month,
+            ward_slug=ward_slug,
             overwrite=overwrite
         )
 
+        self.write_logs(scheduler)
+        if options['profile']:
+            self.write_profile(scheduler.profile.as_dict())
+        self.save_log(scheduler, f"{ward_slug} {year}-{month:02d}", Ward.objects.filter(slug=ward_slug).first())
+
+        if result["success"]:
+            self.stdout.write(self.style.SUCCESS(f"Schedule generation finished: {result['message']}"))
+        else:
+            raise CommandError(f"Schedule generation failed: {result['message']}")
+
+    def handle_batch(self, options):
+        if not options['from_month']:
+            raise CommandError("Batch mode needs --from YYYY-MM.")
+        first_month = parse_month(options['from_month'])
+        last_month = parse_month(options['to_month']) if options['to_month'] else first_month
+        if last_month < first_month:
+            raise CommandError("--to must not be before --from.")
+        months = list(iter_months(first_month, last_month))
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        if options['all_wards']:
+            wards = list(Ward.objects.order_by('name'))
+        elif options['wards']:
+            slugs = [slug.strip() for slug in options['wards'].split(',') if slug.strip()]
+            wards = list(Ward.objects.filter(slug__in=slugs).order_by('name'))
+            missing = set(slugs) - {ward.slug for ward in wards}
+            if missing:
+                raise CommandError(f"Unknown ward slugs: {', '.join(sorted(missing))}")
+        else:
+            raise CommandError("Batch mode needs --all-wards or --wards.")
+
+        self.stdout.write(f"Attempting to generate schedules for {len(wards)} wards, {len(months)} months ({options['from_month']} to {options['to_month'] or options['from_month']})")
+        self.stdout.write(f"Parameters: Min Rest Hours={options['min_rest_hours']}, Max Consecutive Shifts={options['max_consecutive_shifts']}")
+
+        scheduler = self.create_scheduler(options)
+        result = scheduler.generate_batch(wards, months, overwrite=options['overwrite'], workers=options['workers'])
+
+        if options['verbosity'] > 1:
+            self.write_logs(scheduler)
+        self.write_summary(result["wards"])
+        if options['profile']:
+            self.write_profile(scheduler.profile.as_dict())
+        self.save_log(scheduler, f"Batch {options['from_month']} to {options['to_month'] or options['from_month']}, {len(wards)} wards")
+
+        if result["success"]:
+            self.stdout.write(self.style.SUCCESS(f"Batch schedule generation finished: {result['message']}"))
+        else:
+            raise CommandError(f"Batch schedule generation failed: {result['message']}")
+
+    def create_scheduler(self, options):
+        try:
+            return ShiftScheduler(
+                options['min_rest_hours'], options['max_consecutive_shifts'], log_level=options['log_level'],
+                engine=options['engine'], time_limit=options['time_limit'], solver_threads=options['solver_threads'],
+                improve_seconds=options['improve_seconds'], seed=options['seed'], weekly_hours=options['weekly_hours']
+            )
+        except (ValueError, EngineUnavailable) as e:
+            raise CommandError(str(e))
+
+    def write_logs(self, scheduler):
         # Print logs from the scheduler
         for msg in scheduler.get_logs():
             if "[ERROR]" in msg:
@@ -56,8 +161,36 @@ class Command(BaseCommand):
             else:
                 self.stdout.write(self.style.SUCCESS(msg)) # Use SUCCESS for general info logs
 
-        if result["success"]:
-            self.stdout.write(self.style.SUCCESS(f"Schedule generation finished: {result['message']}"))
-        else:
-            raise CommandError(f"Schedule generation failed: {result['message']}")
+    def save_log(self, scheduler, description, ward=None):
+        """Prints the aggregated counters and stores the run log."""
+        for line in scheduler.get_log_summary():
+            self.stdout.write(f"  {line}")
+        run_log = save_run_log(scheduler.log, description=description, ward=ward, profile=scheduler.profile.as_dict())
+        self.stdout.write(f"Run log saved as #{run_log.pk}.")
+
+    def write_profile(self, profile):
+        """Prints the phase table and the eligibility funnel of a SchedulerProfile.as_dict()."""
+        self.stdout.write(f"{'Phase':<16}  {'Time (s)':>8}  {'Queries':>7}")
+        for name, phase in profile["phases"].items():
+            self.stdout.write(f"{name:<16}  {phase['seconds']:>8.3f}  {phase['queries']:>7}")
+        self.stdout.write(f"{'total':<16}  {profile['total_seconds']:>8.3f}  {profile['total_queries']:>7}")
+        self.stdout.write("Eligibility funnel: " + " -> ".join(f"{step} {count}" for step, count in profile["funnel"].items()))
+        for solution in profile["solutions"]:
+            self.stdout.write(
+                f"Solver {solution['engine']} ward {solution['ward_id']} {solution['start_date']}..{solution['end_date']}: "
+                f"{solution['status']} in {solution['seconds']:.2f}s, objective {solution['objective']}, bound {solution['best_bound']}, "
+                f"gap {solution['gap']}, shortfall {solution['shortfall']}, professional shortfall {solution['professional_shortfall']}, "
+                f"critical missing {solution['critical_missing']}, max shifts per employee {solution['max_shifts']}"
+            )
 
+    def write_summary(self, ward_summaries):
+        """Prints one line per ward with assignments, conflicts and wall time."""
+        name_width = max([len("Ward")] + [len(summary["ward"].name) for summary in ward_summaries])
+        self.stdout.write(f"{'Ward':<{name_width}}  {'Assignments':>11}  {'Conflicts':>9}  {'Time (s)':>8}  Skipped months")
+        for summary in ward_summaries:
+            skipped = ", ".join(f"{year}-{month:02d}" for year, month in summary["skipped_months"]) or "-"
+            line = (
+                f"{summary['ward'].name:<{name_width}}  {summary['assignments']:>11}  "
+                f"{summary['conflicts']:>9}  {summary['seconds']:>8.2f}  {skipped}"
+            )
+            self.stdout.write(self.style.WARNING(line) if summary["conflicts"] else line)
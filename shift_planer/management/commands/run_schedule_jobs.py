@@ -0,0 +1,32 @@
+# shift_planer/management/commands/run_schedule_jobs.py
+
+import time
+from django.core.management.base import BaseCommand
+from shift_planer.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker for queued schedule generation jobs. Polls the database for QUEUED jobs and runs them one by one. '
+        'Use this instead of the in-process thread pool by setting SCHEDULE_JOBS_RUN_IN_PROCESS = False.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run all currently queued jobs and exit.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to wait between polls when the queue is empty (default: 2).')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f"Running {job}")
+            job = run_job(job)
+            if job.status == 'SUCCEEDED':
+                self.stdout.write(self.style.SUCCESS(f"Job {job.pk} finished: {job.result_message}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Job {job.pk} failed: {job.result_message}"))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_planer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='absence',
+            name='type',
+            field=models.CharField(choices=[('VACATION', 'Vacation'), ('SICKNESS', 'Sickness'), ('TRAINING', 'Training'), ('OTHER', 'Other')], default='OTHER', max_length=20, null=True, verbose_name='Absence Type'),
+        ),
+        migrations.CreateModel(
+            name='ScheduleJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(verbose_name='Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month')),
+                ('min_rest_hours', models.FloatField(verbose_name='Minimum Rest Hours')),
+                ('max_consecutive_shifts', models.PositiveIntegerField(verbose_name='Maximum Consecutive Shifts')),
+                ('overwrite', models.BooleanField(default=False, verbose_name='Overwrite Existing')),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('SUCCEEDED', 'Succeeded'), ('FAILED', 'Failed')], default='QUEUED', max_length=20, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progress (%)')),
+                ('progress_message', models.CharField(blank=True, max_length=255, verbose_name='Progress Message')),
+                ('result_message', models.TextField(blank=True, verbose_name='Result Message')),
+                ('logs', models.JSONField(blank=True, default=list, verbose_name='Logs')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('ward', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='shift_planer.ward', verbose_name='Ward')),
+            ],
+            options={
+                'verbose_name': 'Schedule Job',
+                'verbose_name_plural': 'Schedule Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
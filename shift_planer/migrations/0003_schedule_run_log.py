@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_planer', '0002_schedule_job'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='schedulejob',
+            name='logs',
+        ),
+        migrations.CreateModel(
+            name='ScheduleRunLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='Description')),
+                ('level', models.CharField(max_length=10, verbose_name='Log Level')),
+                ('code_counts', models.JSONField(default=dict, verbose_name='Counts per Code')),
+                ('level_counts', models.JSONField(default=dict, verbose_name='Counts per Level')),
+                ('dropped_entries', models.PositiveIntegerField(default=0, verbose_name='Dropped Entries')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('job', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='run_log', to='shift_planer.schedulejob', verbose_name='Job')),
+                ('ward', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='shift_planer.ward', verbose_name='Ward')),
+            ],
+            options={
+                'verbose_name': 'Schedule Run Log',
+                'verbose_name_plural': 'Schedule Run Logs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleRunLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField(verbose_name='Sequence')),
+                ('level', models.CharField(max_length=10, verbose_name='Level')),
+                ('code', models.CharField(blank=True, max_length=40, verbose_name='Code')),
+                ('message', models.TextField(verbose_name='Message')),
+                ('employee_id', models.IntegerField(blank=True, null=True, verbose_name='Employee ID')),
+                ('shift_id', models.IntegerField(blank=True, null=True, verbose_name='Shift ID')),
+                ('date', models.DateField(blank=True, null=True, verbose_name='Date')),
+                ('run_log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='shift_planer.schedulerunlog', verbose_name='Run Log')),
+            ],
+            options={
+                'verbose_name': 'Schedule Run Log Entry',
+                'verbose_name_plural': 'Schedule Run Log Entries',
+                'ordering': ['run_log', 'sequence'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_planer', '0003_schedule_run_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulerunlog',
+            name='profile',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Profile'),
+        ),
+    ]
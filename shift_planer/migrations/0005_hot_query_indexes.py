@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_planer', '0004_schedule_run_log_profile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='absence',
+            index=models.Index(condition=models.Q(('approved', True)), fields=['employee', 'start_date', 'end_date'], name='absence_approved_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='absence',
+            index=models.Index(condition=models.Q(('approved', True)), fields=['end_date', 'start_date'], name='absence_approved_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeavailability',
+            index=models.Index(fields=['date', 'is_available'], name='availability_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shiftassignment',
+            index=models.Index(fields=['ward', 'date', 'shift'], name='assignment_ward_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shiftassignment',
+            index=models.Index(fields=['employee', 'date'], name='assignment_employee_date_idx'),
+        ),
+    ]
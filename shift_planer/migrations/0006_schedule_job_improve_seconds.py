@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_planer', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulejob',
+            name='improve_seconds',
+            field=models.FloatField(default=0, verbose_name='Improvement Time Budget (s)'),
+        ),
+    ]
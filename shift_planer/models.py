@@ -116,6 +116,22 @@ class Shift(models.Model):
     def __str__(self):
         return f"{self.get_name_display()} ({self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')})"
 
+    # Geometrie der Schicht in Minuten; Schichten, die vor ihrem Beginn enden, gehen über Mitternacht
+    @property
+    def start_minute(self):
+        return self.start_time.hour * 60 + self.start_time.minute
+
+    @property
+    def is_overnight(self):
+        return self.end_time < self.start_time
+
+    @property
+    def duration_minutes(self):
+        end_minute = self.end_time.hour * 60 + self.end_time.minute
+        if self.is_overnight:
+            end_minute += 24 * 60
+        return end_minute - self.start_minute
+
 # Modell für einen einzelnen Eintrag im Schichtplan
 class ShiftAssignment(models.Model):
     date = models.DateField(verbose_name="Date")
@@ -136,6 +152,11 @@ class ShiftAssignment(models.Model):
         verbose_name_plural = "Shift Assignments"
         unique_together = ('date', 'shift', 'employee')
         ordering = ['date', 'ward', 'shift__start_time']
+        # Zugriffspfade: Station + Zeitraum (Kalender, Planung, Konfliktprüfung) und Mitarbeiter + Datum (Validierung, Ruhezeiten)
+        indexes = [
+            models.Index(fields=['ward', 'date', 'shift'], name='assignment_ward_date_idx'),
+            models.Index(fields=['employee', 'date'], name='assignment_employee_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.date.strftime('%Y-%m-%d')} - {self.ward.name} - {self.shift.name} ({self.employee.first_name} {self.employee.last_name})"
@@ -153,6 +174,9 @@ class EmployeeAvailability(models.Model):
         verbose_name_plural = "Employee Availabilities"
         unique_together = ('employee', 'date')
         ordering = ['date', 'employee']
+        indexes = [
+            models.Index(fields=['date', 'is_available'], name='availability_date_idx'),
+        ]
 
     def __str__(self):
         status = "Available" if self.is_available else "Not Available"
@@ -180,6 +204,92 @@ class Absence(models.Model):
         verbose_name = "Absence"
         verbose_name_plural = "Absences"
         ordering = ['start_date', 'employee']
+        # Geplant wird nur mit genehmigten Abwesenheiten, daher Teilindizes
+        indexes = [
+            models.Index(fields=['employee', 'start_date', 'end_date'], condition=models.Q(approved=True), name='absence_approved_employee_idx'),
+            models.Index(fields=['end_date', 'start_date'], condition=models.Q(approved=True), name='absence_approved_period_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee} - {self.type} from {self.start_date} to {self.end_date}"
+
+# Hintergrund-Job für die automatische Dienstplanerstellung
+class ScheduleJob(models.Model):
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+    # Parameter
+    ward = models.ForeignKey(Ward, on_delete=models.CASCADE, verbose_name="Ward")
+    year = models.PositiveIntegerField(verbose_name="Year")
+    month = models.PositiveSmallIntegerField(verbose_name="Month")
+    min_rest_hours = models.FloatField(verbose_name="Minimum Rest Hours")
+    max_consecutive_shifts = models.PositiveIntegerField(verbose_name="Maximum Consecutive Shifts")
+    overwrite = models.BooleanField(default=False, verbose_name="Overwrite Existing")
+    improve_seconds = models.FloatField(default=0, verbose_name="Improvement Time Budget (s)")
+    # Status und Fortschritt
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED', verbose_name="Status")
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Progress (%)")
+    progress_message = models.CharField(max_length=255, blank=True, verbose_name="Progress Message")
+    # Ergebnis
+    result_message = models.TextField(blank=True, verbose_name="Result Message")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Started At")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finished At")
+
+    class Meta:
+        verbose_name = "Schedule Job"
+        verbose_name_plural = "Schedule Jobs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Job {self.pk}: {self.ward.name} {self.year}-{self.month:02d} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('SUCCEEDED', 'FAILED')
+
+
+# Gespeichertes Protokoll eines Planungslaufs (siehe scheduler_log.py)
+class ScheduleRunLog(models.Model):
+    job = models.OneToOneField(ScheduleJob, on_delete=models.CASCADE, null=True, blank=True, related_name='run_log', verbose_name="Job")
+    ward = models.ForeignKey(Ward, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Ward")
+    description = models.CharField(max_length=255, blank=True, verbose_name="Description")
+    level = models.CharField(max_length=10, verbose_name="Log Level")
+    # Zähler über alle Einträge, auch über nicht gespeicherte
+    code_counts = models.JSONField(default=dict, verbose_name="Counts per Code")
+    level_counts = models.JSONField(default=dict, verbose_name="Counts per Level")
+    dropped_entries = models.PositiveIntegerField(default=0, verbose_name="Dropped Entries")
+    # Laufzeit und Abfragen je Phase sowie Eignungstrichter (SchedulerProfile.as_dict())
+    profile = models.JSONField(default=dict, blank=True, verbose_name="Profile")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    class Meta:
+        verbose_name = "Schedule Run Log"
+        verbose_name_plural = "Schedule Run Logs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Run log {self.pk}: {self.description}"
+
+
+class ScheduleRunLogEntry(models.Model):
+    run_log = models.ForeignKey(ScheduleRunLog, on_delete=models.CASCADE, related_name='entries', verbose_name="Run Log")
+    sequence = models.PositiveIntegerField(verbose_name="Sequence")
+    level = models.CharField(max_length=10, verbose_name="Level")
+    code = models.CharField(max_length=40, blank=True, verbose_name="Code")
+    message = models.TextField(verbose_name="Message")
+    # Bewusst keine Fremdschlüssel: das Protokoll bleibt erhalten, auch wenn Mitarbeiter/Schichten gelöscht werden
+    employee_id = models.IntegerField(null=True, blank=True, verbose_name="Employee ID")
+    shift_id = models.IntegerField(null=True, blank=True, verbose_name="Shift ID")
+    date = models.DateField(null=True, blank=True, verbose_name="Date")
+
+    class Meta:
+        verbose_name = "Schedule Run Log Entry"
+        verbose_name_plural = "Schedule Run Log Entries"
+        ordering = ['run_log', 'sequence']
+
+    def __str__(self):
+        return f"[{self.level}] {self.message}"
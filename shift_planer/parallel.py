@@ -0,0 +1,117 @@
+# shift_planer/parallel.py
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from shift_planer.scheduler_log import SchedulerLog
+
+
+def ward_demand(ward, snapshot):
+    """Staff needed per day on a ward (sum of the targets of all shifts), at least 1."""
+    demand = 0
+    for requirement in snapshot.staffing.for_ward(ward.id).values():
+        demand += max(requirement.min_staff, requirement.target_counting_staff)
+    return max(demand, 1)
+
+
+def reserve_employees(wards, snapshot, demand_by_ward):
+    """
+    Reserves every employee for exactly one ward, so wards can be planned independently.
+
+    Employees are dealt out in order of scarcity (critical qualification, then staff counting
+    towards the ratio, then everyone else); each goes to the ward with the lowest share of that
+    kind relative to its demand. Returns {ward_id: set(emp_id)}.
+    """
+    reserved = {ward.id: set() for ward in wards}
+    kind_counts = {ward.id: [0, 0, 0] for ward in wards}
+
+    def kind_of(emp_id):
+        if snapshot.has_critical_qualification(emp_id):
+            return 0
+        if snapshot.counts_towards_staff_ratio(emp_id):
+            return 1
+        return 2
+
+    employees = sorted(
+        (emp for emp in snapshot.employees if snapshot.has_allowed_shifts(emp.id)),
+        key=lambda emp: (kind_of(emp.id), emp.id)
+    )
+    for emp in employees:
+        kind = kind_of(emp.id)
+        ward_id = min(
+            reserved,
+            key=lambda w_id: (kind_counts[w_id][kind] / demand_by_ward[w_id], len(reserved[w_id]) / demand_by_ward[w_id], w_id)
+        )
+        reserved[ward_id].add(emp.id)
+        kind_counts[ward_id][kind] += 1
+    return reserved
+
+
+def group_wards(wards, demand_by_ward, group_count):
+    """Splits wards into at most group_count groups with roughly equal demand (largest first)."""
+    groups = [[] for _ in range(min(group_count, len(wards)))]
+    loads = [0] * len(groups)
+    for ward in sorted(wards, key=lambda w: (-demand_by_ward[w.id], w.id)):
+        index = loads.index(min(loads))
+        groups[index].append(ward)
+        loads[index] += demand_by_ward[ward.id]
+    return [group for group in groups if group]
+
+
+def _plan_group(scheduler, wards, months, snapshot, skipped=frozenset()):
+    """
+    Worker entry point: plans a group of wards on its own snapshot subset, leaving out the
+    (ward_id, year, month) pairs in skipped exactly like the sequential batch does.
+    Returns the planned AssignmentRec records, the seconds spent per ward, the
+    scheduler's log (a SchedulerLog) and its SchedulerProfile.
+    """
+    seconds_by_ward = {ward.id: 0.0 for ward in wards}
+    planned = []
+    for start_date, end_date in months:
+        for ward in wards:
+            if (ward.id, start_date.year, start_date.month) in skipped:
+                continue
+            started = time.perf_counter()
+            planned.extend(scheduler._plan_ward(ward, snapshot, start_date, end_date))
+            seconds_by_ward[ward.id] += time.perf_counter() - started
+    return planned, seconds_by_ward, scheduler.log, scheduler.profile
+
+
+def plan_wards_in_parallel(scheduler, wards, months, snapshot, workers, skipped=frozenset()):
+    """
+    Plans wards in a ProcessPoolExecutor.
+
+    Employees are reserved per ward up front (see reserve_employees), wards are grouped into
+    `workers` groups and every group is planned in its own process on a pickled subset of the
+    snapshot. The workers do not touch the database.
+
+    months: list of (start_date, end_date) tuples in chronological order; skipped: (ward_id, year, month)
+    pairs that already have assignments and are not planned.
+    Returns (planned AssignmentRec records, seconds_by_ward, merged SchedulerLog, list of worker profiles).
+    """
+    demand_by_ward = {ward.id: ward_demand(ward, snapshot) for ward in wards}
+    reserved = reserve_employees(wards, snapshot, demand_by_ward)
+    groups = group_wards(wards, demand_by_ward, workers)
+
+    planned = []
+    seconds_by_ward = {}
+    logs = SchedulerLog(level=scheduler.log.level, max_records=scheduler.log.max_records)
+    profiles = []
+    # Worker-Prozesse müssen Django selbst initialisieren, falls sie nicht per fork entstehen
+    with ProcessPoolExecutor(max_workers=len(groups), initializer=django.setup) as executor:
+        futures = []
+        for group in groups:
+            employee_ids = set().union(*(reserved[ward.id] for ward in group))
+            group_scheduler = type(scheduler)(
+                scheduler.MIN_REST_HOURS_BETWEEN_SHIFTS, scheduler.MAX_CONSECUTIVE_SHIFTS, log_level=scheduler.log.level,
+                engine=scheduler.engine, time_limit=scheduler.time_limit, solver_threads=scheduler.solver_threads,
+                improve_seconds=scheduler.improve_seconds, seed=scheduler.seed, weekly_hours=scheduler.weekly_hours
+            )
+            futures.append(executor.submit(_plan_group, group_scheduler, group, months, snapshot.subset(employee_ids), skipped))
+        for future in futures:
+            group_planned, group_seconds, group_logs, group_profile = future.result()
+            planned.extend(group_planned)
+            seconds_by_ward.update(group_seconds)
+            logs.merge(group_logs)
+            profiles.append(group_profile)
+    return planned, seconds_by_ward, logs, profiles
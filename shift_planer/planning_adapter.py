@@ -0,0 +1,42 @@
+# shift_planer/planning_adapter.py
+
+from shift_planer.models import ShiftAssignment, Employee
+from shift_planer.calendar_cache import invalidate_calendar_for_assignments
+from shift_planer.planning_core import EmployeeRec, ShiftRec, WardRec
+from shift_planer.weekly_hours import capacity_minutes
+
+
+def load_employee_records():
+    """EmployeeRec of all employees (default ordering) with one query."""
+    return [
+        EmployeeRec(emp_id, first_name, last_name, capacity_minutes(hours))
+        for emp_id, first_name, last_name, hours in Employee.objects.values_list(
+            'id', 'first_name', 'last_name', 'available_hours_per_week'
+        )
+    ]
+
+
+def shift_record(shift):
+    return ShiftRec(shift.id, shift.name, shift.start_minute, shift.duration_minutes, shift.is_overnight)
+
+
+def ward_record(ward):
+    return WardRec(ward.id, ward.name, ward.current_patients)
+
+
+def assignment_instances(records, status='PLANNED'):
+    """Unsaved ShiftAssignment instances for AssignmentRec records (foreign keys by id only)."""
+    return [
+        ShiftAssignment(employee_id=record.employee_id, shift_id=record.shift_id, ward_id=record.ward_id, date=record.date, status=status)
+        for record in records
+    ]
+
+
+def save_assignments(records, batch_size=None):
+    """
+    Writes planned AssignmentRec records with bulk_create and invalidates the touched calendar
+    months (bulk_create sends no signals). Call inside a transaction. Returns the saved instances.
+    """
+    instances = ShiftAssignment.objects.bulk_create(assignment_instances(records), batch_size=batch_size)
+    invalidate_calendar_for_assignments(records)
+    return instances
@@ -0,0 +1,239 @@
+# shift_planer/planning_core.py
+#
+# Planungskern ohne Django: arbeitet nur auf den Datensätzen unten, ganzzahligen IDs und dem
+# Snapshot (siehe snapshot.py). Laden aus dem ORM und Speichern übernimmt planning_adapter.py.
+
+import datetime
+import random
+import time
+from typing import NamedTuple
+from shift_planer.fairness import FairnessLedger, CandidateQueue
+
+
+class EmployeeRec(NamedTuple):
+    id: int
+    first_name: str
+    last_name: str
+    weekly_minutes: int     # Employee.available_hours_per_week in Minuten
+
+
+class ShiftRec(NamedTuple):
+    id: int
+    name: str
+    start_minute: int
+    duration_minutes: int
+    is_overnight: bool
+
+
+class WardRec(NamedTuple):
+    id: int
+    name: str
+    current_patients: int
+
+
+class SlotRec(NamedTuple):
+    """One (date, shift) of a ward with its targets; needs_critical already includes the patient check."""
+    date: datetime.date
+    shift_id: int
+    min_staff: int
+    target_counting_staff: int
+    needs_critical: bool
+
+
+class AssignmentRec(NamedTuple):
+    """A planned, not yet saved assignment."""
+    employee_id: int
+    shift_id: int
+    ward_id: int
+    date: datetime.date
+
+
+def iter_days(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def ward_slots(ward, snapshot, start_date, end_date, slots=None):
+    """SlotRec for every day and shift of the period in planning order; slots: optional set of (date, shift_id)."""
+    result = []
+    for day in iter_days(start_date, end_date):
+        for shift in snapshot.shifts:
+            if slots is not None and (day, shift.id) not in slots:
+                continue
+            requirement = snapshot.staffing.get(ward.id, shift.id)
+            result.append(SlotRec(
+                day, shift.id, requirement.min_staff, requirement.target_counting_staff,
+                requirement.requires_critical and ward.current_patients > 0
+            ))
+    return result
+
+
+class GreedyPlanner:
+    """
+    Greedy day-by-day planning of one ward on a planning snapshot.
+
+    The snapshot answers all rule checks; chosen assignments are recorded in it (so later
+    wards and days see them) and returned as AssignmentRec. Candidates are picked fairest
+    first (see fairness.py). log(message, level, code, employee_id, shift_id, date) and
+    progress(percent, message) are optional callbacks; funnel and seconds collect the
+    counters for SchedulerProfile.
+    """
+
+    def __init__(self, snapshot, min_rest_hours, max_consecutive_shifts, weekly_hours='hard', seed=None, log=None, progress=None):
+        self.snapshot = snapshot
+        self.min_rest_hours = float(min_rest_hours)
+        self.max_consecutive_shifts = int(max_consecutive_shifts)
+        self.weekly_hours = weekly_hours
+        self.seed = seed
+        self.log = log or (lambda *args, **kwargs: None)
+        self.progress = progress or (lambda percent, message: None)
+        self.funnel = dict.fromkeys(('candidates', 'blocked', 'overlap', 'rest', 'consecutive', 'hours', 'assigned'), 0)
+        self.seconds = {'eligibility': 0.0, 'assignment': 0.0}
+
+    def plan(self, ward, start_date, end_date, slots=None):
+        """
+        Plans the ward from start_date to end_date. Employees already assigned to a slot count
+        towards its targets. slots: optional set of (date, shift_id) to fill (incremental repair);
+        rest hours and consecutive days are then also checked against the assignments that follow.
+        """
+        snapshot = self.snapshot
+        log = self.log
+        check_following = slots is not None
+        planned = []
+        ledger = FairnessLedger(snapshot.employees_by_id, random.Random(self.seed))
+        eligibility = snapshot.eligibility
+        geometry = snapshot.geometry
+        hours = snapshot.hours
+        check_hours = self.weekly_hours != 'off'
+        hard_hours = self.weekly_hours == 'hard'
+        min_rest_hours = self.min_rest_hours
+        max_consecutive = self.max_consecutive_shifts
+        employees = snapshot.employees
+        # Trichterzähler lokal sammeln und am Ende einmal übertragen
+        blocked = overlap = rest = consecutive = over_limit = 0
+        eligibility_seconds = assignment_seconds = 0.0
+
+        total_days = (end_date - start_date).days + 1
+        current_date = None
+        for slot in ward_slots(ward, snapshot, start_date, end_date, slots):
+            date = slot.date
+            if date != current_date:
+                current_date = date
+                log(f"  Processing {date.strftime('%Y-%m-%d')}...", "DEBUG")
+                # Planung belegt 10-80 % des Fortschritts
+                self.progress(10 + 70 * (date - start_date).days // total_days, f"Planning {date.strftime('%Y-%m-%d')}")
+            shift = snapshot.shifts_by_id[slot.shift_id]
+            assigned = list(snapshot.slot_employee_ids(ward.id, date, shift.id))
+            critical_assigned = any(eligibility.has_critical_qualification(emp_id) for emp_id in assigned)
+
+            # Eignung als Bitmasken: erlaubte Schicht, zusätzlich kritische Qualifikation bzw. Personalschlüssel
+            shift_mask = eligibility.mask(shift.id)
+            critical_mask = eligibility.mask(shift.id, critical=True)
+            professional_mask = eligibility.mask(shift.id, counts_towards_ratio=True)
+            shift_start, shift_end = geometry.interval(date, shift.id)
+
+            phase_started = time.perf_counter()
+            eligible = []
+            # Nur bei 'soft': über der Wochenstundenzahl, kommen erst nach allen anderen an die Reihe
+            over_hours = set()
+            for emp in employees:
+                emp_id = emp.id
+                if not eligibility.satisfies(emp_id, shift_mask):
+                    blocked += 1
+                    continue
+                if snapshot.is_absent(emp_id, date):
+                    blocked += 1
+                    log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {date}: Is absent.", "WARNING", 'SKIP_ABSENT', emp_id, shift.id, date)
+                    continue
+                if snapshot.is_unavailable(emp_id, date):
+                    blocked += 1
+                    log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {date}: Not available.", "WARNING", 'SKIP_UNAVAILABLE', emp_id, shift.id, date)
+                    continue
+
+                if snapshot.overlapping_assignment(emp_id, date, shift) is not None:
+                    overlap += 1
+                    log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {date}: Overlaps with another shift today.", "WARNING", 'SKIP_OVERLAP', emp_id, shift.id, date)
+                    continue
+
+                prev_end = snapshot.previous_shift_end(emp_id, date, shift)
+                if prev_end is not None:
+                    rest_hours = (shift_start - prev_end) / 60
+                    if rest_hours < min_rest_hours:
+                        rest += 1
+                        log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {date}: Not enough rest ({rest_hours:.1f}h).", "WARNING", 'SKIP_REST', emp_id, shift.id, date)
+                        continue
+
+                if check_following:
+                    next_start = snapshot.next_shift_start(emp_id, date, shift)
+                    if next_start is not None:
+                        rest_hours = (next_start - shift_end) / 60
+                        if rest_hours < min_rest_hours:
+                            rest += 1
+                            log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {date}: Not enough rest before the next shift ({rest_hours:.1f}h).", "WARNING", 'SKIP_REST', emp_id, shift.id, date)
+                            continue
+
+                # Arbeitstage in Folge inklusive des aktuellen Tages
+                consecutive_days = snapshot.consecutive_days_before(emp_id, date, limit=max_consecutive) + 1
+                if check_following:
+                    consecutive_days += snapshot.consecutive_days_after(emp_id, date, limit=max_consecutive)
+                if consecutive_days > max_consecutive:
+                    consecutive += 1
+                    log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {date}: Max consecutive shifts reached ({max_consecutive}). Current: {consecutive_days}", "WARNING", 'SKIP_CONSECUTIVE', emp_id, shift.id, date)
+                    continue
+
+                if check_hours and not hours.fits(emp_id, date, shift.id):
+                    if hard_hours:
+                        over_limit += 1
+                        log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {date}: Weekly hours exceeded ({hours.worked(emp_id, date) / 60:.1f}h of {hours.capacity(emp_id) / 60:.1f}h).", "WARNING", 'SKIP_HOURS', emp_id, shift.id, date)
+                        continue
+                    over_hours.add(emp_id)
+
+                eligible.append(emp)
+
+            candidates = CandidateQueue(ledger, eligible, deferred=over_hours)
+            phase_finished = time.perf_counter()
+            eligibility_seconds += phase_finished - phase_started
+            phase_started = phase_finished
+
+            def assign(emp, role):
+                planned.append(AssignmentRec(emp.id, shift.id, ward.id, date))
+                assigned.append(emp.id)
+                snapshot.record_assignment(emp.id, date, shift.id, ward.id)
+                ledger.record(emp.id, shift_end - shift_start)
+                log(f"    Assigned {emp.first_name} {emp.last_name} ({role}) to {shift.name} on {date}.", "INFO", 'ASSIGNED', emp.id, shift.id, date)
+
+            if slot.needs_critical and not critical_assigned:
+                for emp in candidates.take(1, lambda emp: eligibility.satisfies(emp.id, critical_mask)):
+                    assign(emp, "Critical")
+                    critical_assigned = True
+                if not critical_assigned:
+                    log(f"    WARNING: Critical qual missing for {shift.name} on {date} for Ward {ward.name}.", "WARNING", 'CRITICAL_MISSING', shift_id=shift.id, date=date)
+
+            # Pflegefachkräfte (zählen zum Personalschlüssel)
+            counting_staff = sum(1 for emp_id in assigned if eligibility.counts_towards_staff_ratio(emp_id))
+            for emp in candidates.take(slot.target_counting_staff - counting_staff, lambda emp: eligibility.satisfies(emp.id, professional_mask)):
+                assign(emp, "Professional")
+                counting_staff += 1
+            if counting_staff < slot.target_counting_staff:
+                log(f"    FAILED: Only {counting_staff}/{slot.target_counting_staff} professional staff assigned for {shift.name} on {date}.", "ERROR", 'UNDERSTAFFED_PROFESSIONAL', shift_id=shift.id, date=date)
+
+            # Restliche Plätze bis zur Mindestbesetzung mit allen geeigneten Mitarbeitern (auch Hilfskräfte)
+            for emp in candidates.take(slot.min_staff - len(assigned)):
+                assign(emp, "Helper/Extra")
+            if len(assigned) < slot.min_staff:
+                log(f"    FAILED: Only {len(assigned)}/{slot.min_staff} total staff assigned for {shift.name} on {date}.", "ERROR", 'UNDERSTAFFED_TOTAL', shift_id=shift.id, date=date)
+            assignment_seconds += time.perf_counter() - phase_started
+
+            self.funnel['candidates'] += len(employees)
+
+        self.funnel['blocked'] += blocked
+        self.funnel['overlap'] += overlap
+        self.funnel['rest'] += rest
+        self.funnel['consecutive'] += consecutive
+        self.funnel['hours'] += over_limit
+        self.funnel['assigned'] += len(planned)
+        self.seconds['eligibility'] += eligibility_seconds
+        self.seconds['assignment'] += assignment_seconds
+        return planned
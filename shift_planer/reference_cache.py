@@ -0,0 +1,65 @@
+# shift_planer/reference_cache.py
+
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Die Versionen liegen im selben (prozessübergreifenden) Cache wie die Kalender, siehe calendar_cache.py
+REFERENCE_CACHE_ALIAS = getattr(settings, 'CALENDAR_CACHE_ALIAS', 'default')
+
+KEY_PREFIX = 'shift_planer:reference'
+
+
+class ReferenceCache:
+    """
+    Process-local cache of one piece of reference data (shift geometry, staffing requirements,
+    eligibility index) that stays valid across processes.
+
+    The value itself lives in this process; its version lives in the shared Django cache.
+    invalidate() bumps that version, so the job runner and every other web worker rebuild
+    their copy on the next get(), not only the process whose signal receiver fired.
+    """
+
+    def __init__(self, name, load):
+        self.version_key = f"{KEY_PREFIX}:{name}:version"
+        self.load = load
+        self.value = None
+        self.version = None
+
+    def _shared_version(self):
+        cache = caches[REFERENCE_CACHE_ALIAS]
+        version = cache.get(self.version_key)
+        if version is None:
+            # Fehlt die Version (verdrängt oder nie gesetzt), beginnt sie bei der aktuellen Zeit
+            cache.add(self.version_key, time.time_ns(), timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def get(self, is_complete=None):
+        """
+        The cached value, rebuilt with load() if the shared version changed or is_complete(value)
+        is false (e.g. an id the value does not know yet).
+        """
+        version = self._shared_version()
+        value = self.value
+        if value is None or version != self.version or (is_complete is not None and not is_complete(value)):
+            value = self.load()
+            self.value = value
+            self.version = version
+        return value
+
+    def _bump(self):
+        cache = caches[REFERENCE_CACHE_ALIAS]
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), timeout=None)
+
+    def invalidate(self):
+        self.value = None
+        self._bump()
+        # Innerhalb einer Transaktion zusätzlich nach dem Commit, damit kein anderer Prozess
+        # zwischenzeitlich den alten Stand unter der neuen Version behält
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(self._bump)
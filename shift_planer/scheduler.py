@@ -2,417 +2,562 @@
 
 import datetime
 import calendar
-import random
+import time
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Q
-from shift_planer.models import ShiftAssignment, Employee, Ward, Shift, EmployeeAvailability, Absence, Qualification, ProfessionalProfile
+from shift_planer.models import ShiftAssignment, Ward
+from shift_planer.snapshot import PlanningSnapshot
+from shift_planer.scheduler_log import SchedulerLog
+from shift_planer.instrumentation import SchedulerProfile, FUNNEL_STEPS
+from shift_planer.calendar_cache import batched_invalidation, invalidate_calendar_for_assignments
+from shift_planer.conflicts import ConflictDetector, assignment_interval, minutes_to_datetime
+from shift_planer.carry_in import get_carry_in
+from shift_planer.engines import check_engine, build_planning_model, solve_planning_model
+from shift_planer.local_search import LocalSearch
+from shift_planer.planning_core import AssignmentRec, GreedyPlanner
+from shift_planer.planning_adapter import save_assignments, ward_record
+from shift_planer.weekly_hours import WEEKLY_HOURS_MODES, DEFAULT_WEEKLY_HOURS_MODE
+
+# Maximale Anzahl von IDs pro UPDATE ... WHERE id IN (...) (SQLite-Parameterlimit)
+STATUS_UPDATE_BATCH_SIZE = 900
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def month_bounds(year, month):
+    """Returns the first and last day of a month."""
+    return datetime.date(year, month, 1), datetime.date(year, month, calendar.monthrange(year, month)[1])
+
+
+def iter_months(first, last):
+    """Yields (year, month) tuples from first to last (both inclusive (year, month) tuples)."""
+    year, month = first
+    while (year, month) <= tuple(last):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def repair_for_employee(employee_id, start_date, end_date):
+    """
+    Repairs the schedule after an absence or availability change (see ShiftScheduler.repair_schedule)
+    with the rules SCHEDULER_MIN_REST_HOURS / SCHEDULER_MAX_CONSECUTIVE_SHIFTS (default 11 / 6).
+    Past days are left as they are. Returns the result dict, or None if nothing lies in the future.
+    """
+    start_date = max(start_date, datetime.date.today())
+    if start_date > end_date:
+        return None
+    scheduler = ShiftScheduler(
+        getattr(settings, 'SCHEDULER_MIN_REST_HOURS', 11),
+        getattr(settings, 'SCHEDULER_MAX_CONSECUTIVE_SHIFTS', 6)
+    )
+    return scheduler.repair_schedule(employee_id, start_date, end_date)
+
 
 class ShiftScheduler:
-    def __init__(self, min_rest_hours, max_consecutive_shifts):
+    def __init__(self, min_rest_hours, max_consecutive_shifts, progress_callback=None, log_level=None,
+                 engine='greedy', time_limit=None, solver_threads=None, improve_seconds=0, seed=None,
+                 weekly_hours=None):
         self.MIN_REST_HOURS_BETWEEN_SHIFTS = float(min_rest_hours)
         self.MAX_CONSECUTIVE_SHIFTS = int(max_consecutive_shifts)
-        # Dictionary to store logs/messages from the scheduling process
-        self.log_messages = []
-
-    def _log(self, message, level="INFO"):
+        # Planungsverfahren: 'greedy' oder ein Optimierungsverfahren (siehe engines.py)
+        check_engine(engine)
+        self.engine = engine
+        self.time_limit = time_limit
+        self.solver_threads = solver_threads
+        # Zeitbudget (Sekunden) der lokalen Suche nach der Planung je Station, 0 = aus
+        self.improve_seconds = float(improve_seconds or 0)
+        # Wochenstunden (Employee.available_hours_per_week): 'hard', 'soft' oder 'off' (siehe weekly_hours.py)
+        weekly_hours = weekly_hours or DEFAULT_WEEKLY_HOURS_MODE
+        if weekly_hours not in WEEKLY_HOURS_MODES:
+            raise ValueError(f"Unknown weekly hours mode '{weekly_hours}', expected one of {', '.join(WEEKLY_HOURS_MODES)}.")
+        self.weekly_hours = weekly_hours
+        # Startwert der Zufallsentscheidungen (Gleichstand bei der Auswahl, lokale Suche); None = nicht reproduzierbar
+        self.seed = seed
+        # Strukturiertes, begrenztes Protokoll des Planungslaufs (siehe scheduler_log.py)
+        self.log = SchedulerLog(level=log_level)
+        # Laufzeit, Abfragen und Eignungstrichter des letzten Laufs (siehe instrumentation.py)
+        self.profile = SchedulerProfile()
+        # Optional: callback(percent, message), z.B. für Hintergrund-Jobs (siehe jobs.py)
+        self.progress_callback = progress_callback
+
+    def _log(self, message, level="INFO", code=None, employee_id=None, shift_id=None, date=None):
         """Internal logging helper."""
-        self.log_messages.append(f"[{level}] {message}")
+        self.log.add(level, message, code=code, employee_id=employee_id, shift_id=shift_id, date=date)
 
     def get_logs(self):
-        """Returns all collected log messages."""
-        return self.log_messages
+        """Returns the retained log messages as '[LEVEL] message' strings."""
+        return self.log.lines()
+
+    def get_log_summary(self):
+        """Returns aggregated counters, e.g. '412 rest-hour skips'."""
+        return self.log.summary()
+
+    def _report_progress(self, percent, message):
+        if self.progress_callback is not None:
+            self.progress_callback(int(percent), message)
 
     def generate_schedule(self, year, month, ward_slug, overwrite=False):
-        self.log_messages = [] # Reset logs for each run
+        self.log.clear() # Reset logs for each run
+        self.profile = SchedulerProfile()
         self._log(f"Starting schedule generation for {calendar.month_name[month]} {year} on Ward: {ward_slug}")
 
-        try:
-            ward = Ward.objects.get(slug=ward_slug)
-        except Ward.DoesNotExist:
-            self._log(f'Ward with slug "{ward_slug}" does not exist.', "ERROR")
-            return {"success": False, "message": f'Station "{ward_slug}" existiert nicht.'}
-
-        start_date = datetime.date(year, month, 1)
-        end_date = datetime.date(year, month, calendar.monthrange(year, month)[1])
-
-        # Check for existing assignments and handle overwrite
-        existing_assignments_in_period = ShiftAssignment.objects.filter(
-            ward=ward,
-            date__gte=start_date,
-            date__lte=end_date
-        )
+        with self.profile.phase('load'):
+            try:
+                ward = Ward.objects.get(slug=ward_slug)
+            except Ward.DoesNotExist:
+                self._log(f'Ward with slug "{ward_slug}" does not exist.', "ERROR")
+                return {"success": False, "message": f'Station "{ward_slug}" existiert nicht.'}
 
-        if existing_assignments_in_period.exists():
-            if overwrite:
-                self._log(f"Overwriting {existing_assignments_in_period.count()} existing assignments for {ward.name} in {calendar.month_name[month]} {year}.", "WARNING")
-                existing_assignments_in_period.delete()
-            else:
-                self._log(
-                    f"Existing assignments found for {ward.name} in {calendar.month_name[month]} {year}. "
-                    "Cannot generate schedule without --overwrite. Aborting.", "ERROR"
-                )
-                return {"success": False, "message": f"Bestehender Dienstplan für {calendar.month_name[month]} {year} auf {ward.name} gefunden. Bitte überschreiben Sie ihn oder wählen Sie einen anderen Monat/Station."}
-        
-        all_employees = Employee.objects.prefetch_related('qualifications', 'allowed_shifts', 'professional_profile').all()
-        all_shifts = Shift.objects.all().order_by('start_time')
-        
-        critical_qual_ids = set(Qualification.objects.filter(is_critical=True).values_list('id', flat=True))
-
-        generated_assignments_list = []
-        
-        employee_daily_assignments = {emp.id: {} for emp in all_employees}
-        employee_monthly_shift_count = {emp.id: 0 for emp in all_employees}
-        employee_consecutive_shifts = {emp.id: 0 for emp in all_employees}
-
-        for day_num in range(1, end_date.day + 1):
-            current_date = datetime.date(year, month, day_num)
-            self._log(f"  Processing {current_date.strftime('%Y-%m-%d')}...")
-
-            # Reset consecutive shifts if the previous day was not worked
-            if day_num > 1:
-                previous_date = current_date - datetime.timedelta(days=1)
-                for emp in all_employees:
-                    # Check if the employee was NOT assigned any shift on the previous day
-                    # by querying the DB for actual assignments
-                    was_assigned_prev_day = ShiftAssignment.objects.filter(
-                        employee=emp, 
-                        date=previous_date
-                    ).exists()
-                    if not was_assigned_prev_day:
-                        employee_consecutive_shifts[emp.id] = 0 # Reset consecutive count
-
-            absent_employees_ids = set(Absence.objects.filter(
-                employee__in=all_employees,
-                start_date__lte=current_date,
-                end_date__gte=current_date,
-                approved=True
-            ).values_list('employee__id', flat=True))
-
-            unavailable_employees_ids = set(EmployeeAvailability.objects.filter(
-                employee__in=all_employees,
-                date=current_date,
-                is_available=False
-            ).values_list('employee__id', flat=True))
-
-            blocked_employees_ids = absent_employees_ids.union(unavailable_employees_ids)
-
-            for shift in all_shifts:
-                assigned_to_this_shift_today = []
-                
-                min_staff_for_shift_type = 0
-                if shift.name == 'EARLY':
-                    min_staff_for_shift_type = ward.min_staff_early_shift
-                elif shift.name == 'LATE':
-                    min_staff_for_shift_type = ward.min_staff_late_shift
-                elif shift.name == 'NIGHT':
-                    min_staff_for_shift_type = ward.min_staff_night_shift
-                
-                required_professionals_for_patients = 0
-                if ward.current_patients > 0:
-                    required_professionals_for_patients = (ward.current_patients + 2) // 3
-
-                target_counting_staff = max(required_professionals_for_patients, min_staff_for_shift_type)
-                
-                current_counting_staff = 0
-                critical_qual_assigned_to_shift = False
-                
-                shift_requires_critical_qual = shift.required_qualifications.filter(is_critical=True).exists()
-
-                eligible_employees_for_shift = []
-                for emp in all_employees:
-                    if emp.id in blocked_employees_ids or shift not in emp.allowed_shifts.all():
-                        continue
+            start_date = datetime.date(year, month, 1)
+            end_date = datetime.date(year, month, calendar.monthrange(year, month)[1])
 
-                    is_overlapping_with_other_shift_today = False
-                    if current_date in employee_daily_assignments[emp.id]:
-                        for existing_assignment_obj in employee_daily_assignments[emp.id][current_date].values():
-                            current_shift_start_dt = datetime.datetime.combine(current_date, shift.start_time)
-                            current_shift_end_dt = datetime.datetime.combine(current_date, shift.end_time)
-                            if shift.end_time < shift.start_time:
-                                current_shift_end_dt += datetime.timedelta(days=1)
-
-                            existing_shift_start_dt = datetime.datetime.combine(existing_assignment_obj.date, existing_assignment_obj.shift.start_time)
-                            existing_shift_end_dt = datetime.datetime.combine(existing_assignment_obj.date, existing_assignment_obj.shift.end_time)
-                            if existing_assignment_obj.shift.end_time < existing_assignment_obj.shift.start_time:
-                                existing_shift_end_dt += datetime.timedelta(days=1)
-
-                            if (current_shift_start_dt < existing_shift_end_dt and 
-                                existing_shift_start_dt < current_shift_end_dt):
-                                is_overlapping_with_other_shift_today = True
-                                break
-                    if is_overlapping_with_other_shift_today:
-                        self._log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {current_date}: Overlaps with another shift today.", "WARNING")
-                        continue
+            # Check for existing assignments and handle overwrite
+            existing_assignments_in_period = ShiftAssignment.objects.filter(
+                ward=ward,
+                date__gte=start_date,
+                date__lte=end_date
+            )
 
-                    # Check minimum rest hours
-                    last_assignment_query = ShiftAssignment.objects.filter(employee=emp, date__lt=current_date).order_by('-date', '-shift__end_time').first()
-                    # Also check assignments already made *today* if they end before this shift starts (edge case for planning multiple shifts on one day)
-                    if current_date in employee_daily_assignments[emp.id]:
-                        for ass_on_day in employee_daily_assignments[emp.id][current_date].values():
-                            # If this existing assignment on the same day ends *before* the current shift starts
-                            if ass_on_day.shift.end_time < shift.start_time:
-                                if last_assignment_query is None or ass_on_day.shift.end_time > last_assignment_query.shift.end_time: # Only if it's the latest ending shift
-                                    last_assignment_query = ass_on_day
-
-                    if last_assignment_query:
-                        prev_end_dt = datetime.datetime.combine(last_assignment_query.date, last_assignment_query.shift.end_time)
-                        if last_assignment_query.shift.end_time < last_assignment_query.shift.start_time:
-                            prev_end_dt += datetime.timedelta(days=1)
-                        
-                        current_start_dt = datetime.datetime.combine(current_date, shift.start_time)
-                        
-                        rest_hours = (current_start_dt - prev_end_dt).total_seconds() / 3600
-                        
-                        if rest_hours < self.MIN_REST_HOURS_BETWEEN_SHIFTS:
-                            self._log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {current_date}: Not enough rest ({rest_hours:.1f}h).", "WARNING")
-                            continue
-                        
-                        # Update consecutive count based on actual last shift and rest
-                        if (current_date - last_assignment_query.date).days == 1 and rest_hours >= self.MIN_REST_HOURS_BETWEEN_SHIFTS:
-                            employee_consecutive_shifts[emp.id] += 1
-                        else:
-                            employee_consecutive_shifts[emp.id] = 1
-                    else:
-                        employee_consecutive_shifts[emp.id] = 1
-
-                    if employee_consecutive_shifts[emp.id] > self.MAX_CONSECUTIVE_SHIFTS:
-                        self._log(f"    Skipping {emp.first_name} {emp.last_name} for {shift.name} on {current_date}: Max consecutive shifts reached ({self.MAX_CONSECUTIVE_SHIFTS}). Current: {employee_consecutive_shifts[emp.id]}", "WARNING")
-                        continue
+            if existing_assignments_in_period.exists():
+                if overwrite:
+                    self._log(f"Overwriting {existing_assignments_in_period.count()} existing assignments for {ward.name} in {calendar.month_name[month]} {year}.", "WARNING")
+                    with batched_invalidation():
+                        existing_assignments_in_period.delete()
+                else:
+                    self._log(
+                        f"Existing assignments found for {ward.name} in {calendar.month_name[month]} {year}. "
+                        "Cannot generate schedule without --overwrite. Aborting.", "ERROR"
+                    )
+                    return {"success": False, "message": f"Bestehender Dienstplan für {calendar.month_name[month]} {year} auf {ward.name} gefunden. Bitte überschreiben Sie ihn oder wählen Sie einen anderen Monat/Station."}
 
-                    eligible_employees_for_shift.append(emp)
-
-                eligible_employees_for_shift.sort(key=lambda emp: employee_monthly_shift_count[emp.id])
-                random.shuffle(eligible_employees_for_shift)
-
-
-                # --- Assignment Strategy ---
-                if shift_requires_critical_qual and ward.current_patients > 0:
-                    for emp in eligible_employees_for_shift:
-                        emp_has_critical_qual = any(q_id in critical_qual_ids for q_id in emp.qualifications.values_list('id', flat=True))
-                        
-                        if emp_has_critical_qual:
-                            if emp not in assigned_to_this_shift_today and not critical_qual_assigned_to_shift:
-                                new_assignment = ShiftAssignment(employee=emp, shift=shift, ward=ward, date=current_date, status='PLANNED')
-                                generated_assignments_list.append(new_assignment)
-                                assigned_to_this_shift_today.append(emp)
-                                
-                                if current_date not in employee_daily_assignments[emp.id]:
-                                    employee_daily_assignments[emp.id][current_date] = {}
-                                employee_daily_assignments[emp.id][current_date][shift.id] = new_assignment
-
-                                employee_monthly_shift_count[emp.id] += 1
-                                critical_qual_assigned_to_shift = True
-                                self._log(f"    Assigned {emp.first_name} {emp.last_name} (Critical) to {shift.name} on {current_date}.", "INFO")
-                                break
-                    if not critical_qual_assigned_to_shift and ward.current_patients > 0:
-                        self._log(f"    WARNING: Critical qual missing for {shift.name} on {current_date} for Ward {ward.name}.", "WARNING")
-
-
-                # Assign professional staff (counting towards ratio)
-                remaining_eligible_professionals = [
-                    emp for emp in eligible_employees_for_shift
-                    if emp not in assigned_to_this_shift_today and \
-                       emp.professional_profile and emp.professional_profile.counts_towards_staff_ratio
-                ]
-                remaining_eligible_professionals.sort(key=lambda emp: employee_monthly_shift_count[emp.id])
-
-                current_counting_staff = len([
-                    emp for emp in assigned_to_this_shift_today
-                    if emp.professional_profile and emp.professional_profile.counts_towards_staff_ratio
-                ])
-
-                for emp in remaining_eligible_professionals:
-                    if current_counting_staff < target_counting_staff:
-                        new_assignment = ShiftAssignment(employee=emp, shift=shift, ward=ward, date=current_date, status='PLANNED')
-                        generated_assignments_list.append(new_assignment)
-                        assigned_to_this_shift_today.append(emp)
-                        
-                        if current_date not in employee_daily_assignments[emp.id]:
-                            employee_daily_assignments[emp.id][current_date] = {}
-                        employee_daily_assignments[emp.id][current_date][shift.id] = new_assignment
-
-                        employee_monthly_shift_count[emp.id] += 1
-                        current_counting_staff += 1
-                        self._log(f"    Assigned {emp.first_name} {emp.last_name} (Professional) to {shift.name} on {current_date}.", "INFO")
-                    else:
-                        break
-                
-                if current_counting_staff < target_counting_staff:
-                    self._log(f"    FAILED: Only {current_counting_staff}/{target_counting_staff} professional staff assigned for {shift.name} on {current_date}.", "ERROR")
-
-
-                # Fill remaining slots up to min_staff_for_shift_type with any eligible staff (including helpers)
-                total_assigned_to_shift = len(assigned_to_this_shift_today)
-                
-                remaining_eligible_any_staff = [
-                    emp for emp in eligible_employees_for_shift
-                    if emp not in assigned_to_this_shift_today
-                ]
-                remaining_eligible_any_staff.sort(key=lambda emp: employee_monthly_shift_count[emp.id])
-
-                for emp in remaining_eligible_any_staff:
-                    if total_assigned_to_shift < min_staff_for_shift_type:
-                        new_assignment = ShiftAssignment(employee=emp, shift=shift, ward=ward, date=current_date, status='PLANNED')
-                        generated_assignments_list.append(new_assignment)
-                        assigned_to_this_shift_today.append(emp)
-                        
-                        if current_date not in employee_daily_assignments[emp.id]:
-                            employee_daily_assignments[emp.id][current_date] = {}
-                        employee_daily_assignments[emp.id][current_date][shift.id] = new_assignment
-
-                        employee_monthly_shift_count[emp.id] += 1
-                        total_assigned_to_shift += 1
-                        self._log(f"    Assigned {emp.first_name} {emp.last_name} (Helper/Extra) to {shift.name} on {current_date}.", "INFO")
-                    else:
-                        break
-                
-                if len(assigned_to_this_shift_today) < min_staff_for_shift_type:
-                    self._log(f"    FAILED: Only {len(assigned_to_this_shift_today)}/{min_staff_for_shift_type} total staff assigned for {shift.name} on {current_date}.", "ERROR")
+            # Alle Planungsdaten mit einer festen Anzahl von Abfragen laden
+            self._report_progress(5, "Loading planning data")
+            snapshot = PlanningSnapshot.load(start_date, end_date)
 
+        generated_assignments_list = self._plan_ward(ward, snapshot, start_date, end_date)
+        self._report_progress(85, "Saving assignments")
 
         # Save all generated assignments in a single transaction
         try:
-            with transaction.atomic():
-                ShiftAssignment.objects.bulk_create(generated_assignments_list)
+            with self.profile.phase('save'), transaction.atomic():
+                save_assignments(generated_assignments_list)
             self._log(f"Successfully generated {len(generated_assignments_list)} shift assignments for {ward.name} in {calendar.month_name[month]} {year}.", "SUCCESS")
         except Exception as e:
             self._log(f"Error saving assignments: {e}", "ERROR")
-            return {"success": False, "message": f"Fehler beim Speichern der Zuweisungen: {e}"}
+            return {"success": False, "message": f"Fehler beim Speichern der Zuweisungen: {e}", "profile": self.profile.as_dict()}
 
         # Re-run a detailed conflict check (optional, but good for reporting)
         self._log("\nRunning post-generation conflict check...", "INFO")
-        newly_generated_and_existing_assignments = ShiftAssignment.objects.filter(
-            ward=ward,
-            date__gte=start_date,
-            date__lte=end_date
-        ).select_related('employee', 'shift').prefetch_related('employee__qualifications').order_by('date', 'shift__start_time')
+        self._report_progress(90, "Checking for conflicts")
+        with self.profile.phase('conflict_check'):
+            newly_generated_and_existing_assignments = ShiftAssignment.objects.filter(
+                ward=ward,
+                date__gte=start_date,
+                date__lte=end_date
+            ).select_related('employee', 'shift').order_by('date', 'shift__start_time')
 
-        conflicts_found = self._check_for_conflicts(ward, start_date, end_date, newly_generated_and_existing_assignments)
+            conflicts_found = self._check_for_conflicts(ward, start_date, end_date, newly_generated_and_existing_assignments)
 
         if conflicts_found:
             self._log("Schedule generated with conflicts. Please review in admin/UI.", "WARNING")
-            return {"success": True, "message": "Dienstplan erstellt, aber mit Konflikten. Bitte überprüfen Sie die Details in der Tagesansicht."}
+            return {"success": True, "message": "Dienstplan erstellt, aber mit Konflikten. Bitte überprüfen Sie die Details in der Tagesansicht.", "profile": self.profile.as_dict()}
         else:
             self._log("No major conflicts detected in the generated schedule.", "SUCCESS")
-            return {"success": True, "message": "Dienstplan erfolgreich generiert, keine Konflikte gefunden."}
+            return {"success": True, "message": "Dienstplan erfolgreich generiert, keine Konflikte gefunden.", "profile": self.profile.as_dict()}
+
+    def generate_batch(self, wards, months, overwrite=False, workers=1):
+        """
+        Plans several wards over several months in one run.
+
+        Reference data (employees, shifts, qualifications, absences, availabilities and all
+        existing assignments) is loaded once for the whole period. Months are planned in
+        order and wards one after another within each month; every tentative assignment is
+        recorded in the shared snapshot, so nobody is booked twice across wards.
+        Ward-months that already have assignments are skipped unless overwrite is set.
+        With workers > 1 the wards are planned in worker processes (see parallel.py).
+
+        months: list of (year, month) tuples in chronological order.
+        Returns {"success", "message", "wards": [per-ward summary dicts], "profile"}.
+        """
+        self.log.clear()
+        self.profile = SchedulerProfile()
+        wards = list(wards)
+        months = sorted(months)
+        if not wards or not months:
+            return {"success": False, "message": "Keine Stationen oder Monate ausgewählt.", "wards": []}
+
+        period_start = datetime.date(months[0][0], months[0][1], 1)
+        period_end = month_bounds(*months[-1])[1]
+        self._log(f"Starting batch schedule generation for {len(wards)} wards from {period_start} to {period_end}")
+
+        with self.profile.phase('load'):
+            existing_assignments = ShiftAssignment.objects.filter(
+                ward__in=wards,
+                date__gte=period_start,
+                date__lte=period_end
+            )
+            skipped = set()
+            if overwrite:
+                with batched_invalidation():
+                    deleted_count, _ = existing_assignments.delete()
+                if deleted_count:
+                    self._log(f"Overwriting {deleted_count} existing assignments.", "WARNING")
+            else:
+                for ward_id, date in existing_assignments.values_list('ward_id', 'date').distinct():
+                    skipped.add((ward_id, date.year, date.month))
+
+            snapshot = PlanningSnapshot.load(period_start, period_end)
+
+        summaries = {ward.id: {"ward": ward, "assignments": 0, "conflicts": 0, "seconds": 0.0, "skipped_months": []} for ward in wards}
+        for ward_id, year, month in sorted(skipped):
+            summaries[ward_id]["skipped_months"].append((year, month))
+            self._log(f"Existing assignments found for {summaries[ward_id]['ward'].name} in {calendar.month_name[month]} {year}. Skipping.", "WARNING")
+
+        generated_assignments_list = []
+        if workers > 1 and len(wards) > 1:
+            generated_assignments_list = self._plan_batch_in_parallel(wards, months, snapshot, skipped, summaries, workers)
+        else:
+            for year, month in months:
+                start_date, end_date = month_bounds(year, month)
+                for ward in wards:
+                    if (ward.id, year, month) in skipped:
+                        continue
+                    started = time.perf_counter()
+                    ward_assignments = self._plan_ward(ward, snapshot, start_date, end_date)
+                    summaries[ward.id]["seconds"] += time.perf_counter() - started
+                    summaries[ward.id]["assignments"] += len(ward_assignments)
+                    generated_assignments_list.extend(ward_assignments)
+
+        try:
+            with self.profile.phase('save'), transaction.atomic():
+                save_assignments(generated_assignments_list, batch_size=BULK_CREATE_BATCH_SIZE)
+            self._log(f"Successfully generated {len(generated_assignments_list)} shift assignments for {len(wards)} wards.", "SUCCESS")
+        except Exception as e:
+            self._log(f"Error saving assignments: {e}", "ERROR")
+            return {"success": False, "message": f"Fehler beim Speichern der Zuweisungen: {e}", "wards": list(summaries.values()), "profile": self.profile.as_dict()}
+
+        self._log("\nRunning post-generation conflict check...", "INFO")
+        with self.profile.phase('conflict_check'):
+            for ward in wards:
+                started = time.perf_counter()
+                summaries[ward.id]["conflicts"] = len(self._mark_conflicts(ward, period_start, period_end))
+                summaries[ward.id]["seconds"] += time.perf_counter() - started
+
+        total_conflicts = sum(summary["conflicts"] for summary in summaries.values())
+        if total_conflicts:
+            message = f"{len(generated_assignments_list)} Zuweisungen erstellt, aber mit {total_conflicts} Konflikten."
+        else:
+            message = f"{len(generated_assignments_list)} Zuweisungen erstellt, keine Konflikte gefunden."
+        return {"success": True, "message": message, "wards": list(summaries.values()), "profile": self.profile.as_dict()}
+
+    def _plan_batch_in_parallel(self, wards, months, snapshot, skipped, summaries, workers):
+        """Plans the batch in worker processes and records their AssignmentRec results in the snapshot."""
+        from shift_planer.parallel import plan_wards_in_parallel
+
+        # Übersprungene Stationsmonate werden gar nicht erst an die Worker gegeben
+        wards_to_plan = [ward for ward in wards if any((ward.id, year, month) not in skipped for year, month in months)]
+        month_ranges = [month_bounds(year, month) for year, month in months]
+        planned, seconds_by_ward, logs, profiles = plan_wards_in_parallel(self, wards_to_plan, month_ranges, snapshot, workers, skipped)
+        self.log.merge(logs)
+        # Planungszeiten der Worker werden addiert (CPU-Zeit, nicht Wanduhrzeit)
+        for profile in profiles:
+            self.profile.merge(profile)
+
+        generated_assignments_list = []
+        for record in planned:
+            generated_assignments_list.append(record)
+            snapshot.record_assignment(record.employee_id, record.date, record.shift_id, record.ward_id)
+            summaries[record.ward_id]["assignments"] += 1
+        for ward_id, seconds in seconds_by_ward.items():
+            summaries[ward_id]["seconds"] += seconds
+        return generated_assignments_list
+
+    def repair_schedule(self, employee_id, start_date, end_date):
+        """
+        Incremental repair after an absence or availability change of one employee.
+
+        Only the employee's assignments in the period that are no longer valid (absent,
+        unavailable or shift not allowed) are removed; CONFIRMED assignments are kept and
+        reported. The freed slots are refilled from eligible staff and conflicts are
+        re-checked only in the affected window of the touched wards.
+        Returns {"success", "message", "removed", "added", "kept_confirmed", "conflicts", "profile"}.
+        """
+        self.log.clear()
+        self.profile = SchedulerProfile()
+        self._log(f"Starting schedule repair for employee {employee_id} from {start_date} to {end_date}")
+
+        with self.profile.phase('load'):
+            affected = list(ShiftAssignment.objects.filter(
+                employee_id=employee_id,
+                date__gte=start_date,
+                date__lte=end_date
+            ).select_related('ward').order_by('date'))
+            if not affected:
+                return {"success": True, "message": "Keine Zuweisungen im Zeitraum.", "removed": 0, "added": 0,
+                        "kept_confirmed": 0, "conflicts": 0, "profile": self.profile.as_dict()}
+            # Zuweisungen nach dem Zeitraum für Ruhezeit- und Folgetags-Prüfungen mitladen
+            snapshot = PlanningSnapshot.load(start_date, end_date + datetime.timedelta(days=self.MAX_CONSECUTIVE_SHIFTS))
+
+        invalid = []
+        kept_confirmed = 0
+        for assignment in affected:
+            if not (snapshot.is_absent(employee_id, assignment.date) or snapshot.is_unavailable(employee_id, assignment.date)
+                    or not snapshot.is_allowed(employee_id, assignment.shift_id)):
+                continue
+            if assignment.status == 'CONFIRMED':
+                kept_confirmed += 1
+                self._log(f"  Keeping confirmed assignment on {assignment.date} ({assignment.ward.name}) although it is no longer valid.", "WARNING", 'REPAIR_KEPT_CONFIRMED', employee_id, assignment.shift_id, assignment.date)
+                continue
+            invalid.append(assignment)
+
+        result = {"success": True, "removed": len(invalid), "added": 0, "kept_confirmed": kept_confirmed, "conflicts": 0}
+        if not invalid:
+            result["message"] = "Keine ungültigen Zuweisungen gefunden." if not kept_confirmed else f"{kept_confirmed} bestätigte Zuweisungen bleiben bestehen und müssen manuell geprüft werden."
+            result["profile"] = self.profile.as_dict()
+            return result
+
+        wards = {}
+        slots_by_ward = {}
+        for assignment in invalid:
+            snapshot.remove_assignment(employee_id, assignment.date, assignment.shift_id, assignment.ward_id)
+            wards[assignment.ward_id] = assignment.ward
+            slots_by_ward.setdefault(assignment.ward_id, set()).add((assignment.date, assignment.shift_id))
+            self._log(f"  Removing assignment on {assignment.date} ({assignment.ward.name}).", "INFO", 'REPAIR_REMOVED', employee_id, assignment.shift_id, assignment.date)
+
+        generated_assignments_list = []
+        for ward_id, slots in slots_by_ward.items():
+            slot_dates = [date for date, _shift_id in slots]
+            generated_assignments_list.extend(self._plan_ward(wards[ward_id], snapshot, min(slot_dates), max(slot_dates), slots=slots))
+
+        try:
+            with self.profile.phase('save'), transaction.atomic(), batched_invalidation():
+                ShiftAssignment.objects.filter(pk__in=[assignment.pk for assignment in invalid]).delete()
+                save_assignments(generated_assignments_list)
+        except Exception as e:
+            self._log(f"Error saving repaired assignments: {e}", "ERROR")
+            return {"success": False, "message": f"Fehler beim Speichern der Reparatur: {e}", "profile": self.profile.as_dict()}
+        result["added"] = len(generated_assignments_list)
+
+        # Konflikte nur im betroffenen Fenster prüfen, inklusive der Nachbartage für Ruhezeiten und Folgetage
+        window = datetime.timedelta(days=self.MAX_CONSECUTIVE_SHIFTS)
+        with self.profile.phase('conflict_check'):
+            for ward_id, slots in slots_by_ward.items():
+                slot_dates = [date for date, _shift_id in slots]
+                result["conflicts"] += len(self._mark_conflicts(wards[ward_id], min(slot_dates) - window, max(slot_dates) + window))
+
+        result["message"] = f"{result['removed']} Zuweisungen entfernt, {result['added']} neu besetzt."
+        if kept_confirmed:
+            result["message"] += f" {kept_confirmed} bestätigte Zuweisungen bleiben bestehen."
+        if result["conflicts"]:
+            result["message"] += f" {result['conflicts']} Konflikte gefunden."
+        self._log(f"Repair finished: {result['message']}", "SUCCESS")
+        result["profile"] = self.profile.as_dict()
+        return result
+
+    def _plan_ward(self, ward, snapshot, start_date, end_date, slots=None):
+        """
+        Plans one ward with the configured engine, followed by the local search improvement
+        pass if improve_seconds is set (not for repairs). Returns AssignmentRec records (saved by save_assignments).
+        """
+        if self.engine != 'greedy':
+            return self._plan_ward_optimized(ward, snapshot, start_date, end_date, slots)
+        generated_assignments_list = self._plan_ward_greedy(ward, snapshot, start_date, end_date, slots)
+        if self.improve_seconds > 0 and slots is None:
+            generated_assignments_list = self._improve_ward(ward, snapshot, start_date, end_date, generated_assignments_list)
+        return generated_assignments_list
+
+    def _improve_ward(self, ward, snapshot, start_date, end_date, generated_assignments_list):
+        """Runs the local search on the assignments just planned for the ward (see local_search.py)."""
+        self._report_progress(80, f"Improving {ward.name}")
+        search = LocalSearch(
+            ward, snapshot, start_date, end_date, self.MIN_REST_HOURS_BETWEEN_SHIFTS, self.MAX_CONSECUTIVE_SHIFTS,
+            [(record.employee_id, record.date, record.shift_id) for record in generated_assignments_list],
+            seed=self._seed_for(ward, start_date), enforce_weekly_hours=self.weekly_hours == 'hard'
+        )
+        result = search.run(self.improve_seconds)
+        self.profile.add_time('improvement', result.seconds)
+        self._log(
+            f"Local search on {ward.name}: {result.iterations} moves in {result.seconds:.2f}s, {result.accepted} accepted; "
+            f"unfilled {result.unfilled_before} -> {result.unfilled_after}, shift count variance "
+            f"{result.variance_before:.2f} -> {result.variance_after:.2f}.", "INFO", 'IMPROVED'
+        )
+        return [AssignmentRec(emp_id, shift_id, ward.id, date) for emp_id, date, shift_id in search.assignments()]
+
+    def _seed_for(self, ward, start_date):
+        """Seed of one ward and period, independent of the order (or process) the wards are planned in."""
+        return None if self.seed is None else f"{self.seed}:{ward.id}:{start_date.isoformat()}"
+
+    def _plan_ward_greedy(self, ward, snapshot, start_date, end_date, slots=None):
+        """
+        Greedy day-by-day planning for one ward (see planning_core.GreedyPlanner). Works
+        entirely on the snapshot and does not query the database; returns AssignmentRec records.
+        """
+        planner = GreedyPlanner(
+            snapshot, self.MIN_REST_HOURS_BETWEEN_SHIFTS, self.MAX_CONSECUTIVE_SHIFTS, weekly_hours=self.weekly_hours,
+            seed=self._seed_for(ward, start_date), log=self._log, progress=self._report_progress
+        )
+        planned = planner.plan(ward_record(ward), start_date, end_date, slots)
+
+        profile = self.profile
+        for phase, seconds in planner.seconds.items():
+            profile.add_time(phase, seconds)
+        funnel = dict(planner.funnel)
+        funnel['eligible'] = funnel['candidates'] - funnel['blocked'] - funnel['overlap'] - funnel['rest'] - funnel['consecutive'] - funnel['hours']
+        for step in FUNNEL_STEPS:
+            profile.count(step, funnel[step])
+        return planned
+
+    def _plan_ward_optimized(self, ward, snapshot, start_date, end_date, slots=None):
+        """
+        Plans one ward with the optimization engine: builds the integer model from the
+        snapshot, solves it within the time limit and records the chosen assignments.
+        Falls back to the greedy planner if the solver finds no solution in time.
+        """
+        started = time.perf_counter()
+        self._report_progress(10, f"Building {self.engine} model for {ward.name}")
+        model = build_planning_model(
+            ward, snapshot, start_date, end_date, self.MIN_REST_HOURS_BETWEEN_SHIFTS, self.MAX_CONSECUTIVE_SHIFTS, slots,
+            weekly_hours=self.weekly_hours
+        )
+        model_built = time.perf_counter()
+        self.profile.add_time('eligibility', model_built - started)
+
+        self._report_progress(30, f"Solving {ward.name} ({len(model.candidates)} candidates)")
+        solution = solve_planning_model(model, self.engine, ward, start_date, end_date, self.time_limit, self.solver_threads)
+        self.profile.add_time('assignment', time.perf_counter() - model_built)
+        self.profile.add_solution(solution.report)
+        report = solution.report
+        self._log(
+            f"Engine {self.engine}: {report.status} after {report.seconds:.2f}s, objective {report.objective}, "
+            f"bound {report.best_bound}, gap {report.gap}, {report.variables} variables, {report.constraints} constraints.", "INFO"
+        )
+
+        if solution.chosen is None:
+            self._log(f"Engine {self.engine} found no solution for {ward.name} in time, falling back to the greedy planner.", "WARNING", 'ENGINE_FALLBACK')
+            return self._plan_ward_greedy(ward, snapshot, start_date, end_date, slots)
+
+        generated_assignments_list = []
+        for index in solution.chosen:
+            candidate = model.candidates[index]
+            emp = snapshot.employees_by_id[candidate.emp_id]
+            shift = snapshot.shifts_by_id[candidate.shift_id]
+            generated_assignments_list.append(AssignmentRec(emp.id, shift.id, ward.id, candidate.date))
+            snapshot.record_assignment(emp.id, candidate.date, shift.id, ward.id)
+            self._log(f"    Assigned {emp.first_name} {emp.last_name} to {shift.name} on {candidate.date}.", "INFO", 'ASSIGNED', emp.id, shift.id, candidate.date)
+
+        chosen = set(solution.chosen)
+        for slot in model.slots:
+            shift = snapshot.shifts_by_id[slot.shift_id]
+            assigned = snapshot.slot_employee_ids(ward.id, slot.date, slot.shift_id)
+            if slot.needs_critical and not any(index in chosen for index in slot.candidates if snapshot.has_critical_qualification(model.candidates[index].emp_id)):
+                self._log(f"    WARNING: Critical qual missing for {shift.name} on {slot.date} for Ward {ward.name}.", "WARNING", 'CRITICAL_MISSING', shift_id=shift.id, date=slot.date)
+            counting_staff = sum(1 for emp_id in assigned if snapshot.counts_towards_staff_ratio(emp_id))
+            if counting_staff < slot.target_counting_staff:
+                self._log(f"    FAILED: Only {counting_staff}/{slot.target_counting_staff} professional staff assigned for {shift.name} on {slot.date}.", "ERROR", 'UNDERSTAFFED_PROFESSIONAL', shift_id=shift.id, date=slot.date)
+            if len(assigned) < slot.min_staff:
+                self._log(f"    FAILED: Only {len(assigned)}/{slot.min_staff} total staff assigned for {shift.name} on {slot.date}.", "ERROR", 'UNDERSTAFFED_TOTAL', shift_id=shift.id, date=slot.date)
+
+        slot_count = len(model.slots)
+        self.profile.count('candidates', slot_count * len(snapshot.employees))
+        self.profile.count('blocked', slot_count * len(snapshot.employees) - len(model.candidates))
+        self.profile.count('eligible', len(model.candidates))
+        self.profile.count('assigned', len(generated_assignments_list))
+        return generated_assignments_list
 
     def _check_for_conflicts(self, ward, start_date, end_date, assignments_queryset=None):
         """
-        Helper method to check for conflicts (e.g., overlapping shifts for same employee).
-        This can be run after generation. It now updates the status of conflicting assignments.
+        Helper method to check for conflicts (overlapping shifts, rest hours, consecutive days).
+        This can be run after generation. It updates the status of conflicting assignments.
         """
-        conflicts_found = False
-        
+        return bool(self._mark_conflicts(ward, start_date, end_date, assignments_queryset))
+
+    def _mark_conflicts(self, ward, start_date, end_date, assignments_queryset=None):
+        """Runs the conflict check, writes the statuses and returns the list of Conflict records."""
         if assignments_queryset is None:
             assignments_queryset = ShiftAssignment.objects.filter(
                 ward=ward,
                 date__gte=start_date,
                 date__lte=end_date
-            ).select_related('employee', 'shift', 'employee__professional_profile').prefetch_related('employee__qualifications').order_by('date', 'shift__start_time')
+            ).select_related('employee', 'shift').order_by('date', 'shift__start_time')
 
-        assignments_to_update = {}
+        all_assignments = list(assignments_queryset)
+        detector = ConflictDetector(self.MIN_REST_HOURS_BETWEEN_SHIFTS, self.MAX_CONSECUTIVE_SHIFTS)
+        # Ruhezeit und Folgetage laufen über den Monatswechsel weiter
+        conflicts = detector.detect(all_assignments, get_carry_in(start_date))
 
-        assignments_by_employee_and_date = {}
-        for assignment in assignments_queryset:
-            assignments_by_employee_and_date.setdefault(assignment.employee.id, {}).setdefault(assignment.date, []).append(assignment)
-        
-        # 1. Check for Overlapping Shifts on the same day
-        for emp_id, assignments_by_date in assignments_by_employee_and_date.items():
-            employee_obj = Employee.objects.get(id=emp_id)
-            for date, daily_assignments in assignments_by_date.items():
-                daily_assignments.sort(key=lambda x: x.shift.start_time)
-                
-                for i in range(len(daily_assignments)):
-                    for j in range(i + 1, len(daily_assignments)):
-                        shift1_assignment = daily_assignments[i]
-                        shift2_assignment = daily_assignments[j]
-                        shift1 = shift1_assignment.shift
-                        shift2 = shift2_assignment.shift
-                        
-                        shift1_start_dt = datetime.datetime.combine(date, shift1.start_time)
-                        shift1_end_dt = datetime.datetime.combine(date, shift1.end_time)
-                        if shift1.end_time < shift1.start_time:
-                            shift1_end_dt += datetime.timedelta(days=1)
-
-                        shift2_start_dt = datetime.datetime.combine(date, shift2.start_time)
-                        shift2_end_dt = datetime.datetime.combine(date, shift2.end_time)
-                        if shift2.end_time < shift2.start_time:
-                            shift2_end_dt += datetime.timedelta(days=1)
-                        
-                        if (shift1_start_dt < shift2_end_dt and shift2_start_dt < shift1_end_dt):
-                            self._log(
-                                f"  CONFLICT (Overlap): {employee_obj.first_name} {employee_obj.last_name} assigned to overlapping shifts "
-                                f"'{shift1.get_name_display()}' ({shift1.start_time.strftime('%H:%M')}-{shift1.end_time.strftime('%H:%M')}) and "
-                                f"'{shift2.get_name_display()}' ({shift2.start_time.strftime('%H:%M')}-{shift2.end_time.strftime('%H:%M')}) on {date}.", "ERROR"
-                            )
-                            conflicts_found = True
-                            assignments_to_update[shift1_assignment.pk] = 'CONFLICT'
-                            assignments_to_update[shift2_assignment.pk] = 'CONFLICT'
-        
-        # 2. Check for Minimum Rest Hours and 3. Consecutive Shifts across days
-        for emp_id, assignments_by_date in assignments_by_employee_and_date.items():
-            employee_obj = Employee.objects.get(id=emp_id)
-            
-            employee_all_assignments_sorted = []
-            for date in sorted(assignments_by_date.keys()):
-                employee_all_assignments_sorted.extend(sorted(assignments_by_date[date], key=lambda x: x.shift.start_time))
-            
-            last_shift_end_datetime = None
-            consecutive_count = 0
-            
-            for i, assignment in enumerate(employee_all_assignments_sorted):
-                current_shift_start_datetime = datetime.datetime.combine(assignment.date, assignment.shift.start_time)
-                current_shift_end_datetime = datetime.datetime.combine(assignment.date, assignment.shift.end_time)
-
-                if assignment.shift.end_time < assignment.shift.start_time:
-                     current_shift_end_datetime += datetime.timedelta(days=1)
-
-                if last_shift_end_datetime:
-                    time_since_last_shift = (current_shift_start_datetime - last_shift_end_datetime).total_seconds() / 3600
-                    if time_since_last_shift < self.MIN_REST_HOURS_BETWEEN_SHIFTS:
-                        self._log(
-                            f"  CONFLICT (Rest): {employee_obj.first_name} {employee_obj.last_name} has insufficient rest "
-                            f"({time_since_last_shift:.1f}h) between shift ending at {last_shift_end_datetime.time().strftime('%H:%M')} on {last_shift_end_datetime.date().strftime('%Y-%m-%d')} and "
-                            f"shift '{assignment.shift.get_name_display()}' starting at {assignment.shift.start_time.strftime('%H:%M')} on {assignment.date.strftime('%Y-%m-%d')}.", "ERROR"
-                        )
-                        conflicts_found = True
-                        assignments_to_update[assignment.pk] = 'CONFLICT'
-                    
-                if i > 0:
-                    prev_assignment = employee_all_assignments_sorted[i-1]
-                    prev_end_dt = datetime.datetime.combine(prev_assignment.date, prev_assignment.shift.end_time)
-                    if prev_assignment.shift.end_time < prev_assignment.shift.start_time:
-                        prev_end_dt += datetime.timedelta(days=1)
-
-                    current_start_dt_for_consecutive_check = datetime.datetime.combine(assignment.date, assignment.shift.start_time)
-                    
-                    if (current_start_dt_for_consecutive_check - prev_end_dt).total_seconds() / 3600 >= self.MIN_REST_HOURS_BETWEEN_SHIFTS:
-                        consecutive_count += 1
-                    else:
-                        consecutive_count = 1
-                else:
-                    consecutive_count = 1
+        assignments_to_update = {}
+        for conflict in conflicts:
+            self._log_conflict(conflict)
+            assignments_to_update[conflict.assignment.pk] = 'CONFLICT'
+            if conflict.kind == 'OVERLAP' and conflict.other_assignment is not None:
+                assignments_to_update[conflict.other_assignment.pk] = 'CONFLICT'
+
+        self._apply_conflict_statuses(all_assignments, assignments_to_update)
+
+        return conflicts
+
+    def _log_conflict(self, conflict):
+        assignment = conflict.assignment
+        employee = assignment.employee
+        shift = assignment.shift
+        if conflict.kind == 'OVERLAP' and conflict.other_assignment is None:
+            # Der andere Dienst liegt vor dem geprüften Zeitraum und ist nur aus dem Carry-in bekannt
+            self._log(
+                f"  CONFLICT (Overlap): {employee.first_name} {employee.last_name} is still on a shift from before {assignment.date} when "
+                f"'{shift.get_name_display()}' ({shift.start_time.strftime('%H:%M')}-{shift.end_time.strftime('%H:%M')}) starts on {assignment.date}.", "ERROR",
+                'CONFLICT_OVERLAP', employee.id, shift.id, assignment.date
+            )
+        elif conflict.kind == 'OVERLAP':
+            other_shift = conflict.other_assignment.shift
+            self._log(
+                f"  CONFLICT (Overlap): {employee.first_name} {employee.last_name} assigned to overlapping shifts "
+                f"'{other_shift.get_name_display()}' ({other_shift.start_time.strftime('%H:%M')}-{other_shift.end_time.strftime('%H:%M')}) on {conflict.other_assignment.date} and "
+                f"'{shift.get_name_display()}' ({shift.start_time.strftime('%H:%M')}-{shift.end_time.strftime('%H:%M')}) on {assignment.date}.", "ERROR",
+                'CONFLICT_OVERLAP', employee.id, shift.id, assignment.date
+            )
+        elif conflict.kind == 'REST':
+            if conflict.other_assignment is not None:
+                _, previous_end = assignment_interval(conflict.other_assignment)
+            else:
+                previous_end = assignment_interval(assignment)[0] - conflict.rest_minutes
+            previous_end_dt = minutes_to_datetime(previous_end)
+            self._log(
+                f"  CONFLICT (Rest): {employee.first_name} {employee.last_name} has insufficient rest "
+                f"({conflict.rest_minutes / 60:.1f}h) between shift ending at {previous_end_dt.strftime('%H:%M')} on {previous_end_dt.strftime('%Y-%m-%d')} and "
+                f"shift '{shift.get_name_display()}' starting at {shift.start_time.strftime('%H:%M')} on {assignment.date.strftime('%Y-%m-%d')}.", "ERROR",
+                'CONFLICT_REST', employee.id, shift.id, assignment.date
+            )
+        else:
+            self._log(
+                f"  CONFLICT (Consecutive): {employee.first_name} {employee.last_name} works more than {self.MAX_CONSECUTIVE_SHIFTS} "
+                f"consecutive shifts, including shift '{shift.get_name_display()}' on {assignment.date}.", "ERROR",
+                'CONFLICT_CONSECUTIVE', employee.id, shift.id, assignment.date
+            )
 
-                if consecutive_count > self.MAX_CONSECUTIVE_SHIFTS:
-                    self._log(
-                        f"  CONFLICT (Consecutive): {employee_obj.first_name} {employee_obj.last_name} works more than {self.MAX_CONSECUTIVE_SHIFTS} "
-                        f"consecutive shifts, including shift '{assignment.shift.get_name_display()}' on {assignment.date}.", "ERROR"
-                    )
-                    conflicts_found = True
-                    assignments_to_update[assignment.pk] = 'CONFLICT'
-                
-                last_shift_end_datetime = current_shift_end_datetime
-        
-        if assignments_to_update:
-            self._log(f"  Updating status for {len(assignments_to_update)} conflicting assignments...", "WARNING")
-            with transaction.atomic():
-                for pk, status_val in assignments_to_update.items():
-                    try:
-                        assignment_to_update = ShiftAssignment.objects.get(pk=pk)
-                        assignment_to_update.status = status_val
-                        assignment_to_update.save(update_fields=['status'])
-                        self._log(f"    Updated assignment {pk} to status '{assignment_to_update.status}'", "INFO")
-                    except ShiftAssignment.DoesNotExist:
-                        self._log(f"    Failed to find assignment {pk} for update.", "ERROR")
-
-        return conflicts_found
+    def _apply_conflict_statuses(self, assignments, assignments_to_update):
+        """
+        Writes the conflict result back with grouped UPDATE statements: newly conflicting
+        assignments are flagged, stale CONFLICT flags on the checked assignments are cleared.
+        Assignments whose status already matches are left untouched.
+        """
+        pks_by_status = {}
+        changed_pks = set()
+        for assignment in assignments:
+            new_status = assignments_to_update.get(assignment.pk)
+            if new_status is None and assignment.status == 'CONFLICT':
+                new_status = 'PLANNED'
+            if new_status is not None and new_status != assignment.status:
+                pks_by_status.setdefault(new_status, []).append(assignment.pk)
+                changed_pks.add(assignment.pk)
+                assignment.status = new_status
+
+        if not pks_by_status:
+            return
+
+        with transaction.atomic():
+            # update() löst keine Signale aus
+            invalidate_calendar_for_assignments(assignment for assignment in assignments if assignment.pk in changed_pks)
+            for status_val, pks in pks_by_status.items():
+                updated = 0
+                for i in range(0, len(pks), STATUS_UPDATE_BATCH_SIZE):
+                    updated += ShiftAssignment.objects.filter(pk__in=pks[i:i + STATUS_UPDATE_BATCH_SIZE]).update(status=status_val)
+                self._log(f"  Updated {updated} assignments to status '{status_val}'.", "WARNING" if status_val == 'CONFLICT' else "INFO")
@@ -0,0 +1,130 @@
+# shift_planer/scheduler_log.py
+
+from collections import Counter, deque, namedtuple
+from django.conf import settings
+from django.db import transaction
+from shift_planer.models import ScheduleRunLog, ScheduleRunLogEntry
+
+# Reihenfolge der Log-Level, niedrigster zuerst
+LEVELS = ('DEBUG', 'INFO', 'SUCCESS', 'WARNING', 'ERROR')
+LEVEL_RANK = {level: rank for rank, level in enumerate(LEVELS)}
+
+DEFAULT_LOG_LEVEL = 'INFO'
+DEFAULT_BUFFER_SIZE = 20000
+
+# Lesbare Bezeichnungen für die aggregierten Zähler (Anzeige in der UI)
+CODE_LABELS = {
+    'SKIP_ABSENT': "absence skips",
+    'SKIP_UNAVAILABLE': "availability skips",
+    'SKIP_OVERLAP': "overlap skips",
+    'SKIP_REST': "rest-hour skips",
+    'SKIP_CONSECUTIVE': "consecutive-day skips",
+    'SKIP_HOURS': "weekly-hours skips",
+    'ASSIGNED': "assignments",
+    'CRITICAL_MISSING': "shifts without critical qualification",
+    'UNDERSTAFFED_PROFESSIONAL': "shifts short of professional staff",
+    'UNDERSTAFFED_TOTAL': "shifts short of staff",
+    'CONFLICT_OVERLAP': "overlap conflicts",
+    'CONFLICT_REST': "rest-hour conflicts",
+    'CONFLICT_CONSECUTIVE': "consecutive-day conflicts",
+    'REPAIR_REMOVED': "assignments removed by repair",
+    'REPAIR_KEPT_CONFIRMED': "invalid confirmed assignments kept",
+    'ENGINE_FALLBACK': "optimizer runs without solution (greedy fallback)",
+    'IMPROVED': "local search passes",
+}
+
+LogRecord = namedtuple('LogRecord', ['level', 'code', 'message', 'employee_id', 'shift_id', 'date'])
+
+
+def format_record(record):
+    """Formats a record the way the scheduler always logged: '[LEVEL] message'."""
+    return f"[{record.level}] {record.message}"
+
+
+class SchedulerLog:
+    """
+    Bounded, structured log of a scheduler run.
+
+    Records below the level threshold are only counted; the others are kept in a ring
+    buffer of max_records entries (the oldest are dropped first). Counters per code and
+    level always cover every record, so summaries stay exact even for huge runs.
+    """
+
+    def __init__(self, level=None, max_records=None):
+        level = level or getattr(settings, 'SCHEDULER_LOG_LEVEL', DEFAULT_LOG_LEVEL)
+        if level not in LEVEL_RANK:
+            raise ValueError(f"Unknown log level '{level}', expected one of {', '.join(LEVELS)}.")
+        self.level = level
+        self.max_records = max_records or getattr(settings, 'SCHEDULER_LOG_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+        self.clear()
+
+    def clear(self):
+        self.records = deque(maxlen=self.max_records)
+        self.code_counts = Counter()
+        self.level_counts = Counter()
+        self.dropped = 0
+
+    def add(self, level, message, code=None, employee_id=None, shift_id=None, date=None):
+        self.level_counts[level] += 1
+        if code:
+            self.code_counts[code] += 1
+        if LEVEL_RANK[level] < LEVEL_RANK[self.level]:
+            return
+        if len(self.records) == self.max_records:
+            self.dropped += 1
+        self.records.append(LogRecord(level, code, message, employee_id, shift_id, date))
+
+    def merge(self, other):
+        """Appends the records and counters of another log (e.g. from a worker process)."""
+        for record in other.records:
+            if len(self.records) == self.max_records:
+                self.dropped += 1
+            self.records.append(record)
+        self.code_counts.update(other.code_counts)
+        self.level_counts.update(other.level_counts)
+        self.dropped += other.dropped
+
+    def lines(self):
+        return [format_record(record) for record in self.records]
+
+    def summary(self):
+        """Returns aggregated counters as text lines, e.g. '412 rest-hour skips'."""
+        return [
+            f"{count} {CODE_LABELS.get(code, code)}"
+            for code, count in sorted(self.code_counts.items(), key=lambda item: (-item[1], item[0]))
+        ]
+
+
+def save_run_log(log, description='', ward=None, job=None, profile=None):
+    """
+    Stores the retained records and all counters of a SchedulerLog as a ScheduleRunLog,
+    together with the run's profile (see instrumentation.py) if given.
+    """
+    with transaction.atomic():
+        run_log = ScheduleRunLog.objects.create(
+            job=job,
+            ward=ward,
+            description=description[:255],
+            level=log.level,
+            code_counts=dict(log.code_counts),
+            level_counts=dict(log.level_counts),
+            dropped_entries=log.dropped,
+            profile=profile or {}
+        )
+        ScheduleRunLogEntry.objects.bulk_create(
+            [
+                ScheduleRunLogEntry(
+                    run_log=run_log,
+                    sequence=sequence,
+                    level=record.level,
+                    code=record.code or '',
+                    message=record.message.strip(),
+                    employee_id=record.employee_id,
+                    shift_id=record.shift_id,
+                    date=record.date
+                )
+                for sequence, record in enumerate(log.records)
+            ],
+            batch_size=500
+        )
+    return run_log
@@ -0,0 +1,73 @@
+# shift_planer/serializers.py
+
+from rest_framework import serializers
+from shift_planer.models import Ward, Shift, ShiftAssignment
+
+# Felder, die der Lese-Endpunkt per values() lädt (ein JOIN auf Station, Schicht und Mitarbeiter)
+ASSIGNMENT_VALUE_FIELDS = (
+    'id', 'date', 'status', 'ward_id', 'ward__slug', 'shift_id', 'shift__name',
+    'employee_id', 'employee__first_name', 'employee__last_name',
+)
+
+SLOT_ACTIONS = ('replace', 'create', 'delete')
+
+
+class WardSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Ward
+        fields = ['id', 'name', 'slug', 'current_patients', 'min_staff_early_shift', 'min_staff_late_shift', 'min_staff_night_shift']
+
+
+class ShiftSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Shift
+        fields = ['id', 'name', 'start_time', 'end_time']
+
+
+class AssignmentRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only representation of a ShiftAssignment row loaded with values(*ASSIGNMENT_VALUE_FIELDS).
+    Skips the per-field machinery of ModelSerializer, which dominates for month-sized pages.
+    """
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'date': row['date'].isoformat(),
+            'status': row['status'],
+            'ward': row['ward_id'],
+            'ward_slug': row['ward__slug'],
+            'shift': row['shift_id'],
+            'shift_name': row['shift__name'],
+            'employee': row['employee_id'],
+            'employee_name': f"{row['employee__first_name']} {row['employee__last_name']}",
+        }
+
+
+class SlotWriteSerializer(serializers.Serializer):
+    """
+    One shift slot (ward, date, shift) of a bulk write.
+
+    replace: the slot afterwards holds exactly the given employees,
+    create: the given employees are added to the slot,
+    delete: all assignments of the slot are removed (employees is ignored).
+    Ids are resolved in bulk by the view, not per slot.
+    """
+    ward = serializers.IntegerField()
+    date = serializers.DateField()
+    shift = serializers.IntegerField()
+    employees = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    status = serializers.ChoiceField(choices=ShiftAssignment.STATUS_CHOICES, default='PLANNED')
+    action = serializers.ChoiceField(choices=SLOT_ACTIONS, default='replace')
+
+
+class BulkSlotWriteSerializer(serializers.Serializer):
+    slots = SlotWriteSerializer(many=True, allow_empty=False)
+    # Warnungen (kritische Qualifikation, Personalschlüssel) blockieren wie im Formular, außer sie werden bestätigt
+    allow_warnings = serializers.BooleanField(default=False)
+
+    def validate_slots(self, slots):
+        keys = [(slot['ward'], slot['date'], slot['shift']) for slot in slots]
+        if len(set(keys)) != len(keys):
+            raise serializers.ValidationError("Jeder Slot (Station, Datum, Schicht) darf nur einmal vorkommen.")
+        return slots
@@ -0,0 +1,81 @@
+# shift_planer/shift_geometry.py
+
+from shift_planer.models import Shift
+from shift_planer.reference_cache import ReferenceCache
+
+MINUTES_PER_DAY = 24 * 60
+
+# Betrachtete Tagesabstände zwischen zwei Schichten (Vortag, gleicher Tag, Folgetag).
+# Da keine Schicht länger als 24h dauert, können sich weiter entfernte Schichten nicht überlappen.
+DAY_OFFSETS = (-1, 0, 1)
+
+
+class ShiftGeometry:
+    """
+    Precomputed interval data for a set of shifts.
+
+    Holds start offset, duration and overnight flag per shift plus a pairwise table
+    with the gap in minutes between the end of shift a on day d and the start of shift b
+    on day d + offset (negative if they overlap). All checks are integer lookups.
+    """
+
+    def __init__(self, shifts):
+        self.start_minute = {}
+        self.duration_minutes = {}
+        self.is_overnight = {}
+        for shift in shifts:
+            self.start_minute[shift.id] = shift.start_minute
+            self.duration_minutes[shift.id] = shift.duration_minutes
+            self.is_overnight[shift.id] = shift.is_overnight
+
+        # (a_id, b_id) -> (gap, overlaps) je Eintrag in DAY_OFFSETS
+        self.gap = {}
+        self.overlap = {}
+        for a_id, a_start in self.start_minute.items():
+            a_end = a_start + self.duration_minutes[a_id]
+            for b_id, b_start in self.start_minute.items():
+                gaps = []
+                overlaps = []
+                for offset in DAY_OFFSETS:
+                    b_start_abs = offset * MINUTES_PER_DAY + b_start
+                    b_end_abs = b_start_abs + self.duration_minutes[b_id]
+                    gaps.append(b_start_abs - a_end)
+                    overlaps.append(b_start_abs < a_end and a_start < b_end_abs)
+                self.gap[(a_id, b_id)] = tuple(gaps)
+                self.overlap[(a_id, b_id)] = tuple(overlaps)
+
+    def __contains__(self, shift_id):
+        return shift_id in self.start_minute
+
+    def interval(self, date, shift_id):
+        """Returns (start, end) of the shift on that date as absolute minutes since 0001-01-01."""
+        start = date.toordinal() * MINUTES_PER_DAY + self.start_minute[shift_id]
+        return start, start + self.duration_minutes[shift_id]
+
+    def overlaps(self, a_id, b_id, day_offset=0):
+        """True if shift a on day d overlaps shift b on day d + day_offset."""
+        if day_offset not in DAY_OFFSETS:
+            return False
+        return self.overlap[(a_id, b_id)][day_offset + 1]
+
+    def rest_gap(self, a_id, b_id, day_offset=0):
+        """Minutes between the end of shift a on day d and the start of shift b on day d + day_offset."""
+        if day_offset in DAY_OFFSETS:
+            return self.gap[(a_id, b_id)][day_offset + 1]
+        return day_offset * MINUTES_PER_DAY + self.start_minute[b_id] - self.start_minute[a_id] - self.duration_minutes[a_id]
+
+
+_geometry_cache = ReferenceCache('shift_geometry', lambda: ShiftGeometry(Shift.objects.all()))
+
+
+def get_shift_geometry(shift_ids=()):
+    """
+    Returns the process-wide ShiftGeometry for all shifts. It is rebuilt after a Shift
+    was saved or deleted in any process (see signals.py and reference_cache.py) or if one
+    of the given shift ids is unknown.
+    """
+    return _geometry_cache.get(lambda geometry: all(shift_id in geometry for shift_id in shift_ids))
+
+
+def invalidate_shift_geometry():
+    _geometry_cache.invalidate()
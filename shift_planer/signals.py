@@ -0,0 +1,75 @@
+# shift_planer/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from shift_planer.models import Shift, Ward, Qualification, Employee, ShiftAssignment, ProfessionalProfile
+from shift_planer.shift_geometry import invalidate_shift_geometry
+from shift_planer.staffing import invalidate_staffing_requirements
+from shift_planer.eligibility import invalidate_eligibility_index
+from shift_planer.calendar_cache import (
+    invalidate_calendar_month, invalidate_calendar_ward, invalidate_all_calendars, invalidate_calendar_for_assignments
+)
+
+
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+def shift_changed(sender, **kwargs):
+    """Drops the cached shift geometry, staffing requirements and calendars whenever a Shift changes."""
+    invalidate_shift_geometry()
+    invalidate_staffing_requirements()
+    invalidate_all_calendars()
+
+
+@receiver(post_save, sender=Ward)
+@receiver(post_delete, sender=Ward)
+@receiver(post_save, sender=Qualification)
+@receiver(post_delete, sender=Qualification)
+@receiver(m2m_changed, sender=Shift.required_qualifications.through)
+def staffing_inputs_changed(sender, **kwargs):
+    """Drops the cached staffing requirements when patient numbers, minimum staff or critical qualifications change."""
+    invalidate_staffing_requirements()
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=ProfessionalProfile)
+@receiver(post_delete, sender=ProfessionalProfile)
+@receiver(post_save, sender=Qualification)
+@receiver(post_delete, sender=Qualification)
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+@receiver(m2m_changed, sender=Employee.allowed_shifts.through)
+@receiver(m2m_changed, sender=Employee.qualifications.through)
+def eligibility_inputs_changed(sender, **kwargs):
+    """Drops the cached eligibility index when allowed shifts, qualifications or profile flags change."""
+    invalidate_eligibility_index()
+
+
+@receiver(post_save, sender=Ward)
+@receiver(post_delete, sender=Ward)
+def ward_changed(sender, instance, **kwargs):
+    invalidate_calendar_ward(instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def employee_changed(sender, **kwargs):
+    """Names are shown in every calendar the employee appears in."""
+    invalidate_all_calendars()
+
+
+@receiver(pre_save, sender=ShiftAssignment)
+def assignment_moving(sender, instance, **kwargs):
+    """Remembers ward and date before an update, so the calendar it leaves is invalidated too."""
+    if not instance._state.adding and instance.pk is not None:
+        instance._calendar_previous = ShiftAssignment.objects.filter(pk=instance.pk).values_list('ward_id', 'date').first()
+
+
+@receiver(post_save, sender=ShiftAssignment)
+@receiver(post_delete, sender=ShiftAssignment)
+def assignment_changed(sender, instance, **kwargs):
+    invalidate_calendar_for_assignments([instance])
+    previous = getattr(instance, '_calendar_previous', None)
+    if previous:
+        invalidate_calendar_month(previous[0], previous[1].year, previous[1].month)
+        instance._calendar_previous = None
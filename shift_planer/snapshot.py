@@ -0,0 +1,256 @@
+# shift_planer/snapshot.py
+
+import datetime
+from shift_planer.models import ShiftAssignment, Shift, Ward
+from shift_planer.shift_geometry import ShiftGeometry
+from shift_planer.staffing import StaffingRequirements
+from shift_planer.carry_in import DEFAULT_LOOKBACK_DAYS, get_carry_in
+from shift_planer.eligibility import EligibilityIndex, get_eligibility_index
+from shift_planer.availability import AvailabilityMatrix
+from shift_planer.weekly_hours import WeeklyHoursLedger
+from shift_planer.planning_adapter import load_employee_records, shift_record
+
+
+class PlanningSnapshot:
+    """
+    In-memory planning data for one period.
+
+    Everything the scheduler needs is loaded with a fixed number of bulk queries
+    in load(); afterwards eligibility, rest-hour and consecutive-day checks are
+    answered from the indexes below without touching the database. Shifts before
+    the period are only known through the cached carry-in state (see carry_in.py).
+    Employees and shifts are held as EmployeeRec / ShiftRec records (see planning_core.py).
+    """
+
+    def __init__(self, start_date, end_date, lookback_days=DEFAULT_LOOKBACK_DAYS):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.lookback_days = lookback_days
+
+        self.employees = []
+        self.employees_by_id = {}
+        self.shifts = []
+        self.shifts_by_id = {}
+        self.geometry = ShiftGeometry([])
+        self.critical_shift_ids = set()
+        self.staffing = StaffingRequirements([], [], set())
+        # Erlaubte Schichten, kritische Qualifikation und Personalschlüssel als Bitmasken (siehe eligibility.py)
+        self.eligibility = EligibilityIndex([], [], [], [], [])
+
+        # Abwesenheiten, Nichtverfügbarkeiten und Wunschdienste je Mitarbeiter und Tag
+        self.availability = AvailabilityMatrix(start_date, end_date, [])
+        # emp_id -> {date: [(shift_id, ward_id), ...]}, bestehende und vorläufige Zuweisungen
+        self.assignments_by_employee = {}
+        # (ward_id, date, shift_id) -> [emp_id], dieselben Zuweisungen nach Slot
+        self.assignments_by_slot = {}
+        # emp_id -> CarryInState, Stand am Tag vor start_date
+        self.carry_in = {}
+        # Arbeitsminuten je Mitarbeiter und ISO-Woche, auch für die Tage der angeschnittenen Wochen außerhalb des Zeitraums
+        self.hours = WeeklyHoursLedger({})
+
+    @classmethod
+    def load(cls, start_date, end_date, lookback_days=DEFAULT_LOOKBACK_DAYS):
+        """Builds a snapshot with a constant number of queries, independent of the staff size."""
+        snapshot = cls(start_date, end_date, lookback_days)
+
+        shifts = Shift.objects.prefetch_related('required_qualifications').order_by('start_time')
+
+        for shift in shifts:
+            record = shift_record(shift)
+            snapshot.shifts.append(record)
+            snapshot.shifts_by_id[record.id] = record
+            if any(q.is_critical for q in shift.required_qualifications.all()):
+                snapshot.critical_shift_ids.add(record.id)
+        snapshot.geometry = ShiftGeometry(snapshot.shifts)
+        snapshot.staffing = StaffingRequirements(list(Ward.objects.all()), snapshot.shifts, snapshot.critical_shift_ids)
+
+        for emp in load_employee_records():
+            snapshot._add_employee(emp)
+        snapshot.eligibility = get_eligibility_index(snapshot.employees_by_id)
+
+        snapshot.availability = AvailabilityMatrix.load(start_date, end_date, snapshot.employees_by_id)
+
+        # Zuweisungen im Zeitraum trägt record_assignment ein, hier nur die Randtage der ersten und letzten Woche
+        snapshot.hours = WeeklyHoursLedger.load(
+            start_date, end_date, exclude=(start_date, end_date), durations=snapshot.geometry.duration_minutes,
+            capacities={emp.id: emp.weekly_minutes for emp in snapshot.employees}
+        )
+
+        # Zuweisungen aller Stationen, damit niemand stationsübergreifend doppelt verplant wird
+        existing_assignments = ShiftAssignment.objects.filter(
+            date__gte=start_date,
+            date__lte=end_date
+        ).values_list('employee_id', 'date', 'shift_id', 'ward_id')
+        for emp_id, date, shift_id, ward_id in existing_assignments:
+            snapshot.record_assignment(emp_id, date, shift_id, ward_id)
+        snapshot.carry_in = get_carry_in(start_date, lookback_days)
+
+        return snapshot
+
+    def subset(self, employee_ids):
+        """
+        Returns a new snapshot restricted to the given employees. Reference data is shared,
+        the per-employee indexes are copied so the subset can be planned (and pickled) on its own.
+        """
+        employee_ids = set(employee_ids)
+        subset = PlanningSnapshot(self.start_date, self.end_date, self.lookback_days)
+        subset.shifts = self.shifts
+        subset.shifts_by_id = self.shifts_by_id
+        subset.geometry = self.geometry
+        subset.critical_shift_ids = self.critical_shift_ids
+        subset.staffing = self.staffing
+        subset.eligibility = self.eligibility
+
+        for emp in self.employees:
+            if emp.id in employee_ids:
+                subset.employees.append(emp)
+                subset.employees_by_id[emp.id] = emp
+                if emp.id in self.carry_in:
+                    subset.carry_in[emp.id] = self.carry_in[emp.id]
+                subset.assignments_by_employee[emp.id] = {
+                    date: list(entries) for date, entries in self.assignments_by_employee.get(emp.id, {}).items()
+                }
+                for date, entries in subset.assignments_by_employee[emp.id].items():
+                    for shift_id, ward_id in entries:
+                        subset.assignments_by_slot.setdefault((ward_id, date, shift_id), []).append(emp.id)
+        subset.availability = self.availability.subset(employee_ids)
+        subset.hours = self.hours.subset(employee_ids)
+        return subset
+
+    def _add_employee(self, emp):
+        self.employees.append(emp)
+        self.employees_by_id[emp.id] = emp
+        self.assignments_by_employee.setdefault(emp.id, {})
+
+    # --- Abfragen ---
+
+    def is_absent(self, emp_id, date):
+        return self.availability.is_absent(emp_id, date)
+
+    def is_unavailable(self, emp_id, date):
+        return self.availability.is_unavailable(emp_id, date)
+
+    def preferred_shift(self, emp_id, date):
+        return self.availability.preferred_shift(emp_id, date)
+
+    def is_allowed(self, emp_id, shift_id):
+        return self.eligibility.is_allowed(emp_id, shift_id)
+
+    def has_allowed_shifts(self, emp_id):
+        return self.eligibility.has_allowed_shifts(emp_id)
+
+    def has_critical_qualification(self, emp_id):
+        return self.eligibility.has_critical_qualification(emp_id)
+
+    def counts_towards_staff_ratio(self, emp_id):
+        return self.eligibility.counts_towards_staff_ratio(emp_id)
+
+    def assignments_on(self, emp_id, date):
+        """Returns [(shift_id, ward_id), ...] for the employee on that date."""
+        return self.assignments_by_employee.get(emp_id, {}).get(date, [])
+
+    def worked_on(self, emp_id, date):
+        return bool(self.assignments_on(emp_id, date))
+
+    def overlapping_assignment(self, emp_id, date, shift):
+        """Returns the shift the employee already works that overlaps the given one, else None."""
+        # Nachtdienste vom Vortag reichen in den aktuellen Tag hinein
+        for day_offset in (-1, 0, 1):
+            day = date + datetime.timedelta(days=day_offset)
+            if day < self.start_date:
+                # Vor dem Zeitraum ist nur der Dienst mit dem spätesten Ende bekannt; reicht er
+                # nicht hinein, tut es auch kein früher endender
+                state = self.carry_in.get(emp_id)
+                if state and state.last_shift_date == day and self.geometry.overlaps(shift.id, state.last_shift_id, day_offset):
+                    return self.shifts_by_id[state.last_shift_id]
+                continue
+            for other_shift_id, _ward_id in self.assignments_on(emp_id, day):
+                if self.geometry.overlaps(shift.id, other_shift_id, day_offset):
+                    return self.shifts_by_id[other_shift_id]
+        return None
+
+    def previous_shift_end(self, emp_id, date, shift):
+        """
+        Returns the latest end (absolute minutes, see ShiftGeometry.interval) of the
+        employee's shifts that start before the given shift, including the carry-in
+        state before the period. None if there is none.
+        """
+        start, _ = self.geometry.interval(date, shift.id)
+        latest_end = None
+        day = date
+        while day >= self.start_date:
+            for other_shift_id, _ward_id in self.assignments_on(emp_id, day):
+                other_start, other_end = self.geometry.interval(day, other_shift_id)
+                if other_start < start and (latest_end is None or other_end > latest_end):
+                    latest_end = other_end
+            # Ein Dienst vom Vortag kann noch später enden als einer von vorgestern
+            if latest_end is not None and day < date - datetime.timedelta(days=1):
+                return latest_end
+            day -= datetime.timedelta(days=1)
+        state = self.carry_in.get(emp_id)
+        if state and (latest_end is None or state.last_shift_end > latest_end):
+            latest_end = state.last_shift_end
+        return latest_end
+
+    def next_shift_start(self, emp_id, date, shift):
+        """
+        Returns the earliest start (absolute minutes) of the employee's shifts that start
+        after the given shift, looking two days ahead. None if there is none.
+        """
+        start, _ = self.geometry.interval(date, shift.id)
+        earliest_start = None
+        for day_offset in (0, 1, 2):
+            day = date + datetime.timedelta(days=day_offset)
+            for other_shift_id, _ward_id in self.assignments_on(emp_id, day):
+                other_start, _ = self.geometry.interval(day, other_shift_id)
+                if other_start > start and (earliest_start is None or other_start < earliest_start):
+                    earliest_start = other_start
+        return earliest_start
+
+    def consecutive_days_after(self, emp_id, date, limit=None):
+        """Counts the days worked in a row directly after the given date (capped at limit)."""
+        count = 0
+        day = date + datetime.timedelta(days=1)
+        while day <= self.end_date and self.worked_on(emp_id, day):
+            count += 1
+            if limit is not None and count >= limit:
+                break
+            day += datetime.timedelta(days=1)
+        return count
+
+    def slot_employee_ids(self, ward_id, date, shift_id):
+        """Employees already assigned to the slot."""
+        return self.assignments_by_slot.get((ward_id, date, shift_id), [])
+
+    def consecutive_days_before(self, emp_id, date, limit=None):
+        """Counts the days worked in a row directly before the given date (capped at limit)."""
+        count = 0
+        day = date - datetime.timedelta(days=1)
+        while day >= self.start_date and self.worked_on(emp_id, day):
+            count += 1
+            if limit is not None and count >= limit:
+                return count
+            day -= datetime.timedelta(days=1)
+        # Lückenlos bis zum Periodenbeginn gearbeitet: die Serie davor kommt aus dem Carry-in
+        state = self.carry_in.get(emp_id)
+        if day < self.start_date and state and state.last_work_day == day:
+            count += state.streak
+        return min(count, limit) if limit is not None else count
+
+    # --- Änderungen ---
+
+    def record_assignment(self, emp_id, date, shift_id, ward_id):
+        """Registers an existing or tentative assignment so later checks see it."""
+        self.assignments_by_employee.setdefault(emp_id, {}).setdefault(date, []).append((shift_id, ward_id))
+        self.assignments_by_slot.setdefault((ward_id, date, shift_id), []).append(emp_id)
+        self.hours.add(emp_id, date, shift_id)
+
+    def remove_assignment(self, emp_id, date, shift_id, ward_id):
+        """Forgets an assignment that was deleted (incremental repair)."""
+        entries = self.assignments_by_employee.get(emp_id, {}).get(date, [])
+        if (shift_id, ward_id) in entries:
+            entries.remove((shift_id, ward_id))
+            self.hours.remove(emp_id, date, shift_id)
+        slot = self.assignments_by_slot.get((ward_id, date, shift_id), [])
+        if emp_id in slot:
+            slot.remove(emp_id)
@@ -0,0 +1,83 @@
+# shift_planer/staffing.py
+
+from collections import namedtuple
+from shift_planer.models import Ward, Shift, Qualification
+from shift_planer.reference_cache import ReferenceCache
+
+# min_staff: Mindestbesetzung des Schichttyps, target_counting_staff: benötigte Pflegefachkräfte,
+# requires_critical: Schicht verlangt eine kritische Qualifikation
+ShiftRequirement = namedtuple('ShiftRequirement', ['min_staff', 'target_counting_staff', 'requires_critical'])
+
+
+def staffing_targets(ward, shift):
+    """
+    Returns (min_staff_for_shift_type, target_counting_staff) for a shift on a ward:
+    the minimum head count of the shift type and the number of staff counting towards
+    the ratio (one professional per three patients, at least the minimum head count).
+    """
+    min_staff_for_shift_type = 0
+    if shift.name == 'EARLY':
+        min_staff_for_shift_type = ward.min_staff_early_shift
+    elif shift.name == 'LATE':
+        min_staff_for_shift_type = ward.min_staff_late_shift
+    elif shift.name == 'NIGHT':
+        min_staff_for_shift_type = ward.min_staff_night_shift
+
+    required_professionals_for_patients = 0
+    if ward.current_patients > 0:
+        required_professionals_for_patients = (ward.current_patients + 2) // 3
+
+    return min_staff_for_shift_type, max(required_professionals_for_patients, min_staff_for_shift_type)
+
+
+class StaffingRequirements:
+    """ShiftRequirement for every (ward, shift) pair, computed once from the given wards and shifts."""
+
+    def __init__(self, wards, shifts, critical_shift_ids):
+        self.ward_ids = set()
+        self.shift_ids = {shift.id for shift in shifts}
+        self.requirements = {}
+        for ward in wards:
+            self.ward_ids.add(ward.id)
+            for shift in shifts:
+                min_staff, target_counting_staff = staffing_targets(ward, shift)
+                self.requirements[(ward.id, shift.id)] = ShiftRequirement(min_staff, target_counting_staff, shift.id in critical_shift_ids)
+
+    def __contains__(self, key):
+        return key in self.requirements
+
+    def get(self, ward_id, shift_id):
+        return self.requirements[(ward_id, shift_id)]
+
+    def for_ward(self, ward_id):
+        """Returns {shift_id: ShiftRequirement} for one ward."""
+        return {shift_id: self.requirements[(ward_id, shift_id)] for shift_id in self.shift_ids}
+
+
+def load_staffing_requirements():
+    """Builds StaffingRequirements for all wards and shifts with three queries."""
+    critical_shift_ids = set(
+        Shift.required_qualifications.through.objects.filter(
+            qualification__in=Qualification.objects.filter(is_critical=True)
+        ).values_list('shift_id', flat=True)
+    )
+    return StaffingRequirements(list(Ward.objects.all()), list(Shift.objects.all()), critical_shift_ids)
+
+
+_requirements_cache = ReferenceCache('staffing_requirements', load_staffing_requirements)
+
+
+def get_staffing_requirements(ward_ids=(), shift_ids=()):
+    """
+    Returns the process-wide StaffingRequirements. They are rebuilt after a Ward, Shift or
+    Qualification changed in any process (see signals.py and reference_cache.py) or if one
+    of the given ids is unknown.
+    """
+    return _requirements_cache.get(lambda requirements: (
+        all(ward_id in requirements.ward_ids for ward_id in ward_ids)
+        and all(shift_id in requirements.shift_ids for shift_id in shift_ids)
+    ))
+
+
+def invalidate_staffing_requirements():
+    _requirements_cache.invalidate()
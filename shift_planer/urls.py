@@ -2,7 +2,7 @@
 
 from django.urls import path
 from .views import (
-    EmployeeListView, HomeView, ShiftCalendarView, DailyShiftView, 
+    EmployeeListView, HomeView, ShiftCalendarView, ShiftCoverageView, DailyShiftView, 
     ShiftAssignmentCreateView, ShiftAssignmentUpdateView, ShiftAssignmentDeleteView, 
     EmployeeUpdateView, EmployeeProfileOverview,
     EmployeeAvailabilityCreateView, EmployeeAvailabilityUpdateView, EmployeeAvailabilityDeleteView,
@@ -14,7 +14,8 @@ from .views import (
     QualificationListView, QualificationCreateView,
     QualificationUpdateView, QualificationDeleteView,
     # Importiere die EmployeeCreateView und EmployeeDeleteView
-    EmployeeCreateView, EmployeeDeleteView , AutomaticScheduleView
+    EmployeeCreateView, EmployeeDeleteView , AutomaticScheduleView,
+    ScheduleJobDetailView, ScheduleJobStatusView, ScheduleRunLogView
 )
 
 app_name = 'shift_planer' # Definiere einen Namespace für diese App-URLs
@@ -53,6 +54,7 @@ urlpatterns = [
 
     # Shift planning and management URLs (existing)
     path('ward/<slug:ward_name_slug>/<int:year>/<int:month>/', ShiftCalendarView.as_view(), name='shift_calendar'),
+    path('ward/<slug:ward_name_slug>/<int:year>/<int:month>/coverage/', ShiftCoverageView.as_view(), name='shift_coverage'),
     path('ward/<slug:ward_name_slug>/<int:year>/<int:month>/<int:day>/daily/', DailyShiftView.as_view(), name='daily_shift_view'),
     path('ward/<slug:ward_name_slug>/<int:year>/<int:month>/<int:day>/shift/<int:shift_id>/plan/', ShiftAssignmentCreateView.as_view(), name='plan_shift'),
     path('ward/<slug:ward_name_slug>/<int:year>/<int:month>/<int:day>/plan/', ShiftAssignmentCreateView.as_view(), name='plan_shift_for_day'),
@@ -62,4 +64,7 @@ urlpatterns = [
 
     # New: Automatic Schedule Generation Page
     path('generate-schedule/', AutomaticScheduleView.as_view(), name='generate_schedule_auto'),
+    path('generate-schedule/jobs/<int:pk>/', ScheduleJobDetailView.as_view(), name='schedule_job_detail'),
+    path('generate-schedule/jobs/<int:pk>/status/', ScheduleJobStatusView.as_view(), name='schedule_job_status'),
+    path('generate-schedule/logs/<int:pk>/', ScheduleRunLogView.as_view(), name='schedule_run_log'),
 ]
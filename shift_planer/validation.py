@@ -0,0 +1,155 @@
+# shift_planer/validation.py
+
+import datetime
+from collections import namedtuple
+from shift_planer.models import Employee, Shift, ShiftAssignment, EmployeeAvailability, Absence
+from shift_planer.shift_geometry import get_shift_geometry
+from shift_planer.staffing import get_staffing_requirements
+from shift_planer.eligibility import get_eligibility_index
+
+# Ein zu besetzender Slot: Station, Datum, Schicht und die ausgewählten Mitarbeiter (Employee-Objekte oder IDs)
+AssignmentSlot = namedtuple('AssignmentSlot', ['ward', 'date', 'shift', 'employees'])
+
+# code: 'NOT_ALLOWED', 'ABSENT', 'UNAVAILABLE', 'OVERLAP', 'DUPLICATE' (blockierend),
+#       'CRITICAL_MISSING', 'UNDERSTAFFED' (Warnungen, employee_id ist dann None)
+Violation = namedtuple('Violation', ['code', 'employee_id', 'message'])
+
+SlotValidation = namedtuple('SlotValidation', ['errors', 'warnings'])
+
+
+def _employee_id(employee):
+    return employee if isinstance(employee, int) else employee.pk
+
+
+def validate_slots(slots, replace_slots=True, exclude_assignment_ids=()):
+    """
+    Checks all rules for a list of AssignmentSlots with a fixed number of queries.
+
+    Absences, availabilities and the assignments of the day before, the day itself and the
+    day after are loaded for all selected employees at once; every rule is then evaluated
+    in memory and all violations are reported instead of stopping at the first one.
+    Earlier slots of the same call count as existing assignments for later ones.
+
+    replace_slots: existing assignments of the slots themselves are ignored, because the
+    caller replaces them (as ShiftAssignmentCreateView/UpdateView do).
+    exclude_assignment_ids: further assignments to ignore (e.g. the one edited in the admin).
+
+    Returns one SlotValidation(errors, warnings) per slot.
+    """
+    slots = list(slots)
+    if not slots:
+        return []
+
+    employee_ids = {_employee_id(emp) for slot in slots for emp in slot.employees}
+    employees_by_id = Employee.objects.in_bulk(employee_ids)
+    shifts_by_id = Shift.objects.in_bulk()
+    eligibility = get_eligibility_index(employees_by_id)
+    staffing = get_staffing_requirements({slot.ward.pk for slot in slots}, shifts_by_id)
+    geometry = get_shift_geometry(list(shifts_by_id))
+
+    first_date = min(slot.date for slot in slots)
+    last_date = max(slot.date for slot in slots)
+
+    absences_by_employee = {}
+    for emp_id, start_date, end_date in Absence.objects.filter(
+        employee_id__in=employee_ids,
+        approved=True,
+        start_date__lte=last_date,
+        end_date__gte=first_date
+    ).values_list('employee_id', 'start_date', 'end_date'):
+        absences_by_employee.setdefault(emp_id, []).append((start_date, end_date))
+
+    unavailable = set(EmployeeAvailability.objects.filter(
+        employee_id__in=employee_ids,
+        date__in={slot.date for slot in slots},
+        is_available=False
+    ).values_list('employee_id', 'date'))
+
+    replaced = {(slot.ward.pk, slot.date, slot.shift.pk) for slot in slots} if replace_slots else set()
+    # emp_id -> {date: [(shift_id, ward_name)]}, Vortag bis Folgetag
+    assignments_by_employee = {}
+    for assignment_id, emp_id, date, shift_id, ward_id, ward_name in ShiftAssignment.objects.filter(
+        employee_id__in=employee_ids,
+        date__gte=first_date - datetime.timedelta(days=1),
+        date__lte=last_date + datetime.timedelta(days=1)
+    ).values_list('id', 'employee_id', 'date', 'shift_id', 'ward_id', 'ward__name'):
+        if assignment_id in exclude_assignment_ids or (ward_id, date, shift_id) in replaced:
+            continue
+        assignments_by_employee.setdefault(emp_id, {}).setdefault(date, []).append((shift_id, ward_name))
+
+    results = []
+    for slot in slots:
+        errors = []
+        warnings = []
+        ward, date, shift = slot.ward, slot.date, slot.shift
+        requirement = staffing.get(ward.pk, shift.pk)
+        selected = []
+        for emp_id in dict.fromkeys(_employee_id(emp) for emp in slot.employees):
+            emp = employees_by_id.get(emp_id)
+            if emp is None:
+                continue
+            selected.append(emp)
+            name = f"{emp.first_name} {emp.last_name}"
+
+            # 1. Erlaubte Schichten (keine Einträge = alle Schichten erlaubt)
+            if eligibility.has_allowed_shifts(emp_id) and not eligibility.is_allowed(emp_id, shift.pk):
+                errors.append(Violation('NOT_ALLOWED', emp_id, f"{name} ist nicht für die Schicht '{shift.get_name_display()}' eingetragen."))
+
+            # 2. Abwesenheit
+            if any(start <= date <= end for start, end in absences_by_employee.get(emp_id, ())):
+                errors.append(Violation('ABSENT', emp_id, f"{name} ist am {date} abwesend (Urlaub/Krankheit)."))
+
+            # 3. Verfügbarkeit
+            if (emp_id, date) in unavailable:
+                errors.append(Violation('UNAVAILABLE', emp_id, f"{name} ist am {date} nicht verfügbar."))
+
+            # 4. Überlappende Schichten, auch Nachtdienste vom Vortag bzw. in den Folgetag
+            # 5. Gleiche Schicht am gleichen Tag auf einer anderen Station
+            for day_offset in (-1, 0, 1):
+                other_date = date + datetime.timedelta(days=day_offset)
+                for other_shift_id, other_ward_name in assignments_by_employee.get(emp_id, {}).get(other_date, ()):
+                    if day_offset == 0 and other_shift_id == shift.pk:
+                        errors.append(Violation(
+                            'DUPLICATE', emp_id,
+                            f"{name} ist bereits für die Schicht '{shift.get_name_display()}' am {date} auf "
+                            f"Station '{other_ward_name}' eingetragen. Ein Mitarbeiter kann nicht zweimal zur gleichen Schicht an einem Tag eingetragen werden (auch nicht auf verschiedenen Stationen)."
+                        ))
+                    elif geometry.overlaps(shift.pk, other_shift_id, day_offset):
+                        other_shift = shifts_by_id[other_shift_id]
+                        errors.append(Violation(
+                            'OVERLAP', emp_id,
+                            f"{name} ist bereits am {other_date} von "
+                            f"'{other_shift.get_name_display()}' ({other_shift.start_time.strftime('%H:%M')}-{other_shift.end_time.strftime('%H:%M')}) eingetragen. "
+                            f"Ein Mitarbeiter kann nicht zu mehreren überlappenden Schichten zugewiesen werden."
+                        ))
+
+        # --- Prüfungen für die ganze Schicht (nicht blockierende Warnungen) ---
+        if requirement.requires_critical and ward.current_patients > 0:
+            if not any(eligibility.has_critical_qualification(emp.pk) for emp in selected):
+                warnings.append(Violation(
+                    'CRITICAL_MISSING', None,
+                    f"WARNUNG: Es fehlt noch ein Mitarbeiter mit kritischer Qualifikation für die Schicht '{shift.get_name_display()}' auf Station '{ward.name}'."
+                ))
+
+        if ward.current_patients > 0:
+            target_counting_staff = requirement.target_counting_staff
+            counting_staff = sum(1 for emp in selected if eligibility.counts_towards_staff_ratio(emp.pk))
+            if counting_staff < target_counting_staff:
+                warnings.append(Violation(
+                    'UNDERSTAFFED', None,
+                    f"WARNUNG: Nicht genügend Pflegefachkräfte für die Schicht '{shift.get_name_display()}' auf Station '{ward.name}'. "
+                    f"Benötigt: mindestens {target_counting_staff} Pflegefachkräfte. Aktuell: {counting_staff}."
+                ))
+
+        results.append(SlotValidation(errors, warnings))
+
+        # Dieser Slot gilt für die folgenden Slots als bestehende Zuweisung
+        for emp in selected:
+            assignments_by_employee.setdefault(emp.pk, {}).setdefault(date, []).append((shift.pk, ward.name))
+
+    return results
+
+
+def validate_slot(ward, date, shift, employees, **kwargs):
+    """Convenience wrapper for a single slot; returns its SlotValidation."""
+    return validate_slots([AssignmentSlot(ward, date, shift, employees)], **kwargs)[0]
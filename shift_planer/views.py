@@ -1,16 +1,22 @@
 # shift_planer/views.py
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.generic import ListView, TemplateView, FormView, UpdateView, DeleteView, CreateView
-from django.urls import reverse_lazy
+from django.views import View
+from django.views.generic import ListView, TemplateView, FormView, UpdateView, DeleteView, CreateView, DetailView
+from django.urls import reverse, reverse_lazy
+from django.http import JsonResponse
 from django.contrib import messages
 from django.db import transaction
 
-from shift_planer.models import Employee, Ward, Shift, ShiftAssignment, EmployeeAvailability, Absence, Qualification, ProfessionalProfile # ProfessionalProfile und Qualification hinzugefügt
+from shift_planer.models import Employee, Ward, Shift, ShiftAssignment, EmployeeAvailability, Absence, Qualification, ProfessionalProfile, ScheduleJob, ScheduleRunLog # ProfessionalProfile und Qualification hinzugefügt
 import datetime
-import calendar
 from shift_planer.forms import ShiftAssignmentForm, EmployeeProfileForm, EmployeeAvailabilityForm, AbsenceForm, AutomaticScheduleForm
-from .scheduler import ShiftScheduler  # Importiere den Scheduler
+from .jobs import enqueue_job
+from .scheduler import repair_for_employee
+from .staffing import get_staffing_requirements
+from .calendar_cache import get_coverage_matrix, batched_invalidation, invalidate_calendar_month
+from .scheduler_log import CODE_LABELS, LEVELS, LEVEL_RANK
+from .weekly_hours import get_weekly_hours, weeks_between, capacity_minutes
 
 # Class-based view to display a list of all employees
 class EmployeeListView(ListView):
@@ -70,50 +76,32 @@ class ShiftCalendarView(TemplateView):
         ward_name_slug = self.kwargs['ward_name_slug']
 
         ward = get_object_or_404(Ward, slug=ward_name_slug)
+        coverage = get_coverage_matrix(ward, year, month)
+
+        # Wochenstunden der eingeplanten Mitarbeiter, stationsübergreifend aus dem Wochenstundenkonto
+        first_day, last_day = coverage.days[0]['date_obj'], coverage.days[-1]['date_obj']
+        hours = get_weekly_hours(first_day, last_day)
+        weeks = weeks_between(first_day, last_day)
+        names = {}
+        for row in coverage.rows:
+            for cell in row.cells:
+                for entry in cell.entries:
+                    names.setdefault(entry.employee_id, f"{entry.first_name} {entry.last_initial}.")
+        weekly_hours = [
+            {'name': name, 'weeks': hours.week_summary(emp_id, weeks)}
+            for emp_id, name in sorted(names.items(), key=lambda item: item[1])
+        ]
 
-        cal = calendar.Calendar()
-        month_days = cal.itermonthdays2(year, month)
-
-        calendar_data = []
-        for day, weekday in month_days:
-            if day != 0:
-                calendar_data.append({
-                    'day': day,
-                    'date_obj': datetime.date(year, month, day),
-                    'weekday': weekday,
-                    'weekday_name': ['Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So'][weekday]
-                })
-        
-        all_shifts = Shift.objects.all().order_by('start_time')
-
-        start_date = datetime.date(year, month, 1)
-        end_date = datetime.date(year, month, calendar.monthrange(year, month)[1])
-
-        existing_assignments = ShiftAssignment.objects.filter(
-            ward=ward,
-            date__gte=start_date,
-            date__lte=end_date
-        ).select_related('employee', 'shift').order_by('date', 'shift__start_time', 'employee__last_name')
-
-        assignments_by_day_shift = {}
-        for assignment in existing_assignments:
-            date_key = assignment.date
-            shift_id_key = assignment.shift.id
-            if date_key not in assignments_by_day_shift:
-                assignments_by_day_shift[date_key] = {}
-            if shift_id_key not in assignments_by_day_shift[date_key]:
-                assignments_by_day_shift[date_key][shift_id_key] = []
-            assignments_by_day_shift[date_key][shift_id_key].append(assignment)
-        
         context.update({
             'page_title': f'Schichtplan für {ward.name} - {datetime.date(year, month, 1).strftime("%B %Y")}',
             'ward': ward,
             'ward_slug_for_urls': ward.slug,
             'year': year,
             'month': month,
-            'calendar_data': calendar_data,
-            'all_shifts': all_shifts,
-            'assignments_by_day_shift': assignments_by_day_shift,
+            'calendar_data': coverage.days,
+            'coverage_rows': coverage.rows,
+            'hours_weeks': [f"KW {week}" for _iso_year, week in weeks],
+            'weekly_hours': weekly_hours,
             # For navigation
             'prev_month': (month - 1) if month > 1 else 12,
             'prev_year': year if month > 1 else year - 1,
@@ -122,6 +110,12 @@ class ShiftCalendarView(TemplateView):
         })
         return context
 
+# JSON form of the month coverage matrix shown by ShiftCalendarView
+class ShiftCoverageView(View):
+    def get(self, request, ward_name_slug, year, month):
+        ward = get_object_or_404(Ward, slug=ward_name_slug)
+        return JsonResponse(get_coverage_matrix(ward, year, month).as_dict())
+
 # View for displaying a daily shift overview for a specific ward and date
 class DailyShiftView(TemplateView):
     template_name = 'shift_planer/daily_shift_view.html'
@@ -142,54 +136,41 @@ class DailyShiftView(TemplateView):
             return redirect('shift_planer:home')
 
         # Order by shift start time, then employee for consistent display
-        # NEU: prefetch_related professional_profile und shift__required_qualifications
-        all_daily_assignments = ShiftAssignment.objects.filter(
+        all_daily_assignments = list(ShiftAssignment.objects.filter(
             ward=ward,
             date=selected_date
-        ).select_related('employee__professional_profile', 'shift').prefetch_related('shift__required_qualifications', 'employee__qualifications').order_by('shift__start_time', 'employee__last_name')
+        ).select_related('employee__professional_profile', 'shift').order_by('shift__start_time', 'employee__last_name'))
 
+        all_shifts = list(Shift.objects.all().order_by('start_time'))
+        staffing = get_staffing_requirements([ward.pk], [shift.pk for shift in all_shifts])
 
-        all_shifts = Shift.objects.all().order_by('start_time')
-        
-        shifts_data = {}
-        # Hol alle kritischen Qualifikationen aus der DB
-        critical_qualifications_db = set(Qualification.objects.filter(is_critical=True).values_list('pk', flat=True))
+        # Zuweisungen in einem Durchlauf nach Schicht gruppieren
+        assignments_by_shift = {}
+        for assignment in all_daily_assignments:
+            assignments_by_shift.setdefault(assignment.shift_id, []).append(assignment)
 
+        # Mitarbeiter des Tages mit kritischer Qualifikation, in einer Abfrage über die Zwischentabelle
+        employees_with_critical_qual = set(
+            Employee.qualifications.through.objects.filter(
+                employee_id__in={assignment.employee_id for assignment in all_daily_assignments},
+                qualification__is_critical=True
+            ).values_list('employee_id', flat=True)
+        ) if all_daily_assignments else set()
+
+        shifts_data = {}
         for shift in all_shifts:
-            assignments_for_this_shift = [
-                assignment for assignment in all_daily_assignments if assignment.shift == shift
-            ]
-
-            assigned_professional_nurses_count = 0
-            assigned_total_staff_count = len(assignments_for_this_shift)
-            is_critical_qual_needed = shift.required_qualifications.filter(is_critical=True).exists()
-            is_critical_qual_met = False
-
-            for assignment in assignments_for_this_shift:
-                # Prüfe für Pflegefachkräfte (basierend auf professional_profile)
-                if hasattr(assignment.employee, 'professional_profile') and assignment.employee.professional_profile and assignment.employee.professional_profile.counts_towards_staff_ratio:
-                    assigned_professional_nurses_count += 1
-                
-                # Prüfe, ob die kritische Qualifikation erfüllt ist
-                if is_critical_qual_needed:
-                    employee_has_critical_qual = any(
-                        q.pk in critical_qualifications_db for q in assignment.employee.qualifications.all()
-                    )
-                    if employee_has_critical_qual:
-                        is_critical_qual_met = True
-            
-            # Berechne die benötigten Pflegefachkräfte basierend auf der Patientenzahl der Station und dem Schichttyp
-            required_staff_for_patients = (ward.current_patients + 2) // 3 if ward.current_patients > 0 else 0
-            
-            min_staff_for_shift_type = 0
-            if shift.name == 'EARLY':
-                min_staff_for_shift_type = ward.min_staff_early_shift
-            elif shift.name == 'LATE':
-                min_staff_for_shift_type = ward.min_staff_late_shift
-            elif shift.name == 'NIGHT':
-                min_staff_for_shift_type = ward.min_staff_night_shift
-            
-            required_professional_nurses_count = max(required_staff_for_patients, min_staff_for_shift_type)
+            assignments_for_this_shift = assignments_by_shift.get(shift.pk, [])
+            requirement = staffing.get(ward.pk, shift.pk)
+
+            # Prüfe für Pflegefachkräfte (basierend auf professional_profile)
+            assigned_professional_nurses_count = sum(
+                1 for assignment in assignments_for_this_shift
+                if assignment.employee.professional_profile and assignment.employee.professional_profile.counts_towards_staff_ratio
+            )
+            is_critical_qual_needed = requirement.requires_critical
+            is_critical_qual_met = is_critical_qual_needed and any(
+                assignment.employee_id in employees_with_critical_qual for assignment in assignments_for_this_shift
+            )
 
             shifts_data[shift.get_name_display()] = {
                 'shift_pk': shift.pk,
@@ -197,13 +178,12 @@ class DailyShiftView(TemplateView):
                 'shift_end_time': shift.end_time,
                 'assignments': assignments_for_this_shift,
                 'assigned_professional_nurses_count': assigned_professional_nurses_count,
-                'required_professional_nurses_count': required_professional_nurses_count,
-                'assigned_total_staff_count': assigned_total_staff_count,
+                'required_professional_nurses_count': requirement.target_counting_staff,
+                'assigned_total_staff_count': len(assignments_for_this_shift),
                 'is_critical_qual_needed': is_critical_qual_needed,
                 'is_critical_qual_met': is_critical_qual_met,
             }
 
-
         context.update({
             'page_title': f'Schichtplan für {ward.name} - {selected_date.strftime("%d.%m.%Y")}',
             'ward': ward,
@@ -311,7 +291,7 @@ class ShiftAssignmentCreateView(FormView):
 
         all_selected_employees = list(professional_nurses) + list(nursing_assistants)
 
-        with transaction.atomic():
+        with transaction.atomic(), batched_invalidation():
             ShiftAssignment.objects.filter(
                 ward=ward,
                 date=date,
@@ -329,6 +309,8 @@ class ShiftAssignmentCreateView(FormView):
                 ))
             
             ShiftAssignment.objects.bulk_create(new_assignments)
+            # bulk_create löst keine Signale aus
+            invalidate_calendar_month(ward.pk, date.year, date.month)
 
         messages.success(self.request, f"Schicht für {ward.name} am {date.strftime('%d.%m.%Y')} - {shift.get_name_display()} erfolgreich geplant!")
         return redirect(self.get_success_url())
@@ -458,7 +440,7 @@ class ShiftAssignmentUpdateView(FormView):
 
         all_selected_employees = list(professional_nurses) + list(nursing_assistants)
 
-        with transaction.atomic():
+        with transaction.atomic(), batched_invalidation():
             ShiftAssignment.objects.filter(
                 ward=ward,
                 date=date,
@@ -476,6 +458,8 @@ class ShiftAssignmentUpdateView(FormView):
                 ))
             
             ShiftAssignment.objects.bulk_create(new_assignments)
+            # bulk_create löst keine Signale aus
+            invalidate_calendar_month(ward.pk, date.year, date.month)
 
         messages.success(self.request, f"Schicht für {ward.name} am {date.strftime('%d.%m.%Y')} - {shift.get_name_display()} erfolgreich aktualisiert!")
         return redirect(self.get_success_url())
@@ -522,7 +506,7 @@ class ShiftAssignmentDeleteView(DeleteView):
         date = obj_data['date']
         shift = obj_data['shift']
 
-        with transaction.atomic():
+        with transaction.atomic(), batched_invalidation():
             deleted_count, _ = ShiftAssignment.objects.filter(
                 ward=ward,
                 date=date,
@@ -629,12 +613,32 @@ class EmployeeProfileOverview(TemplateView):
         context['availabilities'] = EmployeeAvailability.objects.filter(employee=employee).order_by('date')
         context['absences'] = Absence.objects.filter(employee=employee).order_by('start_date')
 
+        # Diese und die nächsten vier Wochen aus dem Wochenstundenkonto (dieselben Zahlen wie im Kalender)
+        today = datetime.date.today()
+        horizon = today + datetime.timedelta(weeks=4)
+        context['weekly_hours'] = get_weekly_hours(today, horizon).week_summary(
+            employee.pk, weeks_between(today, horizon), capacity=capacity_minutes(employee.available_hours_per_week)
+        )
+
         context['back_to_employee_list_url'] = reverse_lazy('shift_planer:employee_list')
         return context
 
 
+class ScheduleRepairMixin:
+    """Repairs the employee's future assignments after an absence or unavailability was saved."""
+
+    def repair_schedule(self, employee, start_date, end_date):
+        result = repair_for_employee(employee.pk, start_date, end_date)
+        if not result or not (result.get("removed") or result.get("kept_confirmed")):
+            return
+        if result["success"]:
+            messages.info(self.request, f"Dienstplan für {employee.first_name} {employee.last_name} angepasst: {result['message']}")
+        else:
+            messages.error(self.request, result["message"])
+
+
 # New: Views for EmployeeAvailability
-class EmployeeAvailabilityCreateView(CreateView):
+class EmployeeAvailabilityCreateView(ScheduleRepairMixin, CreateView):
     model = EmployeeAvailability
     form_class = EmployeeAvailabilityForm
     template_name = 'shift_planer/employee_availability_form.html'
@@ -660,11 +664,16 @@ class EmployeeAvailabilityCreateView(CreateView):
             existing_availability.is_available = form.cleaned_data['is_available']
             existing_availability.save(update_fields=['is_available'])
             messages.success(self.request, f"Verfügbarkeit für {form.instance.employee.first_name} {form.instance.employee.last_name} am {form.instance.date.strftime('%d.%m.%Y')} aktualisiert.")
+            if not existing_availability.is_available:
+                self.repair_schedule(existing_availability.employee, existing_availability.date, existing_availability.date)
             return redirect(self.get_success_url())
         else:
             # If not exists, create new
             messages.success(self.request, f"Verfügbarkeit für {form.instance.employee.first_name} {form.instance.employee.last_name} am {form.instance.date.strftime('%d.%m.%Y')} erstellt.")
-            return super().form_valid(form) # Calls form.save() internally
+            response = super().form_valid(form) # Calls form.save() internally
+            if not self.object.is_available:
+                self.repair_schedule(self.object.employee, self.object.date, self.object.date)
+            return response
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -680,12 +689,18 @@ class EmployeeAvailabilityCreateView(CreateView):
         return reverse_lazy('shift_planer:employee_profile', kwargs={'pk': self.kwargs['employee_pk']})
 
 
-class EmployeeAvailabilityUpdateView(UpdateView):
+class EmployeeAvailabilityUpdateView(ScheduleRepairMixin, UpdateView):
     model = EmployeeAvailability
     form_class = EmployeeAvailabilityForm
     template_name = 'shift_planer/employee_availability_form.html'
     context_object_name = 'availability'
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if not self.object.is_available:
+            self.repair_schedule(self.object.employee, self.object.date, self.object.date)
+        return response
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         employee = self.get_object().employee
@@ -723,7 +738,7 @@ class EmployeeAvailabilityDeleteView(DeleteView):
 
 
 # New: Views for Absence
-class AbsenceCreateView(CreateView):
+class AbsenceCreateView(ScheduleRepairMixin, CreateView):
     model = Absence
     form_class = AbsenceForm
     template_name = 'shift_planer/absence_form.html'
@@ -738,7 +753,10 @@ class AbsenceCreateView(CreateView):
         # Ensure employee is set on the instance before saving
         form.instance.employee = get_object_or_404(Employee, pk=self.kwargs['employee_pk'])
         messages.success(self.request, f"Abwesenheit für {form.instance.employee.first_name} {form.instance.employee.last_name} ({form.instance.get_type_display()}) von {form.instance.start_date.strftime('%d.%m.%Y')} bis {form.instance.end_date.strftime('%d.%m.%Y')} erstellt.")
-        return super().form_valid(form) # Calls form.save() internally
+        response = super().form_valid(form) # Calls form.save() internally
+        if self.object.approved:
+            self.repair_schedule(self.object.employee, self.object.start_date, self.object.end_date)
+        return response
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -754,12 +772,18 @@ class AbsenceCreateView(CreateView):
         return reverse_lazy('shift_planer:employee_profile', kwargs={'pk': self.kwargs['employee_pk']})
 
 
-class AbsenceUpdateView(UpdateView):
+class AbsenceUpdateView(ScheduleRepairMixin, UpdateView):
     model = Absence
     form_class = AbsenceForm
     template_name = 'shift_planer/absence_form.html'
     context_object_name = 'absence'
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if self.object.approved:
+            self.repair_schedule(self.object.employee, self.object.start_date, self.object.end_date)
+        return response
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         employee = self.get_object().employee
@@ -945,41 +969,89 @@ class AutomaticScheduleView(FormView):
         year = form.cleaned_data['year']
         month = int(form.cleaned_data['month'])
 
-        min_rest_hours = form.cleaned_data['min_rest_hours']
-        max_consecutive_shifts = form.cleaned_data['max_consecutive_shifts']
-        overwrite_existing = form.cleaned_data['overwrite_existing']
-
-        # Initialize the scheduler with parameters from the form
-        scheduler = ShiftScheduler(min_rest_hours, max_consecutive_shifts)
-        
-        # Call the generate_schedule method
-        result = scheduler.generate_schedule(
-            year=year, 
-            month=month, 
-            ward_slug=ward.slug, 
-            overwrite=overwrite_existing
+        # Die Planung läuft als Hintergrund-Job, die Anfrage kehrt sofort zurück
+        job = enqueue_job(
+            ward=ward,
+            year=year,
+            month=month,
+            min_rest_hours=form.cleaned_data['min_rest_hours'],
+            max_consecutive_shifts=form.cleaned_data['max_consecutive_shifts'],
+            overwrite=form.cleaned_data['overwrite_existing'],
+            improve_seconds=form.cleaned_data['improve_seconds'] or 0
         )
+        messages.info(self.request, f"Dienstplanerstellung für {ward.name} ({month:02d}/{year}) wurde gestartet.")
+        return redirect('shift_planer:schedule_job_detail', pk=job.pk)
 
-        # Add messages based on the scheduler's result
-        if result["success"]:
-            messages.success(self.request, result["message"])
-            # Add detailed logs as info messages
-            for log_msg in scheduler.get_logs():
-                if "[ERROR]" in log_msg:
-                    messages.error(self.request, log_msg)
-                elif "[WARNING]" in log_msg:
-                    messages.warning(self.request, log_msg)
-                else:
-                    messages.info(self.request, log_msg)
-            
-            # Redirect to the generated calendar view
-            return redirect('shift_planer:shift_calendar', 
-                            ward_name_slug=ward.slug, 
-                            year=year, 
-                            month=month)
-        else:
-            messages.error(self.request, result["message"])
-            # Add detailed logs as error messages if generation failed
-            for log_msg in scheduler.get_logs():
-                messages.error(self.request, log_msg)
-            return self.form_invalid(form) # Re-render the form with errors
\ No newline at end of file
+
+class ScheduleJobDetailView(DetailView):
+    model = ScheduleJob
+    template_name = 'shift_planer/schedule_job_detail.html'
+    context_object_name = 'job'
+
+    def get_queryset(self):
+        return ScheduleJob.objects.select_related('ward')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = f"Dienstplanerstellung #{self.object.pk}"
+        run_log = ScheduleRunLog.objects.filter(job=self.object).first()
+        context['run_log'] = run_log
+        if run_log:
+            context['log_summary'] = sorted(
+                ((CODE_LABELS.get(code, code), count) for code, count in run_log.code_counts.items()),
+                key=lambda item: -item[1]
+            )
+        return context
+
+
+class ScheduleJobStatusView(View):
+    """JSON status of a schedule job, polled by the job page."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(ScheduleJob.objects.select_related('ward'), pk=pk)
+        data = {
+            "id": job.pk,
+            "status": job.status,
+            "progress": job.progress,
+            "progress_message": job.progress_message,
+            "result_message": job.result_message,
+            "is_finished": job.is_finished,
+            "calendar_url": None,
+        }
+        if job.status == 'SUCCEEDED':
+            data["calendar_url"] = reverse('shift_planer:shift_calendar', kwargs={
+                'ward_name_slug': job.ward.slug, 'year': job.year, 'month': job.month
+            })
+        return JsonResponse(data)
+
+
+class ScheduleRunLogView(ListView):
+    """Paginated entries of a saved run log, optionally filtered by minimum level and code."""
+    template_name = 'shift_planer/schedule_run_log.html'
+    context_object_name = 'entries'
+    paginate_by = 100
+
+    def get_queryset(self):
+        self.run_log = get_object_or_404(ScheduleRunLog.objects.select_related('ward', 'job'), pk=self.kwargs['pk'])
+        entries = self.run_log.entries.all()
+        self.level = self.request.GET.get('level', '')
+        if self.level in LEVEL_RANK:
+            entries = entries.filter(level__in=[level for level in LEVELS if LEVEL_RANK[level] >= LEVEL_RANK[self.level]])
+        self.code = self.request.GET.get('code', '')
+        if self.code:
+            entries = entries.filter(code=self.code)
+        return entries.order_by('sequence')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = f"Planungsprotokoll #{self.run_log.pk}"
+        context['run_log'] = self.run_log
+        context['levels'] = LEVELS
+        context['codes'] = sorted(self.run_log.code_counts)
+        context['selected_level'] = self.level
+        context['selected_code'] = self.code
+        # Filter bei Seitenwechsel beibehalten
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['filter_query'] = params.urlencode()
+        return context
@@ -0,0 +1,148 @@
+# shift_planer/weekly_hours.py
+
+import datetime
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import ExtractIsoYear, ExtractWeek
+from shift_planer.models import ShiftAssignment
+from shift_planer.shift_geometry import get_shift_geometry
+from shift_planer.calendar_cache import assignment_scopes, get_versioned
+
+# Wochenstunden als Planungsregel: 'hard' (nie überschreiten), 'soft' (nur wenn sonst niemand frei ist) oder 'off'
+WEEKLY_HOURS_MODES = ('hard', 'soft', 'off')
+DEFAULT_WEEKLY_HOURS_MODE = getattr(settings, 'SCHEDULER_WEEKLY_HOURS', 'hard')
+
+
+def iso_week(date):
+    """(ISO year, ISO week) of a date."""
+    iso_year, week, _weekday = date.isocalendar()
+    return iso_year, week
+
+
+def week_range(start_date, end_date):
+    """Monday of the first and Sunday of the last ISO week touched by the period."""
+    return (
+        start_date - datetime.timedelta(days=start_date.weekday()),
+        end_date + datetime.timedelta(days=6 - end_date.weekday()),
+    )
+
+
+def capacity_minutes(hours):
+    return int(round(float(hours) * 60))
+
+
+class WeeklyHoursLedger:
+    """
+    Minutes worked per employee and ISO week, next to each employee's weekly capacity
+    (Employee.available_hours_per_week). Shift durations come precomputed from ShiftGeometry
+    (overnight shifts count fully towards the week they start in); add() and remove() are O(1).
+    """
+
+    def __init__(self, durations, capacities=None):
+        self.durations = durations
+        self.capacities = dict(capacities or {})   # emp_id -> Minuten je Woche
+        self.minutes = {}                          # emp_id -> {(iso_year, week): Minuten}
+
+    @classmethod
+    def load(cls, start_date, end_date, employee_ids=None, exclude=None, capacities=None, durations=None):
+        """
+        Seeds a ledger with the assignments of every ISO week touched by the period using one
+        aggregate query; capacities of the employees found are read in the same query.
+        exclude: optional (first, last) dates whose assignments are left out, e.g. the planning
+        period that the snapshot records itself. durations: shift_id -> minutes (default: the
+        cached ShiftGeometry).
+        """
+        first, last = week_range(start_date, end_date)
+        queryset = ShiftAssignment.objects.filter(date__gte=first, date__lte=last)
+        if employee_ids is not None:
+            queryset = queryset.filter(employee_id__in=employee_ids)
+        if exclude is not None:
+            queryset = queryset.exclude(date__gte=exclude[0], date__lte=exclude[1])
+        rows = list(queryset.values(
+            'employee_id', 'employee__available_hours_per_week', 'shift_id',
+            iso_year=ExtractIsoYear('date'), week=ExtractWeek('date')
+        ).annotate(count=Count('id')).order_by())
+
+        if durations is None:
+            durations = get_shift_geometry({row['shift_id'] for row in rows}).duration_minutes
+        ledger = cls(durations, capacities)
+        for row in rows:
+            emp_id = row['employee_id']
+            ledger.capacities.setdefault(emp_id, capacity_minutes(row['employee__available_hours_per_week']))
+            ledger._add_minutes(emp_id, (row['iso_year'], row['week']), row['count'] * ledger.durations[row['shift_id']])
+        return ledger
+
+    def subset(self, employee_ids):
+        subset = WeeklyHoursLedger(self.durations)
+        for emp_id in employee_ids:
+            if emp_id in self.capacities:
+                subset.capacities[emp_id] = self.capacities[emp_id]
+            if emp_id in self.minutes:
+                subset.minutes[emp_id] = dict(self.minutes[emp_id])
+        return subset
+
+    def _add_minutes(self, emp_id, week, minutes):
+        weeks = self.minutes.setdefault(emp_id, {})
+        weeks[week] = weeks.get(week, 0) + minutes
+
+    def add(self, emp_id, date, shift_id):
+        self._add_minutes(emp_id, iso_week(date), self.durations[shift_id])
+
+    def remove(self, emp_id, date, shift_id):
+        self._add_minutes(emp_id, iso_week(date), -self.durations[shift_id])
+
+    # --- Abfragen ---
+
+    def worked(self, emp_id, date):
+        """Minutes in the ISO week of the date."""
+        return self.minutes.get(emp_id, {}).get(iso_week(date), 0)
+
+    def capacity(self, emp_id):
+        """Weekly capacity in minutes, None if unknown (no limit)."""
+        return self.capacities.get(emp_id)
+
+    def fits(self, emp_id, date, shift_id):
+        """True if the shift still fits into the employee's week."""
+        capacity = self.capacities.get(emp_id)
+        return capacity is None or self.worked(emp_id, date) + self.durations[shift_id] <= capacity
+
+    def weeks(self, emp_id):
+        """[((iso_year, week), minutes)] in week order."""
+        return sorted(self.minutes.get(emp_id, {}).items())
+
+    def week_summary(self, emp_id, weeks, capacity=None):
+        """
+        One dict per ISO week for display: label, hours, capacity in hours and whether it is
+        exceeded. capacity (minutes) is used for employees without assignments in the ledger.
+        """
+        capacity = self.capacities.get(emp_id, capacity)
+        summary = []
+        for iso_year, week in weeks:
+            minutes = self.minutes.get(emp_id, {}).get((iso_year, week), 0)
+            summary.append({
+                "week": f"{iso_year}-W{week:02d}",
+                "hours": round(minutes / 60, 2),
+                "capacity": None if capacity is None else round(capacity / 60, 2),
+                "over_capacity": capacity is not None and minutes > capacity,
+            })
+        return summary
+
+
+def weeks_between(start_date, end_date):
+    """The ISO weeks touched by the period, in order."""
+    first, last = week_range(start_date, end_date)
+    return [iso_week(first + datetime.timedelta(days=offset)) for offset in range(0, (last - first).days + 1, 7)]
+
+
+def get_weekly_hours(start_date, end_date):
+    """
+    Cached WeeklyHoursLedger of all employees for the ISO weeks touched by the period, as shown
+    on the calendar and profile pages. It is rebuilt after an assignment in those weeks' months
+    or an employee changed (see calendar_cache.py and signals.py).
+    """
+    first, last = week_range(start_date, end_date)
+    ledger, _hit = get_versioned(
+        f"weekly_hours:{first.isoformat()}:{last.isoformat()}", assignment_scopes(first, last),
+        lambda: WeeklyHoursLedger.load(first, last)
+    )
+    return ledger